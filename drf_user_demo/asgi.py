@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'drf_user_demo.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from utils.django.db.pool import close_idle_connections  # noqa: E402, apps must be loaded first
+from utils.django.lifespan import LifespanMiddleware  # noqa: E402
+from utils.django.warmup import awarm_up  # noqa: E402
+
+# Workers warm up before accepting connections and close pooled connections on shutdown
+application = LifespanMiddleware(django_application, on_startup=[awarm_up],
+                                 on_shutdown=[sync_to_async(close_idle_connections)])
@@ -53,6 +53,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.django.middleware.MetricsMiddleware',  # Latency histograms for /api/metrics/, first to measure everything
+    'utils.django.middleware.QueryCountMiddleware',  # Logs number of queries of every request
+    'utils.django.middleware.ReplicaRoutingMiddleware',  # Reads of safe requests go to DATABASE_REPLICAS
     'django.middleware.security.SecurityMiddleware',
     # 'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +67,7 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'drf_user_demo.urls'
 
+# Templates are rendered only by Swagger UI, Redoc and the browsable API, the engine is loaded on first use
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -74,7 +78,6 @@ TEMPLATES = [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
             ],
         },
     },
@@ -85,19 +88,75 @@ WSGI_APPLICATION = 'drf_user_demo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are taken from a per-process pool (see utils.django.db.backends.postgresql) and returned there at the end
+# of every request. Without the pool, CONN_MAX_AGE keeps connections open between requests of the same thread
+
+DB_POOL = env.bool('DB_POOL', default=True)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'utils.django.db.backends.postgresql' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': env.str('DB_NAME'),
         'USER': env.str('DB_USER'),
         'PASSWORD': env.str('DB_PASSWORD'),
         'HOST': env.str('DB_HOST'),
         'PORT': env.str('DB_PORT'),
+        'CONN_MAX_AGE': 0 if DB_POOL else env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+        'POOL': {
+            'MAX_SIZE': env.int('DB_POOL_MAX_SIZE', default=10),
+            'TIMEOUT': env.float('DB_POOL_TIMEOUT', default=10),
+            'MAX_IDLE': env.float('DB_POOL_MAX_IDLE', default=300),
+            'MAX_LIFETIME': env.float('DB_POOL_MAX_LIFETIME', default=3600),
+        },
     }
 }
 
+# Read replicas, `host` or `host:port` of each (other settings are the same as of the primary). The first one is
+# `replica` database, the rest are `replica_2`, `replica_3` and so on
+
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(env.list('DB_REPLICA_HOSTS', default=[]), start=1):
+    replica_alias = 'replica' if index == 1 else f'replica_{index}'
+    replica_host, _, replica_port = replica_host.partition(':')
+    DATABASES[replica_alias] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(replica_alias)
+
+DATABASE_ROUTERS = ['utils.django.db.routers.ReplicaRouter']
+
+# Seconds a client reads from the primary after it wrote something, so that it sees its writes despite the replica lag
+DATABASE_REPLICA_PIN_SECONDS = env.int('DB_REPLICA_PIN_SECONDS', default=5)
+# Seconds an unavailable replica is skipped for
+DATABASE_REPLICA_RETRY_AFTER = env.int('DB_REPLICA_RETRY_AFTER', default=30)
+
+# Cache
+
+# Cached responses and users are invalidated on writes, so with several worker processes the cache must be shared by
+# all of them, e.g. CACHE_URL=redis://redis:6379/0. The local memory cache (default) is per process, so it's only
+# suitable for tests and a single-process development server
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    # Django's LocMemCache which doesn't make thread hops in asynchronous methods
+    CACHES['default']['BACKEND'] = 'utils.django.cache.LocMemCache'
+
 # Logging
 
+# Log files aren't tracked by git, so the directory may be missing in a fresh checkout
+LOG_DIR = BASE_DIR / 'logs'
+LOG_DIR.mkdir(exist_ok=True)
+
+# Share of SQL queries logged by `django.db.backends` at DEBUG level (only logged when DEBUG is on)
+LOG_SQL_SAMPLE_RATE = env.float('LOG_SQL_SAMPLE_RATE', default=0.1)
+
+# Handlers write to files from a background thread (see utils.django.log.QueueHandler), so that request latency
+# doesn't depend on disk speed. debug.log is written as JSON lines. Every worker process writes the same files,
+# and rotation by Python handlers isn't safe across processes, so files are rotated by logrotate
+# (see conf/logrotate.conf), and WatchedFileHandler reopens a file once it's rotated
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -106,29 +165,50 @@ LOGGING = {
             'format': '{asctime} {levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'utils.django.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sample_sql': {
+            '()': 'utils.django.log.SamplingFilter',
+            'name': 'django.db.backends',
+            'level': 'DEBUG',
+            'rate': LOG_SQL_SAMPLE_RATE,
+        },
     },
     'handlers': {
         'file_error': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'error.log',
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': LOG_DIR / 'error.log',
             'encoding': 'utf8',
             'formatter': 'timestamp',
         },
         'file_debug': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'debug.log',
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': LOG_DIR / 'debug.log',
             'encoding': 'utf8',
-            'formatter': 'timestamp',
+            'formatter': 'json',
+        },
+        'queue': {
+            'class': 'utils.django.log.QueueHandler',
+            'handlers': ['file_error', 'file_debug'],
+            'filters': ['sample_sql'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file_error', 'file_debug'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': True,
-        }
+        },
+        'utils': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': True,
+        },
     },
 }
 
@@ -150,6 +230,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Passwords are hashed in a bounded thread pool (see utils.django.hashers), so that hashing doesn't block the event
+# loop. When all workers are busy and the queue is full, requests which need hashing get 503 response
+PASSWORD_HASHING_MAX_WORKERS = env.int('PASSWORD_HASHING_MAX_WORKERS', default=4)
+PASSWORD_HASHING_MAX_QUEUE_SIZE = env.int('PASSWORD_HASHING_MAX_QUEUE_SIZE', default=64)
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -180,10 +265,47 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        # Use 'utils.rest_framework.authentication.StatelessJWTAuthentication' to build users from token claims
+        # without any DB or cache lookup
+        'utils.rest_framework.authentication.CachedJWTAuthentication',
+    ),
+
+    'EXCEPTION_HANDLER': 'utils.rest_framework.exceptions.exception_handler',
+}
+
+SIMPLE_JWT = {
+    # Puts is_superuser, is_staff and is_active claims into tokens (required by StatelessJWTAuthentication)
+    # and checks passwords asynchronously (required by AsyncTokenObtainPairView)
+    'TOKEN_OBTAIN_SERIALIZER': 'utils.rest_framework.authentication.AsyncTokenObtainPairSerializer',
+    # Reloads the claims from DB on every refresh, so that access tokens don't carry outdated flags
+    'TOKEN_REFRESH_SERIALIZER': 'utils.rest_framework.authentication.ClaimsTokenRefreshSerializer',
 }
 
+# For how long (in seconds) CachedJWTAuthentication caches authenticated users
+JWT_USER_CACHE_TIMEOUT = env.int('JWT_USER_CACHE_TIMEOUT', default=30)
+
+# Whether QueryCountMiddleware sends number of queries and DB time in Server-Timing header
+QUERY_COUNT_SERVER_TIMING = env.bool('QUERY_COUNT_SERVER_TIMING', default=DEBUG)
+
+# Token required to fetch /api/metrics/ (as `Authorization: Bearer <token>`), needed when it's behind nginx
+METRICS_TOKEN = env.str('METRICS_TOKEN', default='')
+
+# Clients allowed to fetch /api/metrics/ if METRICS_TOKEN isn't set (e.g. addresses of Prometheus servers connecting
+# to the app directly, behind a proxy every client has the proxy's address)
+METRICS_ALLOWED_IPS = env.list('METRICS_ALLOWED_IPS', default=['127.0.0.1', '::1'])
+
+# For how long (in seconds) responses of cached actions are kept (see utils.rest_framework.viewsets.cache)
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=60)
+
+# Functions run by every worker before it accepts connections (on ASGI lifespan startup), so that its first requests
+# aren't slower than the rest. Durations are logged and exposed as `worker_warm_up_seconds` metric
+WARM_UP = [
+    'utils.django.warmup.warm_up_urls',
+    'utils.rest_framework.warmup.warm_up_views',
+    'utils.rest_framework.warmup.warm_up_jwt',
+    'utils.django.warmup.warm_up_databases',
+]
+
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'DRF User Demo API',
@@ -191,3 +313,8 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
     'SCHEMA_PATH_PREFIX': '/api/',
 }
+
+# Schema files built by `build_schema` command and served by /api/schema/. With SPECTACULAR_LIVE_SCHEMA the schema
+# is generated on every request instead
+SPECTACULAR_SCHEMA_DIR = BASE_DIR / 'run' / 'schema'
+SPECTACULAR_LIVE_SCHEMA = env.bool('SPECTACULAR_LIVE_SCHEMA', default=DEBUG)
@@ -15,19 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+
+from utils.django.views import metrics_view
+from utils.rest_framework.views import AsyncTokenObtainPairView, lazy_api_view
 
 urlpatterns = [
     path('api/', include('users.urls')),
 
-    # Documentation routes
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # Documentation routes, drf_spectacular is imported on their first request
+    path('api/schema/', lazy_api_view('utils.rest_framework.schema.PrebuiltSpectacularAPIView'), name='schema'),
+    path('api/schema/swagger-ui/', lazy_api_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'),
+         name='swagger-ui'),
+    path('api/schema/redoc/', lazy_api_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'),
+         name='redoc'),
 
     # Authentication routes
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', AsyncTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+
+    # Prometheus metrics
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
@@ -6,3 +6,11 @@ class UsersConfig(AppConfig):
     name = 'users'
 
     verbose_name = 'Users'
+
+    def ready(self):
+        # Connect signal receivers which invalidate users cached by CachedJWTAuthentication
+        import utils.rest_framework.authentication  # noqa: F401
+        # Connect signal receivers which invalidate cached responses of UserViewSet
+        import users.signals  # noqa: F401
+        # Connect signal receiver which makes new DB connections record queries for QueryCountMiddleware
+        import utils.django.queries  # noqa: F401
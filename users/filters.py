@@ -1,9 +1,15 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
 
 from users.models import User
+from utils.rest_framework.filters import AsyncFilterBackendMixin
 
 USER_FILTERS = ('is_staff', 'is_active', 'is_superuser', 'date_joined')
-USER_SEARCH_FIELDS = ('first_name', 'last_name')
+USER_SEARCH_FIELDS = ('first_name', 'last_name')  # Fields of User.search_vector
 
 
 class UserFilterSet(filters.FilterSet):
@@ -12,3 +18,38 @@ class UserFilterSet(filters.FilterSet):
     class Meta:
         model = User
         fields = USER_FILTERS
+
+
+class FullTextSearchFilter(AsyncFilterBackendMixin, SearchFilter):
+    """
+        SearchFilter backed by a PostgreSQL tsvector column with a GIN index (set its name as `search_vector_field`
+        on the view), instead of `icontains` lookups, which scan the whole table.
+
+        Every search term matches words starting with it, all terms must match: `?search=jo sm` finds "John Smith".
+        Results are ordered by rank (the default ordering is a tiebreaker), unless `?ordering=` is given explicitly.
+    """
+    search_config = 'simple'  # Names must not be stemmed
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        search_vector_field = getattr(view, 'search_vector_field', None)
+        search_terms = self.get_search_terms(request)
+        if not search_vector_field or not search_terms:
+            return queryset
+
+        search_query = self.get_search_query(search_terms)
+        queryset = queryset.filter(**{search_vector_field: search_query})
+        if api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+
+        # ts_rank() returns real, which doesn't survive a round trip through a cursor exactly, while double does
+        rank = Cast(SearchRank(F(search_vector_field), search_query), FloatField())
+        return queryset.annotate(**{self.rank_annotation: rank}).order_by(
+            f'-{self.rank_annotation}', *queryset.query.order_by
+        )
+
+    def get_search_query(self, search_terms: list[str]) -> SearchQuery:
+        # Quote the terms, so that tsquery operators in them are matched literally
+        lexemes = (term.replace('\\', '\\\\').replace("'", "''") for term in search_terms)
+        return SearchQuery(' & '.join(f"'{lexeme}':*" for lexeme in lexemes), search_type='raw',
+                           config=self.search_config)
@@ -0,0 +1,221 @@
+import asyncio
+import datetime
+import json
+import platform
+import random
+import secrets
+import subprocess
+import time
+from collections import Counter, defaultdict
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.asgi import get_asgi_application
+from django.core.management import BaseCommand, CommandError
+from faker import Faker
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+from utils.django.loadtest import ASGIClient, HTTPClient, run_uvicorn, summarize
+
+USERNAME_PREFIX = 'bench-'
+
+DEFAULT_MIX = 'list=30,filter=15,search=15,retrieve=25,create=5,update=5,token=5'
+
+
+class Command(BaseCommand):
+    """
+        Load test of the users API: seeds users (prefixed with `bench-`, kept between runs), then replays a random
+        mix of calls (see --mix) with fixed concurrency against the ASGI application, either called in-process or
+        served by uvicorn. Reports latency percentiles and requests/sec of every operation and of all of them
+        as JSON (with the commit hash), so that results can be compared across commits:
+
+            python manage.py benchmark_api --output before.json
+
+        Requests are made by a superuser without a password. The superuser and users created by the run are
+        deleted afterwards, seeded users get a new random password every run. The sequence of calls depends only
+        on --seed, so runs with the same options make the same calls. Since it writes to the database, it runs
+        only with DEBUG on, unless --allow-write is passed.
+    """
+    help = 'Load test the users API and report latency and throughput as JSON'
+
+    OPERATIONS = ('list', 'filter', 'search', 'retrieve', 'create', 'update', 'token')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Number of users to seed')
+        parser.add_argument('--requests', type=int, default=2000, help='Number of measured requests')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent clients')
+        parser.add_argument('--warmup', type=int, default=100, help='Number of requests made before measuring')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weights of operations, "{DEFAULT_MIX}" by default')
+        parser.add_argument('--server', choices=('asgi', 'uvicorn'), default='asgi',
+                            help='Call the ASGI application directly, or through uvicorn (over HTTP)')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random sequence of calls')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+        parser.add_argument('--allow-write', action='store_true',
+                            help='Run with DEBUG off, e.g. against a staging database')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['allow_write']:
+            raise CommandError('The benchmark creates and changes users, pass --allow-write to run it with DEBUG off')
+        mix = self.parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        password = secrets.token_urlsafe(16)
+
+        start = time.perf_counter()
+        users = self.seed_users(options['users'], rng, password)
+        self.stderr.write(f'Seeded users in {time.perf_counter() - start:.1f} s')
+
+        operations = rng.choices(list(mix), weights=list(mix.values()), k=options['warmup'] + options['requests'])
+        calls = [self.make_call(operation, index, rng, users, password) for index, operation in enumerate(operations)]
+
+        application = get_asgi_application()
+        admin = self.create_admin()
+        try:
+            authorization = f'Bearer {RefreshToken.for_user(admin).access_token}'
+            if options['server'] == 'uvicorn':
+                with run_uvicorn(application) as (host, port):
+                    results, elapsed = asyncio.run(self.arun(
+                        lambda: HTTPClient(host, port), calls, options['warmup'], options['concurrency'], authorization
+                    ))
+            else:
+                results, elapsed = asyncio.run(self.arun(
+                    lambda: ASGIClient(application), calls, options['warmup'], options['concurrency'], authorization
+                ))
+        finally:
+            User.objects.filter(username__startswith=f'{USERNAME_PREFIX}new-').delete()
+            admin.delete()
+
+        report = json.dumps(self.make_report(results, elapsed, options), indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def parse_mix(self, value: str) -> dict[str, float]:
+        mix = {}
+        for item in value.split(','):
+            operation, _, weight = item.partition('=')
+            if operation.strip() not in self.OPERATIONS:
+                raise CommandError(f'Unknown operation {operation!r}, use {", ".join(self.OPERATIONS)}')
+            try:
+                mix[operation.strip()] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight of {operation}: {weight!r}')
+        return mix
+
+    @staticmethod
+    def seed_users(count: int, rng: random.Random, password: str) -> list[tuple[int, str, str]]:
+        """
+            Creates missing `bench-` users and sets `password` of existing ones (hashing it once),
+            returns (pk, username, first name) of all
+        """
+        seeded = User.objects.filter(username__startswith=USERNAME_PREFIX).exclude(
+            username__startswith=f'{USERNAME_PREFIX}new-')
+        password_hash = make_password(password)
+        existing = seeded.update(password=password_hash)
+        if existing < count:
+            faker = Faker()
+            faker.seed_instance(rng.random())
+            User.objects.bulk_create([
+                User(username=f'{USERNAME_PREFIX}{index}', password=password_hash, first_name=faker.first_name(),
+                     last_name=faker.last_name(), email=f'{USERNAME_PREFIX}{index}@example.com',
+                     is_staff=rng.random() < 0.1, is_active=rng.random() > 0.05)
+                for index in range(existing, count)
+            ], batch_size=1000, ignore_conflicts=True)
+
+        users = seeded.order_by('pk').values_list('pk', 'username', 'first_name')
+        return list(users[:count])
+
+    @staticmethod
+    def create_admin() -> User:
+        """ A superuser which can't log in (tokens are issued directly), deleted after the run """
+        return User.objects.create_superuser(username=f'{USERNAME_PREFIX}admin-{secrets.token_hex(8)}', password=None)
+
+    @staticmethod
+    def make_call(operation: str, index: int, rng: random.Random, users: list, password: str) -> tuple:
+        """ Returns (operation, method, path, query string, data, authenticated) of a call """
+        pk, username, first_name = rng.choice(users)
+        match operation:
+            case 'list':
+                ordering = rng.choice(('-id', 'username', '-date_joined'))
+                return operation, 'GET', '/api/users/', f'page_size=20&ordering={ordering}', None, True
+            case 'filter':
+                query_string = rng.choice(('is_staff=true', 'is_active=false', 'date_joined_after=2020-01-01'))
+                return operation, 'GET', '/api/users/', f'page_size=20&{query_string}', None, True
+            case 'search':
+                return operation, 'GET', '/api/users/', f'search={first_name[:3]}', None, True
+            case 'retrieve':
+                return operation, 'GET', f'/api/users/{pk}/', '', None, True
+            case 'create':
+                data = {'username': f'{USERNAME_PREFIX}new-{index}-{rng.getrandbits(32)}', 'password': password,
+                        'first_name': first_name}
+                return operation, 'POST', '/api/users/', '', data, True
+            case 'update':
+                return operation, 'PATCH', f'/api/users/{pk}/', '', {'last_name': f'Bench{index}'}, True
+            case 'token':
+                return operation, 'POST', '/api/token/', '', {'username': username, 'password': password}, False
+
+    @staticmethod
+    async def arun(make_client, calls: list, warmup: int, concurrency: int, authorization: str):
+        """ Makes the calls with `concurrency` clients, returns latencies and statuses of every operation """
+        results = defaultdict(lambda: ([], Counter()))
+
+        async def worker(calls_iterator, measure: bool):
+            client = make_client()
+            try:
+                for operation, method, path, query_string, data, authenticated in calls_iterator:
+                    headers = {'Authorization': authorization} if authenticated else None
+                    start = time.perf_counter()
+                    status, _body = await client.request(method, path, query_string, data, headers)
+                    if measure:
+                        latencies, statuses = results[operation]
+                        latencies.append(time.perf_counter() - start)
+                        statuses[status] += 1
+            finally:
+                await client.aclose()
+
+        # Workers share an iterator, so each call is made once
+        warmup_calls = iter(calls[:warmup])
+        await asyncio.gather(*(worker(warmup_calls, measure=False) for _ in range(concurrency)))
+        measured_calls = iter(calls[warmup:])
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(measured_calls, measure=True) for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+    def make_report(self, results: dict, elapsed: float, options: dict) -> dict:
+        all_latencies = [latency for latencies, _statuses in results.values() for latency in latencies]
+        all_statuses = sum((statuses for _latencies, statuses in results.values()), Counter())
+        return {
+            'meta': {
+                'commit': get_commit(),
+                'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'server': options['server'],
+                'users': options['users'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'mix': options['mix'],
+                'seed': options['seed'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'db_pool': settings.DATABASES['default']['ENGINE'] == 'utils.django.db.backends.postgresql',
+            },
+            'total': {**summarize(all_latencies, elapsed), 'statuses': get_statuses(all_statuses)},
+            'operations': {
+                operation: {**summarize(latencies, elapsed), 'statuses': get_statuses(statuses)}
+                for operation, (latencies, statuses) in sorted(results.items())
+            },
+        }
+
+
+def get_statuses(statuses: Counter) -> dict[str, int]:
+    return {str(status): count for status, count in sorted(statuses.items())}
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=settings.BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,78 @@
+import asyncio
+import statistics
+import time
+
+from django.core.asgi import get_asgi_application
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from utils.django.db.pool import close_idle_connections
+from utils.django.loadtest import ASGIClient
+
+
+class Command(BaseCommand):
+    """
+        Compares throughput of the ASGI application (with all middleware) when every request opens a new DB
+        connection, with persistent connections (CONN_MAX_AGE) and with the connection pool. Requests list users
+        with a unique query string, so that they miss the response cache and query DB.
+        Run `populate_db` first.
+    """
+    help = 'Benchmark requests/sec with and without DB connection pooling'
+
+    VARIANTS = (
+        ('no reuse', {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 0}),
+        ('persistent', {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 60}),
+        ('pool', {'ENGINE': 'utils.django.db.backends.postgresql', 'CONN_MAX_AGE': 0}),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Number of measured requests per variant')
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent requests')
+        parser.add_argument('--warmup', type=int, default=50, help='Number of requests made before measuring')
+
+    def handle(self, *args, **options):
+        databases = connections.settings.values()  # Replicas as well
+        originals = [{key: database[key] for key in ('ENGINE', 'CONN_MAX_AGE')} for database in databases]
+        application = get_asgi_application()
+
+        self.stdout.write(f'{"variant":<12} {"mean, ms":>10} {"p50, ms":>10} {"p95, ms":>10} {"req/s":>10}')
+        try:
+            for variant, overrides in self.VARIANTS:
+                # Connections are made by request threads, which read the settings when they make them
+                connections.close_all()
+                close_idle_connections()
+                for database in databases:
+                    database.update(overrides)
+                latencies, elapsed = asyncio.run(self.abenchmark(
+                    application, variant, options['requests'], options['concurrency'], options['warmup']
+                ))
+                self.stdout.write(
+                    f'{variant:<12} {statistics.mean(latencies) * 1e3:>10.2f} '
+                    f'{statistics.median(latencies) * 1e3:>10.2f} '
+                    f'{statistics.quantiles(latencies, n=20)[-1] * 1e3:>10.2f} {len(latencies) / elapsed:>10.0f}'
+                )
+        finally:
+            connections.close_all()
+            for database, original in zip(databases, originals):
+                database.update(original)
+
+    @staticmethod
+    async def abenchmark(application, variant, requests, concurrency, warmup):
+        client = ASGIClient(application)
+        latencies = []
+        counter = iter(range(requests + warmup))
+
+        async def worker(count, measure=True):
+            for _ in range(count):
+                start = time.perf_counter()
+                status, _body = await client.request('GET', '/api/users/',
+                                                     f'page_size=10&nocache={variant}-{next(counter)}')
+                if measure:
+                    latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    raise CommandError(f'Unexpected response status {status}')
+
+        await worker(warmup, measure=False)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        return latencies, time.perf_counter() - start
@@ -0,0 +1,55 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from users.serializers import CreateUserSerializer, UpdateUserSerializer, UserSerializer
+
+
+class Command(BaseCommand):
+    """
+        Measures construction of serializers the way views do it on every request: instantiating a serializer
+        with a request in the context and building its fields, with and without CachedFieldsMixin's cache.
+        `represent` scenarios also serialize an unsaved user with the default (synchronous) path. No DB access.
+    """
+    help = 'Benchmark per-request construction of user serializers'
+
+    SERIALIZERS = (UserSerializer, CreateUserSerializer, UpdateUserSerializer)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help='Number of measured constructions')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of measurements, the median is reported')
+
+    def handle(self, *args, **options):
+        context = {'request': APIRequestFactory().get('/api/users/', HTTP_HOST='localhost')}
+        user = User(pk=1, username='john', first_name='John', last_name='Smith', email='john@example.com',
+                    date_joined=timezone.now())
+
+        scenarios = {
+            'construct': lambda serializer_class: serializer_class(user, context=context).fields,
+            'represent': lambda serializer_class: serializer_class(user, context=context).data,
+        }
+        self.stdout.write(f'{"serializer":<22} {"scenario":<10} {"uncached, us":>13} {"cached, us":>11} '
+                          f'{"saved":>7}')
+        for serializer_class in self.SERIALIZERS:
+            uncached_class = type(serializer_class.__name__, (serializer_class,), {'cache_fields': False})
+            for scenario, run in scenarios.items():
+                uncached = self.measure(run, uncached_class, options['iterations'], options['repeat'])
+                cached = self.measure(run, serializer_class, options['iterations'], options['repeat'])
+                self.stdout.write(f'{serializer_class.__name__:<22} {scenario:<10} {uncached * 1e6:>13.1f} '
+                                  f'{cached * 1e6:>11.1f} {1 - cached / uncached:>7.0%}')
+
+    @staticmethod
+    def measure(run, serializer_class, iterations: int, repeat: int) -> float:
+        """ Returns the median (of `repeat` measurements) time of a single run in seconds """
+        run(serializer_class)  # Warm-up, builds cached fields
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                run(serializer_class)
+            durations.append((time.perf_counter() - start) / iterations)
+        return statistics.median(durations)
@@ -0,0 +1,173 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import django
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from users.management.commands.benchmark_api import get_commit
+
+# Executed by a new interpreter: imports the ASGI application, runs its lifespan startup (warm-up) like a server does,
+# unless the 4th argument is empty, and makes the first request. Markers separate imports of the startup and of
+# the first request in `-X importtime` output. `modules` are imported by the application
+STARTUP_SCRIPT = '''
+import asyncio, json, sys, time
+from utils.django.loadtest import ASGIClient  # Not a part of the application, so it's imported before measuring
+
+async def main(path, warm_up):
+    client = ASGIClient(application)
+    start = time.perf_counter()
+    if warm_up:
+        await client.astartup()
+    warmed_up = time.perf_counter()
+    print(sys.argv[3], file=sys.stderr, flush=True)
+    status, _body = await client.request('GET', path)
+    result = {'status': status, 'responded_at': time.time(), 'warm_up': warmed_up - start,
+              'first_request': time.perf_counter() - warmed_up}
+    await client.aclose()
+    return result
+
+preloaded = set(sys.modules)
+print(sys.argv[2], file=sys.stderr, flush=True)
+start = time.perf_counter()
+from drf_user_demo.asgi import application
+imported = time.perf_counter()
+result = asyncio.run(main(sys.argv[1], bool(sys.argv[4])))
+print(json.dumps({**result, 'import': imported - start, 'modules': sorted(set(sys.modules) - preloaded)}))
+'''
+STARTUP_MARKER = '-- startup --'
+FIRST_REQUEST_MARKER = '-- first request --'
+
+# Modules which the application must not import until they are needed: documentation views are imported on their
+# first request (see lazy_api_view), pkg_resources is slow to import (~70 ms, djangorestframework-simplejwt < 5.3.1
+# imports it). yaml and pygments aren't here, since rest_framework.compat imports them
+DEFERRED_MODULES = ('drf_spectacular.views', 'drf_spectacular.generators', 'drf_spectacular.openapi',
+                    'utils.rest_framework.schema', 'pkg_resources')
+
+
+class Command(BaseCommand):
+    """
+        Measures cold start of a worker: every run is a new interpreter (`python -X importtime`), which imports
+        drf_user_demo.asgi, warms it up (see WARM_UP setting, unless --no-warm-up) and makes the first request
+        (GET --path) to the application, the way a new gunicorn worker does. Reports time to the first response
+        (from the process start, so it includes the interpreter startup), time of imports, of the warm-up and
+        of the first request, and import time of the slowest packages as JSON.
+
+        Fails if the median time to the first response exceeds --max-ms, or if any of DEFERRED_MODULES is imported
+        before the first response, so that it can be run in CI to catch startup regressions. The threshold depends
+        on the machine, so set it from a baseline measured on the same one.
+    """
+    help = 'Measure worker startup (imports and time to the first response)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Number of started processes')
+        parser.add_argument('--path', default='/api/users/', help='Path of the first request')
+        parser.add_argument('--warm-up', action=argparse.BooleanOptionalAction, default=True,
+                            help='Run lifespan startup (the warm-up) before the first request')
+        parser.add_argument('--max-ms', type=float, default=2000,
+                            help='Maximum median time to the first response, in milliseconds')
+        parser.add_argument('--top', type=int, default=10, help='Number of reported packages with the slowest imports')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive')
+
+        runs = [self.run_process(options['path'], options['warm_up']) for _ in range(options['runs'])]
+        report = self.make_report(runs, options)
+        content = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(content + '\n')
+        else:
+            self.stdout.write(content)
+
+        if report['deferred_modules_imported']:
+            raise CommandError(f'Imported before the first response: {", ".join(report["deferred_modules_imported"])}')
+        median = report['time_to_first_response_ms']['median']
+        if median > options['max_ms']:
+            raise CommandError(f'Time to the first response {median:.0f} ms exceeds {options["max_ms"]:.0f} ms')
+
+    @staticmethod
+    def run_process(path: str, warm_up: bool) -> dict:
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        started_at = time.time()
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, path, STARTUP_MARKER, FIRST_REQUEST_MARKER,
+             'warm-up' if warm_up else ''],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=env,
+        )
+        if process.returncode:
+            raise CommandError(f'Application failed to start:\n{process.stderr[-2000:]}')
+
+        result = json.loads(process.stdout.splitlines()[-1])
+        imports = process.stderr.partition(STARTUP_MARKER)[2]
+        startup_imports, _marker, first_request_imports = imports.partition(FIRST_REQUEST_MARKER)
+        return {
+            **result,
+            'time_to_first_response': result['responded_at'] - started_at,
+            'imports': {'startup': parse_import_times(startup_imports),
+                        'first_request': parse_import_times(first_request_imports)},
+        }
+
+    @staticmethod
+    def make_report(runs: list[dict], options: dict) -> dict:
+        imports = {}
+        for phase in ('startup', 'first_request'):
+            packages = defaultdict(list)
+            for run in runs:
+                for package, seconds in run['imports'][phase].items():
+                    packages[package].append(seconds)
+            # Median over runs, a package missing from some runs counts as 0
+            medians = {package: statistics.median(times + [0] * (len(runs) - len(times)))
+                       for package, times in packages.items()}
+            imports[phase] = {
+                'total_ms': round(statistics.median(sum(run['imports'][phase].values()) for run in runs) * 1000, 1),
+                'packages_ms': {package: round(seconds * 1000, 1) for package, seconds in
+                                sorted(medians.items(), key=lambda item: item[1], reverse=True)[:options['top']]},
+            }
+
+        return {
+            'meta': {
+                'commit': get_commit(),
+                'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'runs': options['runs'],
+                'path': options['path'],
+                'warm_up': options['warm_up'],
+                'max_ms': options['max_ms'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'statuses': sorted({run['status'] for run in runs}),
+            'time_to_first_response_ms': summarize_ms([run['time_to_first_response'] for run in runs]),
+            'import_ms': summarize_ms([run['import'] for run in runs]),
+            'warm_up_ms': summarize_ms([run['warm_up'] for run in runs]),
+            'first_request_ms': summarize_ms([run['first_request'] for run in runs]),
+            'imports': imports,
+            'deferred_modules_imported': sorted({module for run in runs for module in run['modules']
+                                                 if module in DEFERRED_MODULES}),
+        }
+
+
+def parse_import_times(output: str) -> dict[str, float]:
+    """ Sums self import times (in seconds) of `-X importtime` output by top-level package """
+    packages = defaultdict(float)
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _cumulative, module = line.removeprefix('import time:').split('|')
+        packages[module.strip().split('.')[0]] += int(self_time) / 1e6
+    return dict(packages)
+
+
+def summarize_ms(values: list[float]) -> dict[str, float]:
+    return {'median': round(statistics.median(values) * 1000, 1), 'min': round(min(values) * 1000, 1),
+            'max': round(max(values) * 1000, 1)}
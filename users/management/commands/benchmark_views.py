@@ -0,0 +1,79 @@
+import asyncio
+import statistics
+import time
+
+from adrf.views import APIView as AdrfAPIView
+from django.core.management import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+from users.viewsets import UserViewSet
+
+
+class AdrfDispatchUserViewSet(UserViewSet):
+    """ UserViewSet dispatched the way adrf does it: authentication, permissions and throttling run in a thread """
+    async_dispatch = AdrfAPIView.async_dispatch
+
+
+class Command(BaseCommand):
+    """
+        Measures per-request overhead of UserViewSet (AsyncModelViewSet) compared with adrf's dispatch.
+        Views are called directly (no server, no middleware) with a JWT of a superuser. Responses come from
+        the response cache after the warm-up, so the numbers are mostly the overhead of the framework itself.
+        Run `populate_db` first.
+    """
+    help = 'Benchmark per-request overhead of asynchronous viewsets'
+
+    VARIANTS = (
+        ('AsyncModelViewSet', UserViewSet),
+        ('adrf dispatch', AdrfDispatchUserViewSet),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Number of measured requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1, help='Number of concurrent requests')
+        parser.add_argument('--warmup', type=int, default=100, help='Number of requests made before measuring')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('No superuser found, run `populate_db` first')
+        authorization = f'Bearer {RefreshToken.for_user(user).access_token}'
+
+        scenarios = [
+            ('list', {'get': 'list'}, False, '/api/users/', {}),
+            ('retrieve', {'get': 'retrieve'}, True, f'/api/users/{user.pk}/', {'pk': str(user.pk)}),
+        ]
+        self.stdout.write(f'{"scenario":<10} {"variant":<20} {"mean, us":>10} {"p50, us":>10} {"p95, us":>10} '
+                          f'{"req/s":>10}')
+        for name, actions, detail, path, kwargs in scenarios:
+            for variant, viewset_class in self.VARIANTS:
+                view = viewset_class.as_view(actions, basename='user', detail=detail)
+                latencies, elapsed = asyncio.run(self.abenchmark(
+                    view, path, kwargs, authorization, options['requests'], options['concurrency'], options['warmup']
+                ))
+                self.stdout.write(
+                    f'{name:<10} {variant:<20} {statistics.mean(latencies) * 1e6:>10.0f} '
+                    f'{statistics.median(latencies) * 1e6:>10.0f} '
+                    f'{statistics.quantiles(latencies, n=20)[-1] * 1e6:>10.0f} {len(latencies) / elapsed:>10.0f}'
+                )
+
+    @staticmethod
+    async def abenchmark(view, path, kwargs, authorization, requests, concurrency, warmup):
+        factory = APIRequestFactory()
+        latencies = []
+
+        async def worker(count, measure=True):
+            for _ in range(count):
+                request = factory.get(path, HTTP_HOST='localhost', HTTP_AUTHORIZATION=authorization)
+                start = time.perf_counter()
+                response = await view(request, **kwargs)
+                if measure:
+                    latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.data
+
+        await worker(warmup, measure=False)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        return latencies, time.perf_counter() - start
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from utils.rest_framework.schema import write_schemas
+
+
+class Command(BaseCommand):
+    """
+        Renders the OpenAPI schema into YAML and JSON files (and their gzipped versions), which are served by
+        PrebuiltSpectacularAPIView. Run it when building the application, after any change of the API.
+    """
+    help = 'Build OpenAPI schema files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', type=Path, default=settings.SPECTACULAR_SCHEMA_DIR,
+                            help='Directory to write the files into, SPECTACULAR_SCHEMA_DIR by default')
+
+    def handle(self, *args, **options):
+        for path in write_schemas(options['directory']):
+            self.stdout.write(f'Schema written to {path}')
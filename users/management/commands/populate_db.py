@@ -1,25 +1,93 @@
-from django.conf import settings
-from django.core.management import BaseCommand
+import collections
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
 
 from users.models import User
+from users.seeding import COLUMNS, generate_users
 from users.tests.factories import UserFactory
 
 
 class Command(BaseCommand):
-    """ Command for setting webhook for the bot instance """
-    INSTANCES_COUNT = 100
+    """
+        Creates `admin` superuser (if it doesn't exist) and random users, until there are --count users in DB.
+        Rows are generated by --workers processes and streamed into PostgreSQL with COPY in batches of --batch-size
+        rows, each batch is committed separately. All users have the same password (UserFactory.PASSWORD), which
+        is hashed once.
+    """
+    help = 'Populate DB with random users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100, help='Number of users to have in DB')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Number of users inserted with one COPY')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of processes generating users, 1 generates them in this process')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of random data')
 
     @staticmethod
     def _generate_superuser():
         User.objects.create_superuser(username='admin', email='admin@example.com', password='123')
 
-    @staticmethod
-    def _generate_data():
-        UserFactory.create_batch(Command.INSTANCES_COUNT)
-
     def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive')
+        self.verbosity = options['verbosity']
+
         if not User.objects.filter(username='admin').exists():
             self._generate_superuser()
 
-        if User.objects.count() < self.INSTANCES_COUNT:
-            self._generate_data()
+        missing = options['count'] - User.objects.count()
+        if missing <= 0:
+            return
+
+        start = time.perf_counter()
+        self._generate_data(missing, options['batch_size'], options['workers'], options['seed'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Created {missing} users in {elapsed:.1f} s ({missing / elapsed:.0f} rows/s)')
+
+    def _generate_data(self, count: int, batch_size: int, workers: int, seed: int):
+        # Usernames are numbered starting after the max id, so they don't collide with users of previous runs
+        first_number = (User.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        password = make_password(UserFactory.PASSWORD)
+        now = timezone.now()
+        batches = [
+            (first_number + offset, min(batch_size, count - offset), password, seed + first_number + offset, now)
+            for offset in range(0, count, batch_size)
+        ]
+
+        quote_name = connection.ops.quote_name
+        sql = f'COPY {quote_name(User._meta.db_table)} ({", ".join(map(quote_name, COLUMNS))}) FROM STDIN'
+        created = 0
+        with connection.cursor() as cursor:
+            batches_data = self._iter_batches(batches, min(workers, len(batches)))
+            for (_number, batch_count, *_args), data in zip(batches, batches_data):
+                cursor.copy_expert(sql, io.BytesIO(data))
+                created += batch_count
+                if self.verbosity > 1:
+                    self.stdout.write(f'{created}/{count} users created')
+            # Update planner statistics (and the row estimate used by pagination counts)
+            cursor.execute(f'ANALYZE {quote_name(User._meta.db_table)}')
+
+    @staticmethod
+    def _iter_batches(batches: list[tuple], workers: int):
+        """ Yields generated batches in order. Only a few batches per worker are generated ahead of inserts """
+        if workers == 1:
+            for batch in batches:
+                yield generate_users(*batch)
+            return
+
+        with ProcessPoolExecutor(workers) as executor:
+            pending = collections.deque()
+            for batch in batches:
+                pending.append(executor.submit(generate_users, *batch))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
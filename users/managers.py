@@ -1,7 +1,10 @@
+import asyncio
+
 from django.apps import apps
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager
 
+from utils.django.hashers import amake_password, get_hashing_executor
+
 
 class AsyncUserManager(UserManager):
     async def _acreate_user(self, username, email, password, **extra_fields):
@@ -19,10 +22,37 @@ class AsyncUserManager(UserManager):
         )
         username = GlobalUserModel.normalize_username(username)
         user = self.model(username=username, email=email, **extra_fields)
-        user.password = make_password(password)
+        # Hash in a separate thread pool, since hashing would block the event loop for tens of milliseconds
+        user.password = await amake_password(password)
         await user.asave(using=self._db)
         return user
 
+    async def abulk_create_users(self, users_data: list[dict]):
+        """
+        Create and save many users with a single query. Every item of `users_data` contains kwargs for .acreate_user()
+        """
+        GlobalUserModel = apps.get_model(
+            self.model._meta.app_label, self.model._meta.object_name
+        )
+        users = []
+        for data in users_data:
+            data = {'is_staff': False, 'is_superuser': False, **data}
+            username, email, password = data.pop('username'), data.pop('email', None), data.pop('password', None)
+            if not username:
+                raise ValueError("The given username must be set")
+            users.append(self.model(username=GlobalUserModel.normalize_username(username),
+                                    email=self.normalize_email(email), password=password, **data))
+
+        # Hash passwords concurrently, but not more than the hashing executor can run at once
+        chunk_size = get_hashing_executor().max_workers
+        for i in range(0, len(users), chunk_size):
+            chunk = users[i:i + chunk_size]
+            passwords = await asyncio.gather(*(amake_password(user.password) for user in chunk))
+            for user, password in zip(chunk, passwords):
+                user.password = password
+
+        return await self.abulk_create(users)
+
     async def acreate_user(self, username, email=None, password=None, **extra_fields):
         extra_fields.setdefault("is_staff", False)
         extra_fields.setdefault("is_superuser", False)
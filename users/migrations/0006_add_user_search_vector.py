@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Keep the document in sync with USER_SEARCH_FIELDS and FullTextSearchFilter.search_config
+SEARCH_VECTOR_SQL = "to_tsvector('simple', coalesce({0}first_name, '') || ' ' || coalesce({0}last_name, ''))"
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION users_user_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format('NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_user_search_vector_trigger BEFORE INSERT OR UPDATE ON users_user
+    FOR EACH ROW EXECUTE FUNCTION users_user_search_vector_update();
+
+UPDATE users_user SET search_vector = {SEARCH_VECTOR_SQL.format('')};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER users_user_search_vector_trigger ON users_user;
+DROP FUNCTION users_user_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_add_filter_and_search_indexes'),
+    ]
+
+    operations = [
+        # Trigram indexes of 0005 served `icontains` search, which is replaced by full-text search
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_user_first_name_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_user_last_name_trgm_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Fill the column before creating the index, so that the index is built once
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='users_user_search_vector_idx'),
+        ),
+    ]
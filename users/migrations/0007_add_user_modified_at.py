@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_add_user_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='modified at'),
+        ),
+    ]
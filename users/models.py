@@ -1,4 +1,8 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+from django.utils.translation import gettext_lazy as _
 
 from users.managers import AsyncUserManager
 
@@ -13,6 +17,12 @@ class User(AbstractUser):
     # performance), therefore we don't need it at all
     last_login = None
 
+    # Changes on every save, used as a version of the user for conditional requests
+    modified_at = models.DateTimeField(_('modified at'), auto_now=True)
+
+    # Full-text search document of first_name and last_name, maintained by a database trigger (see migrations)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     objects = AsyncUserManager()
 
     def __str__(self):
@@ -41,7 +51,17 @@ class User(AbstractUser):
         verbose_name = AbstractUser.Meta.verbose_name
         verbose_name_plural = AbstractUser.Meta.verbose_name_plural
 
-        # No indexes yet since no use case frequencies can be identified for now
-        indexes = []
+        indexes = [
+            # Filters of UserFilterSet. Staff, superusers and inactive users are a small share of all users,
+            # so partial indexes are much smaller than indexes on the flags and also serve the default ordering
+            models.Index(fields=['-id'], condition=models.Q(is_staff=True), name='users_user_staff_idx'),
+            models.Index(fields=['-id'], condition=models.Q(is_superuser=True), name='users_user_superuser_idx'),
+            models.Index(fields=['-id'], condition=models.Q(is_active=False), name='users_user_inactive_idx'),
+            # date_joined ranges and ordering (id is a tiebreaker of keyset pagination). Most users are active,
+            # so a composite index with is_active wouldn't be more selective than this one
+            models.Index(fields=['date_joined', 'id'], name='users_user_date_joined_idx'),
+            # Full-text search (see FullTextSearchFilter)
+            GinIndex(fields=['search_vector'], name='users_user_search_vector_idx'),
+        ]
 
         ordering = ['id']
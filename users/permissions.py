@@ -7,17 +7,18 @@ from rest_framework.request import Request
 class UserPermission(permissions.BasePermission):
     """
         User is unable to create accounts. User is able to change/delete his own account.
-        Superuser can do everything
+        Superuser can do everything, bulk actions are available only to superusers
     """
+    bulk_actions = ('bulk_create', 'bulk_update', 'bulk_destroy')
+    allows_safe_methods_on_objects = True  # Cached responses are served without fetching the object
+
     def has_permission(self, request, view):
-        if request.method == 'POST':
+        if request.method == 'POST' or getattr(view, 'action', None) in self.bulk_actions:
             return request.user.is_superuser
 
         return True
 
     def has_object_permission(self, request: HttpRequest | Request, view, obj):
-        print(request.user)
-
         if request.method in permissions.SAFE_METHODS:
             return True
 
@@ -26,4 +27,5 @@ class UserPermission(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
-        return request.user == obj
+        # Compare primary keys, since user may be a TokenUser built from token claims
+        return request.user.pk == obj.pk
@@ -0,0 +1,54 @@
+"""
+    Generation of random users for `populate_db` command. Rows are generated in worker processes, so this module
+    doesn't import Django and can be imported by a process which hasn't set it up.
+"""
+import datetime
+import random
+
+from faker.providers.person.en_US import Provider as PersonProvider
+
+# Columns of users_user table in the order of generated values. `id` comes from the sequence, `search_vector` is
+# set by a trigger
+COLUMNS = ('password', 'is_superuser', 'username', 'first_name', 'last_name', 'email', 'is_staff', 'is_active',
+           'date_joined', 'modified_at')
+
+# Staff, superusers and inactive users are a small share of all users, as in production (see User.Meta.indexes)
+STAFF_SHARE = 0.05
+SUPERUSER_SHARE = 0.01
+INACTIVE_SHARE = 0.02
+DATE_JOINED_MAX_AGE = datetime.timedelta(days=5 * 365)
+
+# Names are the same as Faker generates, but picking them from the lists is much faster than calling Faker.
+# Values are put into COPY text format and usernames as is, so names must consist of letters only
+FIRST_NAMES = tuple(PersonProvider.first_names)
+LAST_NAMES = tuple(PersonProvider.last_names)
+assert all(name.isascii() and name.isalpha() for name in FIRST_NAMES + LAST_NAMES)
+
+
+def generate_users(first_number: int, count: int, password: str, seed: int, now: datetime.datetime) -> bytes:
+    """
+        Returns `count` rows of users (COLUMNS) in COPY text format. Usernames end with numbers starting from
+        `first_number`, so they are unique as long as the numbers are. All users have the same `password` hash.
+    """
+    rng = random.Random(seed)
+    max_age = DATE_JOINED_MAX_AGE.total_seconds()
+    modified_at = now.isoformat()
+    lines = []
+    for number in range(first_number, first_number + count):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{first_name}.{last_name}.{number}'.lower()
+        date_joined = now - datetime.timedelta(seconds=rng.random() * max_age)
+        lines.append('\t'.join((
+            password,
+            't' if rng.random() < SUPERUSER_SHARE else 'f',
+            username,
+            first_name,
+            last_name,
+            f'{username}@example.com',
+            't' if rng.random() < STAFF_SHARE else 'f',
+            'f' if rng.random() < INACTIVE_SHARE else 't',
+            date_joined.isoformat(),
+            modified_at,
+        )))
+    lines.append('')
+    return '\n'.join(lines).encode()
@@ -1,33 +1,48 @@
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 from adrf.serializers import Serializer as AsyncSerializer
-from rest_framework.exceptions import ValidationError
-from django.utils.translation import gettext as _
 
 from users.models import User
+from utils.rest_framework.authentication import ainvalidate_cached_users
 from utils.rest_framework.serializers.async_validation import AsyncValidationMixin
+from utils.rest_framework.serializers.bulk import BulkCreateListSerializer, BulkUpdateListSerializer
+from utils.rest_framework.serializers.cached_fields import CachedFieldsMixin
+from utils.rest_framework.serializers.fast_representation import FastRepresentationMixin
 from utils.rest_framework.serializers.fields import HyperlinkedIdentityField
+from utils.rest_framework.serializers.list_serializer import ListSerializer
+from utils.rest_framework.viewsets.cache import ainvalidate_cached_responses
 
 
-class UserSerializer(AsyncSerializer, AsyncValidationMixin, serializers.HyperlinkedModelSerializer):
+class BulkCreateUserListSerializer(BulkCreateListSerializer):
+    async def acreate(self, validated_data):
+        users = await User.objects.abulk_create_users(validated_data)
+        # post_save signals are not sent by bulk create, so invalidate cached lists explicitly
+        await ainvalidate_cached_responses(User)
+        return users
+
+
+class BulkUpdateUserListSerializer(BulkUpdateListSerializer):
+    async def aupdate(self, instance, validated_data):
+        users = await super().aupdate(instance, validated_data)
+        # post_save signals are not sent by bulk update, so invalidate cached users and responses explicitly
+        await ainvalidate_cached_users([user.pk for user in users])
+        await ainvalidate_cached_responses(User, [user.pk for user in users])
+        return users
+
+
+class UserSerializer(CachedFieldsMixin, FastRepresentationMixin, AsyncSerializer, AsyncValidationMixin,
+                     serializers.HyperlinkedModelSerializer):
     url = HyperlinkedIdentityField(view_name='user-detail')
     username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator])
     date_joined = serializers.DateTimeField(read_only=True)
 
-    async def avalidate(self, attrs):
-        if 'username' not in attrs:
-            return attrs
-
-        username = attrs['username']
-        if await User.objects.filter(username=username).aexists():
-            raise ValidationError({'username': _('A user with that username already exists.')})
-
-        return attrs
+    unique_fields = ('username',)
 
     class Meta:
         model = User
         fields = ['url', 'username', 'first_name', 'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
                   'is_superuser']
+        list_serializer_class = ListSerializer
 
 
 class CreateUserSerializer(UserSerializer):
@@ -56,6 +71,8 @@ class CreateUserSerializer(UserSerializer):
         model = User
         fields = ['url', 'username', 'first_name', 'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
                   'is_superuser', 'password']
+        extra_kwargs = {'password': {'write_only': True}}
+        list_serializer_class = BulkCreateUserListSerializer
 
 
 class UpdateUserSerializer(UserSerializer):
@@ -72,4 +89,4 @@ class UpdateUserSerializer(UserSerializer):
         return instance
 
     class Meta(UserSerializer.Meta):
-        pass
+        list_serializer_class = BulkUpdateUserListSerializer
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User
+from utils.rest_framework.viewsets.cache import invalidate_cached_responses
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user_responses(sender, instance, **kwargs):
+    invalidate_cached_responses(User, [instance.pk])
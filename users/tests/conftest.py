@@ -1,4 +1,7 @@
+import contextlib
+
 import pytest
+from django.core.cache import cache
 from django.http import HttpRequest
 from rest_framework.request import Request
 from rest_framework.test import APIClient, APIRequestFactory
@@ -6,6 +9,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from users.models import User
 from users.tests.factories import UserFactory
+from utils.django.queries import track_queries
 
 test_user_credentials = {
     'username': 'admin',
@@ -13,6 +17,12 @@ test_user_credentials = {
 }
 
 
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """ Cache is not rolled back along with DB, so clear it between tests """
+    cache.clear()
+
+
 @pytest.fixture
 def client() -> APIClient:
     return APIClient()
@@ -44,3 +54,24 @@ def dummy_request() -> Request | HttpRequest:
 @pytest.fixture
 def serializer_context(dummy_request):
     return {'request': dummy_request}
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+        Fails the test if the block makes more than `max_count` queries, e.g.:
+            with assert_max_queries(3):
+                client.get(url)
+        Unlike django_assert_max_num_queries, it counts queries made in any thread (e.g. by sync_to_async) and
+        lists duplicated queries in the failure message.
+    """
+    @contextlib.contextmanager
+    def assert_max_queries(max_count: int):
+        with track_queries() as stats:
+            yield stats
+
+        duplicates = ''.join(f'\n    {count} x {sql}' for sql, count in stats.duplicates.items())
+        assert stats.count <= max_count, \
+            f'{stats.count} queries executed, {max_count} expected at most. Duplicated queries:{duplicates or " none"}'
+
+    return assert_max_queries
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from django.forms import model_to_dict
 from rest_framework import status
@@ -8,7 +10,7 @@ from rest_framework.reverse import reverse
 from users.models import User
 from users.serializers import UserSerializer, UpdateUserSerializer
 from users.tests.factories import UserFactory
-from users.tests.utils import sort_recursively, pick_random_obj, get_payload
+from users.tests.utils import sort_recursively, pick_random_obj, get_payload, get_streaming_content
 
 
 @pytest.mark.django_db
@@ -39,6 +41,98 @@ def test_list(client, test_data):
     assert sorted_response_objs == sorted_serializer_data  # Objects may differ in order, sort them before comparing
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize('ordering', ['-id', 'first_name', '-last_name', 'date_joined'])
+def test_list_pagination(client, test_data, ordering):
+    """ Test that traversing pages forwards and backwards returns every object exactly once and in order """
+    tiebreaker = '-id' if ordering.startswith('-') else 'id'
+    expected_urls = [
+        reverse('user-detail', [pk], request=APIRequestFactory().request())
+        for pk in User.objects.order_by(ordering, tiebreaker).values_list('id', flat=True)
+    ]
+
+    # Traverse forwards
+    url = f'{reverse("user-list")}?ordering={ordering}&page_size=3'
+    response_urls = []
+    while url is not None:
+        response: Response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK, response.data
+        assert len(response.data['results']) <= 3
+        response_urls.extend(obj['url'] for obj in response.data['results'])
+        last_page_url, url = url, response.data['next']
+    assert response_urls == expected_urls
+
+    # Traverse backwards starting from the last page
+    url = client.get(last_page_url).data['previous']
+    backward_urls = []
+    while url is not None:
+        response: Response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK, response.data
+        backward_urls[:0] = [obj['url'] for obj in response.data['results']]
+        url = response.data['previous']
+    assert backward_urls == response_urls[:len(backward_urls)]
+    assert len(response_urls) - len(backward_urls) <= 3
+
+
+@pytest.mark.django_db
+def test_list_invalid_cursor(client, test_data):
+    response: Response = client.get(f'{reverse("user-list")}?cursor=invalid')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_search(client):
+    """ Test prefix matching of all terms, rank ordering and pagination of search results """
+    names = [('John', 'Smith'), ('Johnny', 'Walker'), ('Anna', 'Johnson'), ('John', 'Johnson'), ('Bob', "O'Neil")]
+    users = [UserFactory(first_name=first_name, last_name=last_name) for first_name, last_name in names]
+    url = reverse('user-list')
+
+    def search(query_params):
+        response: Response = client.get(url, {'page_size': 1, **query_params})
+        assert response.status_code == status.HTTP_200_OK, response.data
+        results = response.data['results']
+        while response.data['next'] is not None:
+            response = client.get(response.data['next'])
+            results.extend(response.data['results'])
+        return [(obj['first_name'], obj['last_name']) for obj in results]
+
+    results = search({'search': 'john'})
+    assert sorted(results) == sorted(names[:4])
+    assert results[0] == ('John', 'Johnson')  # Both words match, so it has the highest rank
+
+    assert search({'search': 'jo SM'}) == [('John', 'Smith')]
+    assert search({'search': "o'neil"}) == [('Bob', "O'Neil")]
+    assert search({'search': 'jo:* | bob'}) == []
+    assert search({'search': 'john', 'ordering': 'id'}) == names[:4]
+
+    # Search vector is maintained on update
+    users[0].last_name = 'Doe'
+    users[0].save()
+    assert search({'search': 'john smith'}) == []
+    assert search({'search': 'john doe'}) == [('John', 'Doe')]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('export_format', ['ndjson', 'json'])
+def test_export(client, test_data, export_format):
+    """ Test that export streams every filtered object """
+    media_type = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}[export_format]
+    response = client.get(f'{reverse("user-export")}?is_active=true', HTTP_ACCEPT=media_type)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+
+    content = get_streaming_content(response).decode()
+    assert response['Content-Type'] == media_type
+    if export_format == 'ndjson':
+        response_objs = [json.loads(line) for line in content.splitlines()]
+    else:
+        response_objs = json.loads(content)
+
+    queryset = User.objects.filter(is_active=True)
+    serializer = UserSerializer(queryset, many=True, context={'request': APIRequestFactory().request()})
+    assert sort_recursively(response_objs) == sort_recursively(json.loads(json.dumps(serializer.data)))
+
+
 @pytest.mark.django_db
 def test_create(admin_client, serializer_context):
     """ Test ordinary creation and creation of existing object """
@@ -0,0 +1,129 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from users.models import User
+from users.tests.conftest import test_user_credentials
+from users.tests.factories import UserFactory
+from users.viewsets import UserViewSet
+from utils.rest_framework.authentication import (
+    AsyncJWTAuthentication, CachedJWTAuthentication, ClaimsRefreshToken, StatelessJWTAuthentication, get_user_cache_key,
+)
+
+
+def get_client(token: RefreshToken) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+    return client
+
+
+@pytest.mark.django_db
+def test_cached_authentication(django_assert_num_queries):
+    """ Test that user is fetched only once and that the cache is invalidated when user changes """
+    user = UserFactory.create(is_superuser=False)
+    client = get_client(RefreshToken.for_user(user))
+    url = reverse('user-detail', [user.id])
+
+    with django_assert_num_queries(3):  # User lookup, version lookup and retrieve
+        response: Response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+    with django_assert_num_queries(0):  # Both the user and the response are cached
+        client.get(url)
+
+    # All fields are cached, except the password hash
+    cached = cache.get(get_user_cache_key(user.id))
+    assert set(cached['fields']) == {field.attname for field in User._meta.concrete_fields} - {'password'}
+    assert user.password not in str(cached)
+
+    # Deactivated user must not be authenticated anymore
+    user.is_active = False
+    user.save()
+    response: Response = client.get(url)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_cached_user_attributes():
+    """ Test that every attribute of a cached user but the password can be read in async code without queries """
+    user = UserFactory.create()
+    user.refresh_from_db()  # Loads fields set by DB triggers
+    token = RefreshToken.for_user(user).access_token
+    cached_user = async_to_sync(CachedJWTAuthentication().aget_user)(token)
+    for field in User._meta.concrete_fields:
+        if field.name != 'password':
+            assert getattr(cached_user, field.attname) == getattr(user, field.attname)
+    assert cached_user.get_full_name() == user.get_full_name()
+    with pytest.raises(AttributeError):
+        cached_user.password
+
+    # The deferred password isn't overwritten on save
+    cached_user.first_name = 'Changed'
+    cached_user.save()
+    assert User.objects.values_list('first_name', 'password').get(pk=user.pk) == ('Changed', user.password)
+
+
+@pytest.mark.django_db
+def test_stateless_authentication(django_assert_num_queries, monkeypatch):
+    """ Test that user is built from token claims without DB lookup """
+    monkeypatch.setattr(UserViewSet, 'authentication_classes', [StatelessJWTAuthentication])
+    user = UserFactory.create(is_superuser=False)
+    another_user = UserFactory.create(username=f'{user.username}_another')
+
+    client = get_client(ClaimsRefreshToken.for_user(user))
+    with django_assert_num_queries(2):  # Version lookup and retrieve only
+        response: Response = client.get(reverse('user-detail', [user.id]))
+    assert response.status_code == status.HTTP_200_OK
+
+    # Permission checks work with users built from claims
+    response = client.patch(reverse('user-detail', [user.id]), data={'first_name': 'John'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    response = client.patch(reverse('user-detail', [another_user.id]), data={'first_name': 'John'}, format='json')
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    user.is_active = False
+    response: Response = get_client(ClaimsRefreshToken.for_user(user)).get(reverse('user-detail', [user.id]))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_obtained_token_contains_claims(client):
+    User.objects.create_user(**test_user_credentials, is_staff=True)
+
+    response: Response = client.post(reverse('token_obtain_pair'), data=test_user_credentials)
+    assert response.status_code == status.HTTP_200_OK
+
+    token = RefreshToken(response.data['refresh'])
+    assert (token['is_superuser'], token['is_staff'], token['is_active']) == (False, True, True)
+
+
+@pytest.mark.django_db
+def test_refreshed_token_claims(client):
+    """ Test that refreshed access tokens carry current flags of the user """
+    user = UserFactory.create(is_staff=False)
+    refresh = ClaimsRefreshToken.for_user(user)
+    user.is_staff = True
+    user.save()
+
+    response: Response = client.post(reverse('token_refresh'), data={'refresh': str(refresh)})
+    assert response.status_code == status.HTTP_200_OK
+    assert AccessToken(response.data['access'])['is_staff'] is True
+
+    user.is_active = False
+    user.save()
+    response = client.post(reverse('token_refresh'), data={'refresh': str(refresh)})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_default_async_authentication(monkeypatch):
+    """ Test that JWTAuthentication's lookup of the user is used, if .aget_user() is not overridden """
+    monkeypatch.setattr(UserViewSet, 'authentication_classes', [AsyncJWTAuthentication])
+    user = UserFactory.create(is_superuser=False)
+    response: Response = get_client(RefreshToken.for_user(user)).get(reverse('user-detail', [user.id]))
+    assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,93 @@
+import pytest
+from django.contrib.auth.hashers import check_password
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from users.models import User
+from users.tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+def test_bulk_create(admin_client):
+    data = [{'username': f'user{i}', 'password': f'pass{i}', 'email': f'user{i}@EXAMPLE.com'} for i in range(5)]
+    response: Response = admin_client.post(reverse('user-bulk-create'), data=data, format='json')
+    assert response.status_code == status.HTTP_201_CREATED, response.data
+    assert [obj['username'] for obj in response.data] == [item['username'] for item in data]
+    assert all('password' not in obj for obj in response.data)
+
+    for i in range(5):
+        user = User.objects.get(username=f'user{i}')
+        assert check_password(f'pass{i}', user.password)
+        assert user.email == f'user{i}@example.com'
+
+
+@pytest.mark.django_db
+def test_bulk_create_errors(admin_client):
+    """ Test that errors are reported per item and nothing is created if any item is invalid """
+    existing_user = UserFactory()
+    data = [
+        {'username': 'new', 'password': '123'},
+        {'username': existing_user.username, 'password': '123'},
+        {'username': 'new', 'password': '123'},
+        {'password': '123'},
+    ]
+    response: Response = admin_client.post(reverse('user-bulk-create'), data=data, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.data
+    # Field errors are checked before uniqueness
+    assert [set(errors) for errors in response.data] == [set(), set(), set(), {'username'}]
+
+    response: Response = admin_client.post(reverse('user-bulk-create'), data=data[:3], format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.data
+    assert [set(errors) for errors in response.data] == [set(), {'username'}, {'username'}]
+    assert not User.objects.filter(username='new').exists()
+
+
+@pytest.mark.django_db
+def test_bulk_update(admin_client, test_data):
+    users = list(User.objects.exclude(pk=0)[:3])
+    data = [{'id': user.pk, 'first_name': f'name{i}'} for i, user in enumerate(users)]
+    response: Response = admin_client.patch(reverse('user-bulk-create'), data=data, format='json')
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert [obj['first_name'] for obj in response.data] == ['name0', 'name1', 'name2']
+
+    for i, user in enumerate(users):
+        modified_at = user.modified_at
+        user.refresh_from_db()
+        assert user.first_name == f'name{i}'
+        assert user.modified_at > modified_at
+
+
+@pytest.mark.django_db
+def test_bulk_update_errors(admin_client, test_data):
+    user = User.objects.exclude(pk=0).first()
+    data = [{'id': user.pk, 'first_name': 'new'}, {'id': user.pk, 'first_name': 'new'}, {'id': -1}, {}]
+    response: Response = admin_client.patch(reverse('user-bulk-create'), data=data, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.data
+    assert [set(errors) for errors in response.data] == [set(), {'id'}, {'id'}, {'id'}]
+
+    user.refresh_from_db()
+    assert user.first_name != 'new'
+
+
+@pytest.mark.django_db
+def test_bulk_destroy(admin_client, test_data):
+    ids = list(User.objects.exclude(pk=0).values_list('pk', flat=True)[:3])
+
+    response: Response = admin_client.delete(reverse('user-bulk-create'), data=[*ids, -1], format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.data
+    assert response.data == {'not_found': ['-1']}
+    assert User.objects.filter(pk__in=ids).count() == 3
+
+    response: Response = admin_client.delete(reverse('user-bulk-create'), data=ids, format='json')
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not User.objects.filter(pk__in=ids).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method', ['post', 'patch', 'delete'])
+def test_bulk_access_restriction(client, test_data, method):
+    user = User.objects.filter(is_superuser=False).first()
+    client.force_authenticate(user)
+    response: Response = getattr(client, method)(reverse('user-bulk-create'), data=[{'id': user.pk}], format='json')
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,88 @@
+import functools
+import gc
+import threading
+
+import psycopg2
+import pytest
+from django.db import connection, connections
+from psycopg2 import extensions
+
+from users.models import User
+from utils.django.db.backends.postgresql.base import get_pool_name
+from utils.django.db.pool import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def connect():
+    return functools.partial(psycopg2.connect, **connection.get_connection_params())
+
+
+@pytest.mark.django_db
+def test_pool_reuses_connections(connect):
+    pool = ConnectionPool('test', max_size=2, timeout=0.05)
+    first = pool.acquire(connect)
+    first.cursor().execute('SELECT 1')  # Opens a transaction
+    pool.release(first)
+
+    assert first.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+    assert pool.acquire(connect) is first
+    second = pool.acquire(connect)
+    assert second is not first
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire(connect)
+    assert pool.get_stats() == {'max_size': 2, 'idle': 0, 'in_use': 2, 'timeouts': 1}
+
+    second.close()
+    pool.release(second)  # Closed connections are discarded
+    third = pool.acquire(connect)
+    assert third is not second
+    pool.release(third)
+    pool.release(first)
+    pool.close_idle()
+    assert first.closed and third.closed
+
+
+@pytest.mark.django_db
+def test_pool_health_checks(connect, monkeypatch):
+    monkeypatch.setattr(ConnectionPool, 'health_check_after', 0)
+    pool = ConnectionPool('test', max_size=1)
+    broken = pool.acquire(connect)
+    pool.release(broken)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_terminate_backend(%s)', [broken.info.backend_pid])
+
+    healthy = pool.acquire(connect)
+    assert healthy is not broken
+    with healthy.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    pool.discard(healthy)
+    assert pool.get_stats()['in_use'] == 0
+
+
+@pytest.mark.django_db
+def test_backend_shares_connections_between_threads():
+    backend_pids = []
+
+    def query(close: bool):
+        User.objects.exists()
+        backend_pids.append(connections['default'].connection.info.backend_pid)
+        if close:
+            connections['default'].close()
+
+    # Connections are returned on close, as well as when the thread (which keeps its wrapper) is garbage collected
+    for close in (True, False, True):
+        thread = threading.Thread(target=query, args=[close])
+        thread.start()
+        thread.join()
+        del thread
+        gc.collect()
+
+    assert len(set(backend_pids)) == 1
+
+
+def test_pool_names():
+    # Replicas have the same database name as the primary, so pools are named by the address as well
+    assert get_pool_name({'dbname': 'users', 'host': 'db', 'port': '5432'}) == 'db:5432/users'
+    assert get_pool_name({'dbname': 'users', 'host': 'replica'}) == 'replica/users'
+    assert get_pool_name({'service': 'users'}) == '/users'
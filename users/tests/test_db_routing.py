@@ -0,0 +1,103 @@
+import pytest
+from django.db import OperationalError, router
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from utils.django.db.routers import ReplicaRouter, route_reads
+from utils.django.middleware import ReplicaRoutingMiddleware
+
+
+@pytest.fixture
+def replicas(settings, monkeypatch) -> set:
+    """ Configures two replicas, aliases in the yielded set are unavailable """
+    settings.DATABASE_REPLICAS = ['replica', 'replica_2']
+    unavailable = set()
+    monkeypatch.setattr(ReplicaRouter, 'is_available', lambda self, alias: alias not in unavailable)
+    return unavailable
+
+
+def route_request(method: str, write: bool = False, user: User | None = None, **headers) -> tuple[HttpResponse, list]:
+    """ Makes a request through ReplicaRoutingMiddleware, returns the response and databases of reads """
+    databases = []
+
+    def get_response(request):
+        databases.append(router.db_for_read(User))
+        if write:
+            router.db_for_write(User)
+        if user is not None:
+            request.user = user  # As DRF's authentication does
+        databases.append(router.db_for_read(User))
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    return middleware(getattr(RequestFactory(), method)('/api/users/', **headers)), databases
+
+
+def test_reads_are_routed_to_replicas(replicas):
+    # Replicas are picked in turn, the same one is used for the whole request
+    first, second = route_request('get')[1], route_request('head')[1]
+    assert {tuple(first), tuple(second)} == {('replica', 'replica'), ('replica_2', 'replica_2')}
+
+    replicas.add('replica')
+    assert route_request('get')[1] == ['replica_2', 'replica_2']
+    replicas.add('replica_2')
+    assert route_request('get')[1] == ['default', 'default']
+
+    # Outside of requests
+    assert router.db_for_read(User) == 'default'
+
+
+def test_writes_pin_client_to_primary(replicas, settings):
+    response, databases = route_request('post', write=True)
+    assert databases == ['default', 'default']
+    cookie = response.cookies[ReplicaRoutingMiddleware.cookie_name]
+    assert cookie['max-age'] == settings.DATABASE_REPLICA_PIN_SECONDS
+
+    # Reads after a write in the same request go to the primary as well
+    response, databases = route_request('get', write=True)
+    assert databases[1] == 'default' and ReplicaRoutingMiddleware.cookie_name in response.cookies
+
+    response, databases = route_request('get', HTTP_COOKIE=f'{ReplicaRoutingMiddleware.cookie_name}=1')
+    assert databases == ['default', 'default'] and not response.cookies
+
+
+def test_writes_pin_user_to_primary(replicas):
+    user = User(pk=1)
+    token = AccessToken.for_user(user)
+    response, databases = route_request('patch', write=True, user=user)
+    assert databases == ['default', 'default']
+
+    # Without the cookie (e.g. another client of the user) reads go to the primary as long as the token is the user's
+    response, databases = route_request('get', HTTP_AUTHORIZATION=f'Bearer {token}')
+    assert databases == ['default', 'default']
+    another_token = AccessToken.for_user(User(pk=2))
+    assert route_request('get', HTTP_AUTHORIZATION=f'Bearer {another_token}')[1][0] != 'default'
+    assert route_request('get', HTTP_AUTHORIZATION='Bearer malformed')[1][0] != 'default'
+
+
+def test_without_replicas():
+    response, databases = route_request('get', write=True)
+    assert databases == ['default', 'default'] and not response.cookies
+
+
+class FailingConnection:
+    def __init__(self):
+        self.attempts = 0
+
+    def ensure_connection(self):
+        self.attempts += 1
+        raise OperationalError('connection refused')
+
+
+def test_unavailable_replica_is_skipped(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ['replica']
+    connection = FailingConnection()
+    monkeypatch.setattr('utils.django.db.routers.connections', {'replica': connection})
+    replica_router = ReplicaRouter()
+
+    for _ in range(2):
+        with route_reads():
+            assert replica_router.db_for_read(User) == 'default'
+    assert connection.attempts == 1  # Not retried until DATABASE_REPLICA_RETRY_AFTER passes
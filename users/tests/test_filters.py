@@ -0,0 +1,58 @@
+import pytest
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from users.filters import UserFilterSet
+from users.models import User
+from users.tests.utils import pick_random_obj
+from users.viewsets import UserViewSet
+from utils.rest_framework.filters import AsyncDjangoFilterBackend
+
+
+@pytest.fixture(autouse=True)
+def clear_form_cache():
+    AsyncDjangoFilterBackend._form_cache.clear()
+
+
+@pytest.mark.django_db
+def test_filterset_form_cache(client, test_data, monkeypatch):
+    """ Test that identical filters are validated once, regardless of other query params """
+    form_classes = []
+    get_form_class = UserFilterSet.get_form_class
+    monkeypatch.setattr(UserFilterSet, 'get_form_class', lambda self: form_classes.append(1) or get_form_class(self))
+
+    url = f'{reverse("user-list")}?is_staff=true&date_joined_after=2000-01-01&page_size=2'
+    response: Response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK, response.data
+    while response.data['next'] is not None:
+        response = client.get(response.data['next'])
+    expected_count = User.objects.filter(is_staff=True, date_joined__date__gte='2000-01-01').count()
+    assert response.data['count'] == expected_count
+    assert len(form_classes) == 1
+
+    client.get(f'{reverse("user-list")}?date_joined_after=2000-01-01&is_staff=true&ordering=id')
+    assert len(form_classes) == 1
+    client.get(f'{reverse("user-list")}?is_staff=false')
+    assert len(form_classes) == 2
+
+
+@pytest.mark.django_db
+def test_invalid_filters_are_not_cached(client, test_data):
+    for _ in range(2):
+        response: Response = client.get(f'{reverse("user-list")}?date_joined_after=invalid')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not AsyncDjangoFilterBackend._form_cache
+
+
+@pytest.mark.django_db
+def test_filtering_is_async(client, test_data, monkeypatch):
+    """ Test that actions don't fall back to synchronous filtering """
+    def filter_queryset(*args):
+        raise AssertionError('Synchronous filter_queryset() must not be called')
+    monkeypatch.setattr(UserViewSet, 'filter_queryset', filter_queryset)
+
+    response: Response = client.get(f'{reverse("user-list")}?is_active=true&search=a')
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get(reverse('user-detail', [pick_random_obj(User).pk]))
+    assert response.status_code == status.HTTP_200_OK
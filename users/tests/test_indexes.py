@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+
+def explain_list_queries(client, query_params: dict) -> list[str]:
+    """ Returns plans of all queries the list endpoint runs for the given query params """
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse('user-list'), query_params)
+    assert response.status_code == status.HTTP_200_OK, response.data
+
+    plans = []
+    with connection.cursor() as cursor:
+        # The test table is tiny, so a sequential scan is always the cheapest. Discourage it to see whether
+        # the planner is able to use an index at all (the setting is rolled back along with the test transaction)
+        cursor.execute('ANALYZE users_user')
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT') or 'FROM "users_user"' not in query['sql']:
+                continue  # E.g. count estimates, which run EXPLAIN themselves
+            cursor.execute(f'EXPLAIN {query["sql"]}')
+            plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+    return plans
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_params, index_name', [
+    ({}, 'users_user_pkey'),
+    ({'is_staff': 'true'}, 'users_user_staff_idx'),
+    ({'is_superuser': 'true'}, 'users_user_superuser_idx'),
+    ({'is_active': 'false'}, 'users_user_inactive_idx'),
+    ({'date_joined_after': '2000-01-01', 'ordering': 'date_joined'}, 'users_user_date_joined_idx'),
+    ({'is_active': 'true', 'date_joined_before': '2000-01-01', 'ordering': '-date_joined'},
+     'users_user_date_joined_idx'),
+])
+def test_list_uses_indexes(client, test_data, query_params, index_name):
+    plans = explain_list_queries(client, query_params)
+    assert plans
+    for plan in plans:
+        assert 'Seq Scan' not in plan, plan
+    assert any(index_name in plan for plan in plans), plans
+
+
+@pytest.mark.django_db
+def test_search_uses_index(client, test_data):
+    plans = explain_list_queries(client, {'search': 'john'})
+    assert any('users_user_search_vector_idx' in plan for plan in plans), plans
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from users.models import User
+from utils.django.loadtest import summarize
+
+
+def test_summarize():
+    summary = summarize([i / 1000 for i in range(1, 101)], elapsed=2)
+    assert summary == {'requests': 100, 'rps': 50.0, 'mean_ms': 50.5, 'p50_ms': 50.5, 'p95_ms': 95.05,
+                       'p99_ms': 99.01, 'max_ms': 100.0}
+    assert summarize([0.01], elapsed=1)['p99_ms'] == 10.0
+
+
+@pytest.mark.django_db(transaction=True)  # Requests are handled in other threads, they must see seeded users
+def test_benchmark_api(tmp_path):
+    output = tmp_path / 'report.json'
+    with pytest.raises(CommandError, match='--allow-write'):  # Tests run with DEBUG off
+        call_command('benchmark_api', users=20, requests=40, output=str(output))
+    call_command('benchmark_api', users=20, requests=40, warmup=5, concurrency=3, output=str(output), allow_write=True)
+
+    report = json.loads(output.read_text())
+    assert report['total']['requests'] == 40
+    assert set(report['operations']) <= {'list', 'filter', 'search', 'retrieve', 'create', 'update', 'token'}
+    for operation, summary in report['operations'].items():
+        assert all(status.startswith('2') for status in summary['statuses']), (operation, summary)
+        assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms']
+    # Seeded users are kept, created ones and the superuser are deleted
+    assert User.objects.filter(username__startswith='bench-').count() == 20
+    assert not User.objects.filter(is_superuser=True).exists()
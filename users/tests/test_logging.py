@@ -0,0 +1,86 @@
+import json
+import logging
+import threading
+import time
+
+from utils.django.log import JSONFormatter, QueueHandler, SamplingFilter
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self, delay: float = 0.0, event: threading.Event = None):
+        super().__init__()
+        self.delay = delay
+        self.event = event
+        self.records = []
+
+    def emit(self, record):
+        if self.event is not None:
+            self.event.wait()
+        time.sleep(self.delay)
+        self.records.append(record)
+
+
+def get_logger(handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger('utils.tests.logging')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = [handler]
+    return logger
+
+
+def test_queue_handler():
+    target = SlowHandler(delay=0.1)
+    target.set_name('test_slow_target')  # Targets are referenced by names of configured handlers
+    handler = QueueHandler(['test_slow_target'])
+    logger = get_logger(handler)
+
+    start = time.perf_counter()
+    for i in range(5):
+        logger.info('Message %s', i)
+    assert time.perf_counter() - start < 0.1  # Nothing waits for the slow handler
+
+    handler.stop()  # Writes the rest of records
+    assert [record.getMessage() for record in target.records] == [f'Message {i}' for i in range(5)]
+
+
+def test_queue_handler_drops_records():
+    event = threading.Event()
+    target = SlowHandler(event=event)
+    handler = QueueHandler([target], queue_size=1)
+    logger = get_logger(handler)
+
+    for i in range(5):
+        logger.info('Message %s', i)
+    event.set()
+    handler.stop()
+    # One record is being handled, one is queued, others are dropped
+    assert handler.dropped >= 3
+    assert len(target.records) + handler.dropped == 5
+
+
+def test_sampling_filter():
+    record = logging.makeLogRecord({'name': 'django.db.backends', 'levelno': logging.DEBUG})
+    assert not SamplingFilter('django.db.backends', rate=0).filter(record)
+    assert SamplingFilter('django.db.backends', rate=1).filter(record)
+
+    # Records of other levels and other loggers are not sampled
+    assert SamplingFilter('django.db.backends', rate=0).filter(
+        logging.makeLogRecord({'name': 'django.db.backends', 'levelno': logging.ERROR}))
+    assert SamplingFilter('django.db.backends', rate=0).filter(
+        logging.makeLogRecord({'name': 'django.request', 'levelno': logging.DEBUG}))
+
+
+def test_json_formatter():
+    try:
+        raise ValueError('Invalid')
+    except ValueError as e:
+        record = logging.makeLogRecord({
+            'name': 'django.db.backends', 'levelno': logging.ERROR, 'levelname': 'ERROR', 'msg': 'Query %s failed',
+            'args': ('SELECT 1',), 'exc_info': (type(e), e, e.__traceback__), 'params': (1, object()),
+        })
+
+    data = json.loads(JSONFormatter().format(record))
+    assert data['message'] == 'Query SELECT 1 failed'
+    assert (data['level'], data['logger']) == ('ERROR', 'django.db.backends')
+    assert 'ValueError: Invalid' in data['exc_info']
+    assert data['params'][0] == 1 and data['params'][1].startswith('<object')
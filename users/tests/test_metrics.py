@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from asgiref.sync import SyncToAsync, async_to_sync, sync_to_async
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from users.models import User
+from users.tests.utils import pick_random_obj
+from utils.django.executors import BoundedExecutor, instrument_default_executor
+from utils.django.metrics import EVENT_LOOP_LAG, EventLoopLagMonitor, Histogram, Registry
+
+
+def get_samples(client) -> dict[str, float]:
+    response = client.get(reverse('metrics'))
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+@pytest.mark.django_db
+def test_request_metrics(client, admin_client, test_data):
+    client.get(f'{reverse("user-list")}?is_active=true')
+    admin_client.patch(reverse('user-detail', [pick_random_obj(User).pk]), data={'first_name': 'Changed'})
+    client.post(reverse('token_obtain_pair'), data={'username': 'nobody', 'password': '123'})
+
+    samples = get_samples(client)
+    assert samples['http_request_duration_seconds_count{view="user-list",action="list",method="GET",status="200"}']
+    for phase in ('authentication', 'permissions', 'filtering', 'serialization', 'db'):
+        assert samples[f'http_request_phase_duration_seconds_count{{view="user-list",action="list",'
+                       f'phase="{phase}"}}']
+    for phase in ('authentication', 'permissions', 'validation', 'serialization', 'db'):
+        assert samples[f'http_request_phase_duration_seconds_count{{view="user-detail",'
+                       f'action="partial_update",phase="{phase}"}}']
+    assert samples['http_request_duration_seconds_count{view="token_obtain_pair",action="post",method="POST",'
+                   'status="401"}']
+    assert samples['http_request_db_queries_total{view="user-list",action="list"}']
+    assert samples['executor_workers{executor="password-hashing",state="max"}']
+
+
+def test_metrics_access(client, settings):
+    settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+    assert client.get(reverse('metrics')).status_code == status.HTTP_403_FORBIDDEN
+    assert client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code == status.HTTP_200_OK
+
+    settings.METRICS_TOKEN = 'secret'
+    assert client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code == status.HTTP_403_FORBIDDEN
+    assert client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code == \
+        status.HTTP_403_FORBIDDEN
+    assert client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').status_code == status.HTTP_200_OK
+
+
+def test_histogram():
+    registry = Registry()
+    histogram = Histogram('test_seconds', 'Test histogram', ('label',), buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe('a"b', value=value)
+
+    assert registry.render().splitlines() == [
+        '# HELP test_seconds Test histogram',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{label="a\\"b",le="0.1"} 2',
+        'test_seconds_bucket{label="a\\"b",le="1.0"} 3',
+        'test_seconds_bucket{label="a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{label="a\\"b"} 5.65',
+        'test_seconds_count{label="a\\"b"} 4',
+    ]
+
+
+def test_executor_metrics(client, settings):
+    executor = BoundedExecutor('test-metrics', max_workers=2, max_queue_size=3)
+    async_to_sync(executor.arun)(sum, [1, 2])
+
+    samples = get_samples(client)
+    assert samples['executor_workers{executor="test-metrics",state="max"}'] == 2
+    assert samples['executor_queue{executor="test-metrics",state="max"}'] == 3
+    assert samples['executor_tasks_total{executor="test-metrics",result="completed"}'] == 1
+
+
+def test_thread_pool_metrics(client, monkeypatch):
+    async def arun_in_threads():
+        instrument_default_executor()
+        executor = asyncio.get_running_loop()._default_executor
+        await sync_to_async(sum, thread_sensitive=False)([1, 2])
+        await asyncio.get_running_loop().run_in_executor(None, sum, [1, 2])
+        return executor
+
+    executor = async_to_sync(arun_in_threads)()  # Kept, so that the executor isn't garbage collected
+    samples = get_samples(client)
+    assert samples['executor_tasks_total{executor="default",result="completed"}'] >= 2
+    assert samples['executor_workers{executor="default",state="running"}'] == 0
+    assert samples['executor_workers{executor="default",state="max"}'] == executor.max_workers
+    assert samples['executor_workers{executor="sync_to_async",state="active"}'] == 0
+
+    # Private attributes of asgiref may change between versions
+    monkeypatch.delattr(SyncToAsync, 'context_to_thread_executor')
+    assert get_samples(client)['executor_workers{executor="default",state="max"}'] == executor.max_workers
+
+
+def test_event_loop_lag(monkeypatch):
+    monkeypatch.setattr(EventLoopLagMonitor, 'interval', 0.01)
+
+    async def ablock_loop():
+        EventLoopLagMonitor.ensure_started()
+        EventLoopLagMonitor.ensure_started()  # Started once per loop
+        await asyncio.sleep(0.015)
+        EventLoopLagMonitor._loops[asyncio.get_running_loop()].cancel()
+
+    count = EVENT_LOOP_LAG._values.get((), [0])[:-1]
+    async_to_sync(ablock_loop)()
+    assert sum(EVENT_LOOP_LAG._values[()][:-1]) == sum(count) + 1
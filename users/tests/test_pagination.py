@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from users.viewsets import UserViewSet
+from utils.rest_framework.pagination import AsyncCursorPagination, CountPageNumberPagination
+
+
+def count_queries(context: CaptureQueriesContext) -> int:
+    return sum('COUNT(' in query['sql'] or 'EXPLAIN' in query['sql'] for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_list_count(client, test_data):
+    url = f'{reverse("user-list")}?is_active=true&page_size=3'
+    with CaptureQueriesContext(connection) as context:
+        response: Response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response.data['count'] == User.objects.filter(is_active=True).count()
+    assert response.data['count_is_exact'] is True
+    assert count_queries(context) == 2  # An estimate, then an exact count since the estimate is small
+
+    # The count is cached for the same filters, also while traversing pages
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(response.data['next'])
+    assert response.data['count'] == User.objects.filter(is_active=True).count()
+    assert count_queries(context) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_params', ['', '?is_staff=true'])
+def test_list_count_estimate(client, test_data, monkeypatch, query_params):
+    monkeypatch.setattr(UserViewSet.pagination_class, 'exact_count_threshold', 0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE users_user')
+
+    response: Response = client.get(f'{reverse("user-list")}{query_params}')
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response.data['count_is_exact'] is False
+    assert isinstance(response.data['count'], int)
+    if not query_params:  # Statistics of the whole table are precise after ANALYZE
+        assert response.data['count'] == User.objects.count()
+
+
+@pytest.mark.django_db
+def test_list_count_disabled(client, test_data, monkeypatch):
+    monkeypatch.setattr(UserViewSet.pagination_class, 'count_strategy', None)
+    with CaptureQueriesContext(connection) as context:
+        response: Response = client.get(reverse('user-list'))
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert 'count' not in response.data and 'count_is_exact' not in response.data
+    assert count_queries(context) == 0
+
+
+@pytest.mark.django_db
+def test_page_number_count(test_data):
+    paginator = CountPageNumberPagination()
+    paginator.page_size = 3
+    paginator.count_strategy = 'exact'
+    request = Request(APIRequestFactory().get('/', {'page': 2}))
+
+    page = paginator.paginate_queryset(User.objects.all(), request)
+    assert len(page) == 3
+    data = paginator.get_paginated_response([]).data
+    assert (data['count'], data['count_is_exact']) == (User.objects.count(), True)
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_in_sync_code(test_data):
+    paginator = AsyncCursorPagination()
+    paginator.page_size = 3
+    page = paginator.paginate_queryset(User.objects.order_by('pk'), Request(APIRequestFactory().get('/')))
+    assert page == list(User.objects.order_by('pk')[:3])
+
+    request = Request(APIRequestFactory().get(paginator.get_next_link()))
+    assert paginator.paginate_queryset(User.objects.order_by('pk'), request) == list(User.objects.order_by('pk')[3:6])
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from users.models import User
+from users.tests.conftest import test_user_credentials
+from utils.django import hashers
+from utils.django.executors import BoundedExecutor
+
+
+@pytest.mark.django_db
+def test_saturated_hashing_executor(admin_client, monkeypatch):
+    """ Test that requests which need password hashing get 503 when the hashing executor is saturated """
+    executor = BoundedExecutor('test-hashing', max_workers=1, max_queue_size=0)
+    monkeypatch.setattr(hashers, '_hashing_executor', executor)
+
+    # Occupy the only worker
+    release = threading.Event()
+    thread = threading.Thread(target=asyncio.run, args=(executor.arun(release.wait),))
+    thread.start()
+    while executor.get_stats()['running'] == 0:
+        time.sleep(0.01)
+
+    try:
+        data = {'username': 'user', 'password': '123'}
+        response: Response = admin_client.post(reverse('user-list'), data=data, format='json')
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE, response.data
+        assert response['Retry-After'] == '1'
+        assert executor.get_stats()['rejected'] == 1
+    finally:
+        release.set()
+        thread.join()
+
+    assert executor.get_stats() == {'max_workers': 1, 'max_queue_size': 0, 'running': 0, 'queue_depth': 0,
+                                    'completed': 1, 'rejected': 1}
+
+
+@pytest.mark.django_db
+def test_token_obtain_wrong_password(client):
+    User.objects.create_user(**test_user_credentials)
+
+    data = {**test_user_credentials, 'password': 'wrong'}
+    response: Response = client.post(reverse('token_obtain_pair'), data=data)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    data = {**test_user_credentials, 'username': 'nonexistent'}
+    response: Response = client.post(reverse('token_obtain_pair'), data=data)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,28 @@
+import pytest
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+
+from users.models import User
+from users.tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('workers', [1, 2])
+def test_populate_db(workers):
+    call_command('populate_db', count=50, batch_size=20, workers=workers)
+
+    assert User.objects.count() == 50
+    admin = User.objects.get(username='admin')
+    assert admin.is_superuser and admin.check_password('123')
+
+    users = User.objects.exclude(pk=admin.pk)
+    assert users.values('password').distinct().count() == 1
+    assert check_password(UserFactory.PASSWORD, users.first().password)
+    assert not users.filter(search_vector=None).exists()  # Set by the trigger on COPY as well
+
+    # Only missing users are created
+    call_command('populate_db', count=60, batch_size=20, workers=workers)
+    assert User.objects.count() == 60
+    call_command('populate_db', count=10, workers=workers)
+    assert User.objects.count() == 60
+    assert User.objects.filter(username='admin').count() == 1
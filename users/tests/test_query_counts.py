@@ -0,0 +1,62 @@
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from users.tests.utils import pick_random_obj
+from utils.django import middleware
+from utils.django.middleware import QueryCountMiddleware
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method, url_name, data, max_count', [
+    ('get', 'user-list', None, 6),  # Authenticated user, page keys (ETag), count estimate, exact count and page
+    ('get', 'user-detail', None, 3),  # Authenticated user, version (ETag) and the user
+    ('get', 'user-export', None, 1),  # Authenticated user, rows are fetched while the response is streamed
+    ('post', 'user-list', {'username': 'new_user', 'password': '123'}, 3),
+    ('patch', 'user-detail', {'first_name': 'Changed'}, 3),
+    ('delete', 'user-detail', None, 3),
+    ('post', 'user-bulk-create', [{'username': f'new_user_{i}', 'password': '123'} for i in range(10)], 3),
+    ('post', 'token_obtain_pair', {'username': 'admin', 'password': '123'}, 1),
+])
+def test_query_count(admin_client, test_data, assert_max_queries, method, url_name, data, max_count):
+    """ Upper bounds of queries per endpoint, make sure there are good reasons before raising them """
+    url = reverse(url_name, [pick_random_obj(User).pk] if url_name == 'user-detail' else [])
+    with assert_max_queries(max_count) as stats:
+        response = getattr(admin_client, method)(url, data=data, format='json')
+    assert status.is_success(response.status_code), response.data
+    assert not stats.duplicates
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('is_async', [False, True])
+def test_query_count_middleware(test_data, settings, monkeypatch, is_async):
+    settings.QUERY_COUNT_SERVER_TIMING = True
+    monkeypatch.setattr(middleware, 'logger', mock.Mock())
+
+    def get_response(request):
+        for user in User.objects.order_by('pk')[:3]:  # N+1
+            User.objects.filter(pk=user.pk).exists()
+        return HttpResponse()
+
+    request = APIRequestFactory().get('/')
+    if is_async:  # Queries are made through sync_to_async
+        response = async_to_sync(QueryCountMiddleware(sync_to_async(get_response)))(request)
+    else:
+        response = QueryCountMiddleware(get_response)(request)
+
+    assert response['Server-Timing'].startswith('db;dur=')
+    assert '4 queries, 1 duplicated' in response['Server-Timing']
+    level, *_ = middleware.logger.log.call_args.args
+    query_stats = middleware.logger.log.call_args.kwargs['extra']['query_stats']
+    assert query_stats['query_count'] == 4
+    assert query_stats['duplicates'][0]['count'] == 3
+    assert level == middleware.logging.WARNING
+
+    settings.QUERY_COUNT_SERVER_TIMING = False
+    assert 'Server-Timing' not in QueryCountMiddleware(lambda request: HttpResponse())(request)
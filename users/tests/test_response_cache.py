@@ -0,0 +1,222 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from users.models import User
+from users.tests.factories import UserFactory
+from users.tests.test_authentication import get_client
+from users.tests.utils import pick_random_obj
+from users.viewsets import UserViewSet
+from utils.django.db.routers import ReplicaRouter
+from utils.django.middleware import ReplicaRoutingMiddleware
+
+
+@pytest.mark.django_db
+def test_retrieve_cache(client, admin_client, test_data, django_assert_num_queries):
+    user = pick_random_obj(User)
+    url = reverse('user-detail', [user.id])
+
+    response: Response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    with django_assert_num_queries(0):
+        cached_response: Response = client.get(url)
+    assert cached_response.data == response.data
+    assert cached_response['ETag'] == response['ETag']
+
+    # Another caller scope and another object are cached separately
+    with django_assert_num_queries(3):  # User lookup, version lookup and retrieve
+        admin_client.get(url)
+    another_url = reverse('user-detail', [pick_random_obj(queryset=User.objects.exclude(pk=user.pk)).pk])
+    with django_assert_num_queries(2):
+        client.get(another_url)
+
+    # Changes invalidate the cached object
+    response = admin_client.patch(url, data={'first_name': 'Changed'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get(url)
+    assert response.data['first_name'] == 'Changed'
+
+    user.delete()
+    assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_cache(client, admin_client, test_data, django_assert_num_queries):
+    url = f'{reverse("user-list")}?is_active=true'
+    response: Response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    with django_assert_num_queries(0):
+        assert client.get(url).data == response.data
+
+    # Lists are invalidated by changes of any object, including bulk ones
+    user = User.objects.filter(is_active=True).first()
+    data = [{'id': user.pk, 'first_name': 'Changed'}]
+    assert admin_client.patch(reverse('user-bulk-create'), data=data, format='json').status_code == 200
+    assert {'Changed'} <= {obj['first_name'] for obj in client.get(url).data['results']}
+
+    data = [{'username': 'new_user', 'password': '123'}]
+    assert admin_client.post(reverse('user-bulk-create'), data=data, format='json').status_code == 201
+    assert client.get(url).data['results'][0]['username'] == 'new_user'
+
+
+@pytest.mark.django_db
+def test_retrieve_cache_lookup_forms(client, test_data, django_assert_num_queries):
+    """ Different forms of the same pk share the version, so a change invalidates all of them """
+    user = pick_random_obj(User)
+    url = f'{reverse("user-list")}0{user.pk}/'
+    assert client.get(url).data['first_name'] == user.first_name
+
+    user.first_name = 'Changed'
+    user.save()
+    assert client.get(url).data['first_name'] == 'Changed'
+    assert client.get(f'{reverse("user-list")}x/').status_code == status.HTTP_404_NOT_FOUND
+
+
+class OwnObjectsOnly(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return request.user.pk == obj.pk
+
+
+@pytest.mark.django_db
+def test_cached_response_object_permissions(monkeypatch):
+    monkeypatch.setattr(UserViewSet, 'permission_classes', [OwnObjectsOnly])
+    user, another_user = UserFactory.create(is_superuser=False), UserFactory.create(is_superuser=False)
+    url = reverse('user-detail', [user.pk])
+
+    assert get_client(RefreshToken.for_user(user)).get(url).status_code == status.HTTP_200_OK
+    # The same cache scope, but the object permission is checked for the cached response
+    response: Response = get_client(RefreshToken.for_user(another_user)).get(url)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_etag(client, test_data, django_assert_num_queries):
+    url = reverse('user-detail', [pick_random_obj(User).pk])
+    etag = client.get(url)['ETag']
+
+    with django_assert_num_queries(0):
+        response: Response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+    assert not response.content
+
+    response = client.get(url, HTTP_IF_NONE_MATCH='"other"')
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] == etag
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name', ['user-detail', 'user-list'])
+def test_conditional_requests(client, test_data, django_assert_num_queries, url_name):
+    """ Test that conditional requests get 304 with a single query, when the response is not cached """
+    user = pick_random_obj(User)
+    url = reverse(url_name, [user.pk] if url_name == 'user-detail' else [])
+    response: Response = client.get(url)
+    etag = response['ETag']
+
+    cache.clear()
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    if url_name == 'user-detail':
+        cache.clear()
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    else:
+        assert 'Last-Modified' not in response
+
+    # Any change of the object changes its version
+    User.objects.filter(pk=user.pk).update(modified_at=timezone.now())
+    cache.clear()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_list_without_deleted_object(client, test_data):
+    """ Removal of an object doesn't change modification times of the rest of the page, but changes the list """
+    url = reverse('user-list')
+    response: Response = client.get(url)
+    etag = response['ETag']
+    User.objects.filter(username=response.data['results'][0]['username']).delete()
+
+    cache.clear()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=http_date()).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_if_match(admin_client, test_data):
+    user = pick_random_obj(User)
+    url = reverse('user-detail', [user.pk])
+    etag = admin_client.get(url)['ETag']
+
+    response: Response = admin_client.patch(url, data={'first_name': 'First'}, format='json', HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK, response.data
+
+    # The ETag is outdated after the update
+    response = admin_client.patch(url, data={'first_name': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = admin_client.delete(url, HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    user.refresh_from_db()
+    assert user.first_name == 'First'
+
+    response = admin_client.patch(url, data={'first_name': 'Second'}, format='json',
+                                  HTTP_IF_MATCH=admin_client.get(url)['ETag'])
+    assert response.status_code == status.HTTP_200_OK, response.data
+
+    # The response carries the new version, which can be used for the next update right away
+    assert response['ETag'] == admin_client.get(url)['ETag']
+    response = admin_client.put(url, data={**response.data, 'first_name': 'Third'}, format='json',
+                                HTTP_IF_MATCH=response['ETag'])
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response['ETag'] == admin_client.get(url)['ETag']
+    assert response['Last-Modified']
+
+
+@pytest.fixture
+def replica(settings, monkeypatch):
+    """ Configures `replica` database, which is the connection to `default` """
+    settings.DATABASE_REPLICAS = ['replica']
+    monkeypatch.setattr(ReplicaRouter, 'is_available', lambda self, alias: True)
+    connections['replica'] = connections['default']
+    yield
+    del connections['replica']
+
+
+@pytest.mark.django_db
+def test_cache_with_replicas(client, admin_client, test_data, replica, django_assert_num_queries, settings):
+    user = pick_random_obj(User)
+    url = reverse('user-detail', [user.pk])
+    response: Response = admin_client.patch(url, data={'first_name': 'Changed'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert ReplicaRoutingMiddleware.cookie_name in response.cookies
+
+    # Right after the change the replica may not have it, so what is read from the replica isn't cached
+    for _ in range(2):
+        with django_assert_num_queries(2):
+            assert client.get(url).data['first_name'] == 'Changed'
+
+    # What the pinned client reads from the primary is cached for all clients
+    client.cookies[ReplicaRoutingMiddleware.cookie_name] = '1'
+    with django_assert_num_queries(2):
+        client.get(url)
+    del client.cookies[ReplicaRoutingMiddleware.cookie_name]
+    with django_assert_num_queries(0):
+        assert client.get(url).data['first_name'] == 'Changed'
+
+    # Later reads from the replica are cached
+    settings.DATABASE_REPLICA_PIN_SECONDS = 0
+    list_url = reverse('user-list')
+    client.get(list_url)
+    with django_assert_num_queries(0):
+        client.get(list_url)
@@ -0,0 +1,77 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from utils.rest_framework.schema import accepts_gzip, clear_prebuilt_schemas
+
+
+@pytest.fixture
+def schema_dir(settings, tmp_path):
+    settings.SPECTACULAR_SCHEMA_DIR = tmp_path
+    settings.SPECTACULAR_LIVE_SCHEMA = False
+    clear_prebuilt_schemas()
+    yield tmp_path
+    clear_prebuilt_schemas()
+
+
+def test_prebuilt_schema(client, schema_dir, monkeypatch):
+    call_command('build_schema')
+    # Requests must not inspect views
+    monkeypatch.setattr(SchemaGenerator, 'get_schema', lambda *args, **kwargs: pytest.fail('Schema generated'))
+
+    response = client.get(reverse('schema'))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == (schema_dir / 'schema.yaml').read_bytes()
+    assert response['Content-Type'] == 'application/vnd.oai.openapi'
+    assert '/api/users/' in response.content.decode()
+
+    response = client.get(reverse('schema'), {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    schema = json.loads(gzip.decompress(response.content))
+    assert '/api/schema/' not in schema['paths']
+    response = client.get(reverse('schema'), {'format': 'json'}, HTTP_ACCEPT_ENCODING='br, gzip;q=0')
+    assert 'Content-Encoding' not in response and json.loads(response.content) == schema
+
+    etag = response['ETag']
+    response = client.get(reverse('schema'), {'format': 'json'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not response.content
+    assert client.get(reverse('schema'), HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK  # YAML
+
+
+@pytest.mark.parametrize('accept_encoding, accepted', [
+    ('gzip, deflate', True),
+    ('deflate, GZIP;q=0.5', True),
+    ('*', True),
+    ('', False),
+    ('deflate', False),
+    ('gzip;q=0', False),
+    ('gzip; q=0.0, *', False),
+    ('*;q=0', False),
+    ('x-gzip', True),
+    ('gzip;q=invalid', False),
+])
+def test_accepts_gzip(accept_encoding, accepted):
+    assert accepts_gzip(accept_encoding) is accepted
+
+
+def test_schema_without_build(client, schema_dir):
+    """ The schema is generated once if it wasn't built """
+    first = client.get(reverse('schema'))
+    assert first.status_code == status.HTTP_200_OK
+    assert client.get(reverse('schema'))['ETag'] == first['ETag']
+
+
+def test_live_schema(client, schema_dir, settings):
+    settings.SPECTACULAR_LIVE_SCHEMA = True
+    (schema_dir / 'schema.yaml').write_text('stale')
+
+    response = client.get(reverse('schema'))
+    assert response.status_code == status.HTTP_200_OK
+    assert '/api/users/' in response.content.decode()
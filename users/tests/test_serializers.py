@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import HyperlinkedIdentityField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from users.serializers import CreateUserSerializer, UpdateUserSerializer, UserSerializer
+from users.tests.utils import pick_random_obj, get_async_data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_params', [{}, {'format': 'json'}])
+def test_fast_representation_is_identical(test_data, monkeypatch, query_params):
+    """ Test that the fast representation path renders exactly the same bytes as the default one """
+    context = {'request': APIRequestFactory().get('/', query_params)}
+    queryset = User.objects.order_by('id')
+    instance = pick_random_obj(User)
+
+    fast_list = get_async_data(UserSerializer(queryset, many=True, context=context))
+    fast_detail = get_async_data(UserSerializer(instance, context=context))
+
+    monkeypatch.setattr(UserSerializer, 'fast_representation', False)
+    default_list = get_async_data(UserSerializer(queryset, many=True, context=context))
+    default_detail = get_async_data(UserSerializer(instance, context=context))
+
+    assert JSONRenderer().render(fast_list) == JSONRenderer().render(default_list)
+    assert JSONRenderer().render(fast_detail) == JSONRenderer().render(default_detail)
+
+
+@pytest.mark.django_db
+def test_fast_representation_reverses_url_once(test_data, serializer_context, monkeypatch):
+    """ Test that the url is reversed only once per serializer instance rather than once per object """
+    calls = []
+    get_url = HyperlinkedIdentityField.get_url
+    monkeypatch.setattr(HyperlinkedIdentityField, 'get_url', lambda *args: calls.append(args) or get_url(*args))
+
+    serializer = UserSerializer(User.objects.all(), many=True, context=serializer_context)
+    data = get_async_data(serializer)
+
+    assert len(data) == User.objects.count() > 1
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_list_unique_validation(test_data, serializer_context, django_assert_num_queries):
+    """ Test that uniqueness of all items is checked with a single query, including duplicates inside the list """
+    existing_usernames = list(User.objects.values_list('username', flat=True)[:5])
+    data = [{'username': username} for username in existing_usernames]
+    data += [{'username': f'new{i}'} for i in range(5)] + [{'username': 'new0'}]
+
+    serializer = UserSerializer(data=data, many=True, context=serializer_context)
+    with django_assert_num_queries(1):
+        assert not async_to_sync(serializer.ais_valid)()
+    assert [set(errors) for errors in serializer.errors] == [{'username'}] * 5 + [set()] * 5 + [{'username'}]
+
+
+def test_list_child_avalidate(serializer_context):
+    """ Test that child's .avalidate() runs for every item and its errors are reported per item """
+    class ChildSerializer(UserSerializer):
+        unique_fields = ()
+
+        async def avalidate(self, attrs):
+            if attrs['username'].startswith('bad'):
+                raise ValidationError({'username': 'Bad username.'})
+            return {**attrs, 'checked': True}
+
+    data = [{'username': 'good0'}, {'username': 'bad'}, {'username': 'good1'}]
+    serializer = ChildSerializer(data=data, many=True, context=serializer_context)
+    assert not async_to_sync(serializer.ais_valid)()
+    assert serializer.errors == [{}, {'username': ['Bad username.']}, {}]
+
+    serializer = ChildSerializer(data=data[::2], many=True, context=serializer_context)
+    assert async_to_sync(serializer.ais_valid)(), serializer.errors
+    assert all(item['checked'] for item in serializer.validated_data)
+
+
+@pytest.mark.django_db
+def test_unique_validation_excludes_instance(test_data, serializer_context):
+    instance, other = User.objects.all()[:2]
+    serializer = UserSerializer(instance, data={'username': instance.username}, partial=True,
+                                context=serializer_context)
+    assert async_to_sync(serializer.ais_valid)(), serializer.errors
+
+    serializer = UserSerializer(instance, data={'username': other.username}, partial=True, context=serializer_context)
+    assert not async_to_sync(serializer.ais_valid)()
+    assert set(serializer.errors) == {'username'}
+
+
+@pytest.mark.parametrize('serializer_class', [UserSerializer, CreateUserSerializer, UpdateUserSerializer])
+def test_cached_fields(serializer_class, serializer_context, monkeypatch):
+    """ Test that cached fields are the same as built ones, and every serializer gets its own bound copies """
+    first = serializer_class(context=serializer_context)
+    second = serializer_class(context=serializer_context)
+    monkeypatch.setattr(serializer_class, 'cache_fields', False)
+    built = serializer_class(context=serializer_context)
+
+    assert repr(first) == repr(second) == repr(built)
+    for field_name, field in first.fields.items():
+        assert field is not second.fields[field_name]
+        assert field.parent is first and second.fields[field_name].parent is second
+        assert field.read_only == built.fields[field_name].read_only
+        assert field.write_only == built.fields[field_name].write_only
+
+    first.fields['username'].label = 'Changed'
+    first.fields['username'].validators.append(lambda value: None)
+    first.fields['username'].error_messages['blank'] = 'Changed'
+    username = serializer_class(context=serializer_context).fields['username']
+    assert username.label != 'Changed'
+    assert len(username.validators) == len(built.fields['username'].validators)
+    assert username.error_messages['blank'] != 'Changed'
+
+
+def test_cached_fields_key(serializer_context):
+    """ Test that fields depending on the view's action are cached per action """
+    class ActionSerializer(UserSerializer):
+        def get_field_names(self, declared_fields, info):
+            field_names = super().get_field_names(declared_fields, info)
+            return [name for name in field_names if name != 'email' or self.context['view'].action != 'list']
+
+    for _ in range(2):
+        list_view, retrieve_view = SimpleNamespace(action='list'), SimpleNamespace(action='retrieve')
+        assert 'email' not in ActionSerializer(context={**serializer_context, 'view': list_view}).fields
+        assert 'email' in ActionSerializer(context={**serializer_context, 'view': retrieve_view}).fields
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+
+@pytest.fixture
+def test_database(db, monkeypatch):
+    """ Started processes use the test database """
+    monkeypatch.setenv('DB_NAME', connection.settings_dict['NAME'])
+
+
+def test_benchmark_startup(test_database, tmp_path):
+    output = tmp_path / 'report.json'
+    call_command('benchmark_startup', runs=2, output=str(output))
+
+    report = json.loads(output.read_text())
+    assert report['statuses'] == [200]
+    assert report['deferred_modules_imported'] == []
+    assert 0 < report['import_ms']['median'] < report['time_to_first_response_ms']['median']
+    assert 'django' in report['imports']['startup']['packages_ms']
+    # Documentation views are imported on their first request
+    assert 'drf_spectacular' not in report['imports']['first_request']['packages_ms']
+
+
+def test_benchmark_startup_threshold(test_database, tmp_path):
+    with pytest.raises(CommandError, match='exceeds'):
+        call_command('benchmark_startup', runs=1, max_ms=1, output=str(tmp_path / 'report.json'))
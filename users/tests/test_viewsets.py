@@ -0,0 +1,76 @@
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from users.serializers import CreateUserSerializer, UpdateUserSerializer
+from users.tests.utils import pick_random_obj
+from users.viewsets import UserViewSet
+from utils.rest_framework import views
+from utils.rest_framework.pagination import pagination_class_factory
+from utils.rest_framework.viewsets import async_mixins
+from utils.rest_framework.viewsets.generic import AsyncModelViewSet
+
+
+class PlainUserViewSet(AsyncModelViewSet):
+    """ A viewset defining no actions itself, with a synchronous paginator """
+    queryset = User.objects.order_by('pk')
+    pagination_class = pagination_class_factory('PlainPagination', page_size=5, base_class=PageNumberPagination)
+
+    def get_serializer_class(self):
+        return CreateUserSerializer if self.action == 'create' else UpdateUserSerializer
+
+
+@pytest.mark.django_db
+def test_dispatch_stays_in_event_loop(client, admin_client, test_data, monkeypatch):
+    """ Test that UserViewSet never runs authentication, permissions or pagination in a thread """
+    def sync_to_async(*args, **kwargs):
+        raise AssertionError('sync_to_async() must not be called')
+    monkeypatch.setattr(views, 'sync_to_async', sync_to_async)
+    monkeypatch.setattr(async_mixins, 'sync_to_async', sync_to_async)
+    monkeypatch.setattr(UserViewSet, 'initial', sync_to_async)
+    monkeypatch.setattr(UserViewSet, 'check_object_permissions', sync_to_async)
+
+    response: Response = client.get(reverse('user-list'))
+    assert response.status_code == status.HTTP_200_OK, response.data
+    url = reverse('user-detail', [pick_random_obj(User).pk])
+    response = admin_client.patch(url, data={'first_name': 'Changed'}, format='json')
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert admin_client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+
+    # Permissions are still checked
+    response = client.post(reverse('user-list'), data={'username': 'new_user', 'password': '123'}, format='json')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    url = reverse('user-detail', [pick_random_obj(User).pk])
+    assert client.patch(url, data={'first_name': 'Changed'}, format='json').status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_model_viewset(test_data):
+    assert PlainUserViewSet.view_is_async
+    factory = APIRequestFactory()
+
+    view = PlainUserViewSet.as_view({'get': 'list', 'post': 'create'})
+    response = async_to_sync(view)(factory.get('/', {'page': 2}))
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response.data['count'] == User.objects.count()
+    expected_usernames = list(User.objects.order_by('pk').values_list('username', flat=True)[5:10])
+    assert [obj['username'] for obj in response.data['results']] == expected_usernames
+
+    response = async_to_sync(view)(factory.post('/', {'username': 'new_user', 'password': '123'}, format='json'))
+    assert response.status_code == status.HTTP_201_CREATED, response.data
+    assert response['Location'] == response.data['url']
+
+    view = PlainUserViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'})
+    user = User.objects.get(username='new_user')
+    response = async_to_sync(view)(factory.patch('/', {'first_name': 'Changed'}, format='json'), pk=user.pk)
+    assert response.status_code == status.HTTP_200_OK, response.data
+    response = async_to_sync(view)(factory.get('/'), pk=user.pk)
+    assert response.data['first_name'] == 'Changed'
+    response = async_to_sync(view)(factory.delete('/'), pk=user.pk)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not User.objects.filter(pk=user.pk).exists()
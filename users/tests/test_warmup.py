@@ -0,0 +1,60 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.urls import clear_url_caches, get_resolver
+
+from drf_user_demo.asgi import application
+from utils.django.db.backends.postgresql.base import get_pool_name
+from utils.django.db.pool import ConnectionPool
+from utils.django.lifespan import LifespanMiddleware
+from utils.django.loadtest import ASGIClient
+from utils.django.metrics import WARM_UP_DURATION
+from utils.django.warmup import warm_up
+
+
+def get_idle_connections() -> int:
+    return sum(pool.get_stats()['idle'] for pool in ConnectionPool.instances
+               if pool.name == get_pool_name(connection.get_connection_params()))
+
+
+@pytest.mark.django_db(transaction=True)  # Connections are opened in other threads
+def test_lifespan_warm_up():
+    clear_url_caches()
+    pooled = connection.settings_dict['ENGINE'] == 'utils.django.db.backends.postgresql'
+
+    async def arun():
+        client = ASGIClient(application)
+        await client.astartup()
+        assert get_resolver()._populated
+        assert get_idle_connections() >= pooled  # The connection opened by the warm-up is kept in the pool
+        assert (await client.request('GET', '/api/users/'))[0] == 200
+        await client.aclose()
+
+    asyncio.run(arun())
+    assert get_idle_connections() == 0  # Closed on shutdown
+    assert {step for step, in WARM_UP_DURATION._values} == {'urls', 'views', 'jwt', 'databases', 'total'}
+
+
+def fail():
+    raise ValueError('Step failed')
+
+
+def test_failed_warm_up_step(settings):
+    settings.WARM_UP = ['users.tests.test_warmup.fail', 'utils.django.warmup.warm_up_urls']
+    with mock.patch('utils.django.warmup.logger') as logger:
+        durations = warm_up()
+
+    assert list(durations) == ['fail', 'urls']  # Later steps still run
+    assert logger.warning.call_args.args == ('Warm-up step %s failed', 'users.tests.test_warmup.fail')
+    assert 'warmed up' in logger.info.call_args.args[0]
+
+
+def test_failed_startup():
+    async def astartup():
+        fail()
+
+    client = ASGIClient(LifespanMiddleware(application, on_startup=[astartup]))
+    with pytest.raises(RuntimeError, match='Step failed'):
+        asyncio.run(client.astartup())
@@ -1,7 +1,9 @@
 import random
 from typing import TypeVar, Type, Iterable
 
+from asgiref.sync import async_to_sync
 from django.db.models import QuerySet, Model
+from django.http import StreamingHttpResponse
 from rest_framework.fields import SkipField
 from rest_framework.relations import PKOnlyObject
 from rest_framework.serializers import Serializer
@@ -104,3 +106,22 @@ def get_payload(instance: Model, serializer_class: type(Serializer), fields: Ite
         data[field_name] = value
 
     return data
+
+
+def get_streaming_content(response: StreamingHttpResponse) -> bytes:
+    """ Consumes the whole content of a streaming response, both for synchronous and asynchronous iterators """
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    async def aconsume():
+        return b''.join([part async for part in response.streaming_content])
+
+    return async_to_sync(aconsume)()
+
+
+def get_async_data(serializer: Serializer):
+    """ Returns `await serializer.adata` of an asynchronous serializer, for usage in synchronous tests """
+    async def aget_data():
+        return await serializer.adata
+
+    return async_to_sync(aget_data)()
@@ -1,20 +1,26 @@
-from adrf.viewsets import ViewSet as AsyncViewSet
-from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework import permissions, status
+from rest_framework import permissions, serializers, status
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from users.filters import UserFilterSet, USER_SEARCH_FIELDS
+from users.filters import FullTextSearchFilter, UserFilterSet, USER_SEARCH_FIELDS
 from users.models import User
 from users.permissions import UserPermission
 from users.serializers import UserSerializer, UpdateUserSerializer, CreateUserSerializer
-from utils.rest_framework.viewsets.async_mixins import AsyncGetObjectMixin
+from utils.django.metrics import timed_phase
+from utils.rest_framework.filters import AsyncDjangoFilterBackend, AsyncOrderingFilter
+from utils.rest_framework.pagination import AsyncCursorPagination, pagination_class_factory
+from utils.rest_framework.renderers import NDJSONRenderer
+from utils.rest_framework.viewsets.async_mixins import AsyncStreamingMixin
+from utils.rest_framework.viewsets.cache import ResponseCacheMixin, cache_response
+from utils.rest_framework.viewsets.conditional import conditional_response
+from utils.rest_framework.viewsets.generic import AsyncModelViewSet
 from utils.rest_framework.viewsets.mixins import ActionBasedSerializerClassMixin
 
 
-# Since adrf package doesn't support async ModelViewSet, we'll have to define all methods explicitly
-class UserViewSet(ActionBasedSerializerClassMixin, AsyncGetObjectMixin, AsyncViewSet):
-    """ List (`GET`), create (`POST`), retrieve (`GET`), update (`PUT`, `PATCH`) and destroy (`DELETE`) actions. """
+class UserViewSet(ActionBasedSerializerClassMixin, AsyncStreamingMixin, ResponseCacheMixin, AsyncModelViewSet):
+    """ List (`GET`), create (`POST`), retrieve (`GET`), update (`PUT`, `PATCH`), destroy (`DELETE`),
+     export (`GET`) and bulk create (`POST`), update (`PATCH`), destroy (`DELETE`) actions. """
     queryset = User.objects.all()
     permission_classes = [UserPermission]  # Allowing any access since nothing is said about access restriction
 
@@ -23,48 +29,84 @@ class UserViewSet(ActionBasedSerializerClassMixin, AsyncGetObjectMixin, AsyncVie
     # We don't want users to be able to change some fields, so we use a different serializer for update
     update_serializer_class = UpdateUserSerializer
     partial_update_serializer_class = UpdateUserSerializer
+    bulk_create_serializer_class = CreateUserSerializer
+    bulk_update_serializer_class = UpdateUserSerializer
 
-    filter_backends = [OrderingFilter, DjangoFilterBackend, SearchFilter]
+    bulk_max_size = 1000  # Max number of items in a single bulk request
+
+    filter_backends = [AsyncOrderingFilter, AsyncDjangoFilterBackend, FullTextSearchFilter]
     filterset_class = UserFilterSet
     search_fields = USER_SEARCH_FIELDS
-    ordering_fields = ('id', 'username', 'first_name', 'last_name', 'email', 'last_login', 'date_joined')
+    search_vector_field = 'search_vector'
+    ordering_fields = ('id', 'username', 'first_name', 'last_name', 'email', 'date_joined')
     ordering = ('-id',)
 
-    async def list(self, request):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(await serializer.adata)
+    # Keyset pagination, so that deep pages cost the same as the first one
+    pagination_class = pagination_class_factory('UserPagination', page_size=100, page_size_query_param='page_size',
+                                                max_page_size=1000, base_class=AsyncCursorPagination)
+
+    # Responses are cached (see users.signals for invalidation) and support conditional requests
+    @cache_response
+    @conditional_response
+    async def list(self, request, *args, **kwargs):
+        return await super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, JSONRenderer])
+    async def export(self, request):
+        """ Streams all filtered users without pagination, as NDJSON (`application/x-ndjson`, default)
+         or as a JSON array (`application/json`) depending on the Accept header or `?format=` """
+        queryset = await self.afilter_queryset(self.get_queryset())
+        return self.get_streaming_response(queryset)
 
+    @cache_response
+    @conditional_response
     async def retrieve(self, request, *args, **kwargs):
-        instance = await self.aget_object()
-        serializer = self.get_serializer(instance)
-        return Response(await serializer.adata)
+        return await super().retrieve(request, *args, **kwargs)
 
-    async def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        await serializer.ais_valid(raise_exception=True)
-        await serializer.asave()
-        return Response(await serializer.adata, status=status.HTTP_201_CREATED)
+    # Support If-Match. The version is checked after validation, so that invalid requests don't change it.
+    # The new version is sent back (headers of the view are added to the response), for If-Match of the next update
+    async def aperform_update(self, serializer):
+        await self.acheck_precondition(self.request, serializer.instance)
+        await super().aperform_update(serializer)
+        self.headers.update(self.get_instance_conditional_headers(self.request, serializer.instance))
+
+    async def aperform_destroy(self, instance):
+        await self.acheck_precondition(self.request, instance)
+        await super().aperform_destroy(instance)
 
-    async def update(self, request, *args, **kwargs):
-        partial = kwargs.pop('partial', False)
-        instance = await self.aget_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
-        await serializer.ais_valid(raise_exception=True)
+    @action(detail=False, methods=['post'], url_path='bulk')
+    async def bulk_create(self, request):
+        """ Creates users from a list with a single insert. Errors are reported per item,
+         nothing is created if any item is invalid """
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.bulk_max_size)
+        with timed_phase('validation'):
+            await serializer.ais_valid(raise_exception=True)
         await serializer.asave()
+        with timed_phase('serialization'):
+            return Response(await serializer.adata, status=status.HTTP_201_CREATED)
 
-        if getattr(instance, '_prefetched_objects_cache', None):
-            # If 'prefetch_related' has been applied to a queryset, we need to
-            # forcibly invalidate the prefetch cache on the instance.
-            instance._prefetched_objects_cache = {}
+    @bulk_create.mapping.patch
+    async def bulk_update(self, request):
+        """ Partially updates users from a list of objects with `id` key, with a single update query """
+        serializer = self.get_serializer(self.get_queryset(), data=request.data, many=True, partial=True,
+                                         max_length=self.bulk_max_size)
+        with timed_phase('validation'):
+            await serializer.ais_valid(raise_exception=True)
+        await serializer.asave()
+        with timed_phase('serialization'):
+            return Response(await serializer.adata)
 
-        return Response(await serializer.adata)
+    @bulk_create.mapping.delete
+    async def bulk_destroy(self, request):
+        """ Deletes users from a list of ids. Nothing is deleted if any of users doesn't exist """
+        ids_field = serializers.ListField(child=serializers.IntegerField(), allow_empty=False,
+                                          max_length=self.bulk_max_size)
+        ids = set(ids_field.run_validation(request.data))
 
-    async def partial_update(self, request, *args, **kwargs):
-        kwargs['partial'] = True
-        return await self.update(request, *args, **kwargs)
+        queryset = self.get_queryset().filter(pk__in=ids)
+        missing_ids = ids - {pk async for pk in queryset.values_list('pk', flat=True)}
+        if missing_ids:
+            raise serializers.ValidationError({'not_found': sorted(missing_ids)})
 
-    async def destroy(self, request, *args, **kwargs):
-        instance = await self.aget_object()
-        await instance.adelete()
+        await queryset.adelete()
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,91 @@
+import functools
+import weakref
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgresDatabaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from utils.django.db.pool import close_idle_connections, get_pool
+
+
+def get_pool_name(conn_params: dict) -> str:
+    """ `host:port/dbname` of connection parameters, names the pool in logs and metrics """
+    address = conn_params.get('host', '') + (f':{conn_params["port"]}' if conn_params.get('port') else '')
+    return f'{address}/{conn_params.get("dbname") or conn_params.get("service", "")}'
+
+
+class DatabaseCreation(PostgresDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database from being dropped
+        close_idle_connections(get_pool_name({**self.connection.get_connection_params(), 'dbname': test_database_name}))
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+        PostgreSQL backend which takes connections from a process-wide bounded pool (see ConnectionPool) and returns
+        them there on .close(), instead of opening and closing a connection every time.
+
+        Under ASGI every request runs its synchronous code (including the asynchronous ORM) in a thread of its own,
+        so connections kept by CONN_MAX_AGE die with the thread, while pooled ones are reused by the next request.
+        Keep CONN_MAX_AGE at 0, so that connections are returned to the pool at the end of every request.
+        Pool options are set in POOL key of the database settings:
+
+            'POOL': {
+                'MAX_SIZE': 10,  # Max number of connections of the process
+                'TIMEOUT': 10,  # Seconds to wait for a free connection, when all of them are in use
+                'MAX_IDLE': 300,  # Idle connections are closed after this number of seconds
+                'MAX_LIFETIME': 3600,  # Connections are closed after this number of seconds
+            }
+
+        With CONN_HEALTH_CHECKS connections which were idle for a while are pinged before they are reused.
+    """
+    creation_class = DatabaseCreation
+
+    _pool = None
+    _pool_finalizer = None
+    _named_cursor_used = False
+
+    def get_pool(self, conn_params: dict):
+        options = self.settings_dict.get('POOL', {})
+        # OPTIONS are included, since some of them (e.g. isolation_level) are applied to connections, not passed
+        key = repr((sorted(conn_params.items()), sorted(self.settings_dict['OPTIONS'].items())))
+        return get_pool(
+            key,
+            get_pool_name(conn_params),
+            max_size=options.get('MAX_SIZE', 10),
+            timeout=options.get('TIMEOUT', 10),
+            max_idle=options.get('MAX_IDLE', 300),
+            max_lifetime=options.get('MAX_LIFETIME', 3600),
+            health_checks=self.settings_dict['CONN_HEALTH_CHECKS'],
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        connection = pool.acquire(functools.partial(super().get_new_connection, conn_params))
+        # Set the same way the parent does it, since a reused connection wasn't made by this wrapper
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        self._pool = pool
+        self._named_cursor_used = False
+        # Return the connection if the wrapper is garbage collected without being closed (e.g. with its thread)
+        self._pool_finalizer = weakref.finalize(self, pool.release, connection)
+        return connection
+
+    def create_cursor(self, name=None):
+        if name:
+            self._named_cursor_used = True
+        return super().create_cursor(name)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        self._pool_finalizer.detach()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps using the connection until the transaction is rolled back, so it can't be shared
+                self._pool.discard(self.connection)
+            else:
+                # Holdable server-side cursors of iterators which weren't exhausted outlive transactions
+                self._pool.release(self.connection, close_cursors=self._named_cursor_used)
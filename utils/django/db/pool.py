@@ -0,0 +1,213 @@
+import collections
+import logging
+import os
+import threading
+import time
+import weakref
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """ Raised when all connections of a pool are in use and none is released within the pool's timeout """
+
+
+class ConnectionPool:
+    """
+        A bounded, thread-safe pool of psycopg2 connections to one database. Connections are created on demand
+        (by the function passed to .acquire()) up to `max_size`, after that callers wait for a released connection
+        for up to `timeout` seconds and then get PoolTimeout.
+
+        Released connections are rolled back if they are in a transaction, and closed if they are broken,
+        older than `max_lifetime` or were idle for longer than `max_idle` seconds. With `health_checks`,
+        a connection which was idle for more than `health_check_after` seconds is pinged before it's handed out.
+
+        Connections are not shared with forked processes: a child process starts with an empty pool.
+    """
+    instances = weakref.WeakSet()  # For metrics
+
+    health_check_after = 1.0
+
+    def __init__(self, name: str, max_size: int = 10, timeout: float = 10.0, max_idle: float = 300.0,
+                 max_lifetime: float = 3600.0, health_checks: bool = True):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_checks = health_checks
+
+        self._condition = threading.Condition()
+        self._idle = collections.deque()  # (connection, created at, released at), the most recently released last
+        self._in_use = {}  # Connection -> created at
+        self._size = 0  # Open connections, including ones being created
+        self._pid = os.getpid()
+        self.timeouts = 0
+        self.instances.add(self)
+
+    def acquire(self, connect):
+        """ Returns an idle connection, or a new one made by `connect()` if the pool is not full yet """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection, idle_for = self._checkout(deadline)
+            if connection is None:
+                return self._create(connect)
+            if not (self.health_checks and idle_for > self.health_check_after) or self._ping(connection):
+                return connection
+            logger.info('Discarding a broken connection to %s', self.name)
+            self.discard(connection)
+
+    def release(self, connection, close_cursors: bool = False):
+        """ Returns the connection to the pool, `close_cursors` closes cursors left open (e.g. server-side ones) """
+        with self._condition:
+            created_at = self._in_use.get(connection) if self._pid == os.getpid() else None
+        if created_at is None:  # Acquired before a fork, or already released
+            return
+
+        reusable = time.monotonic() - created_at < self.max_lifetime and self._reset(connection)
+        if reusable and close_cursors:
+            reusable = self._execute(connection, 'CLOSE ALL')
+        if reusable:
+            with self._condition:
+                del self._in_use[connection]
+                self._idle.append((connection, created_at, time.monotonic()))
+                self._condition.notify()
+        else:
+            self.discard(connection)
+
+    def discard(self, connection):
+        """ Closes the acquired connection instead of returning it to the pool """
+        with self._condition:
+            if self._in_use.pop(connection, None) is None:
+                return
+            self._size -= 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def close_idle(self):
+        """ Closes all idle connections, e.g. so that the database can be dropped """
+        with self._condition:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._size -= len(idle)
+            self._condition.notify(len(idle))
+        for connection, _created_at, _released_at in idle:
+            connection.close()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'timeouts': self.timeouts,
+            }
+
+    def _checkout(self, deadline: float):
+        """ Takes an idle connection, or reserves a slot for a new one (returns None then) """
+        with self._condition:
+            if self._pid != os.getpid():
+                self._reset_after_fork()
+            while True:
+                now = time.monotonic()
+                expired = self._pop_expired(now)
+                if self._idle:
+                    connection, created_at, released_at = self._idle.pop()
+                    self._in_use[connection] = created_at
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection = released_at = None
+                    break
+                if now >= deadline:
+                    self.timeouts += 1
+                    raise PoolTimeout(f'No connection to {self.name} was released in {self.timeout} s, '
+                                      f'all {self.max_size} connections are in use')
+                self._condition.wait(deadline - now)
+
+        for expired_connection in expired:
+            expired_connection.close()
+        return connection, (now - released_at if connection is not None else 0.0)
+
+    def _pop_expired(self, now: float) -> list:
+        # The oldest connections are in the beginning, so only they may have been idle for too long
+        expired = []
+        while self._idle and (now - self._idle[0][2] > self.max_idle or now - self._idle[0][1] > self.max_lifetime):
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        return expired
+
+    def _create(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._in_use[connection] = time.monotonic()
+        return connection
+
+    def _reset_after_fork(self):
+        # Sockets are shared with the parent process, so connections are forgotten rather than closed,
+        # closing them would terminate the parent's sessions
+        self._idle.clear()
+        self._in_use.clear()
+        self._size = 0
+        self._pid = os.getpid()
+
+    @staticmethod
+    def _reset(connection) -> bool:
+        """ Makes the connection ready for the next user, returns False if it can't be reused """
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+            return True
+        return False  # A query is still running, or the connection is broken
+
+    @staticmethod
+    def _execute(connection, sql: str) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _ping(self, connection) -> bool:
+        return self._execute(connection, 'SELECT 1')
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: str, name: str, **options) -> ConnectionPool:
+    """ Returns the pool of connections with parameters `key`, shared by all threads (and database aliases) """
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(name, **options)
+    return pool
+
+
+def close_idle_connections(name: str = None):
+    """ Closes idle connections of all pools (or pools named `name`) """
+    for pool in list(_pools.values()):
+        if name is None or pool.name == name:
+            pool.close_idle()
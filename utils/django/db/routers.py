@@ -0,0 +1,108 @@
+import contextlib
+import contextvars
+import itertools
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# Routing of the current request, set by ReplicaRoutingMiddleware. Context variables are copied into threads
+# by sync_to_async, so the asynchronous ORM is routed as well
+_routing = contextvars.ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('use_replicas', 'replica', 'written')
+
+    def __init__(self, use_replicas: bool):
+        self.use_replicas = use_replicas
+        self.replica = None  # Picked on the first read, so that all reads of a request see the same data
+        self.written = False
+
+
+@contextlib.contextmanager
+def route_reads(use_replicas: bool = True):
+    """ Sends reads inside the block to replicas (if `use_replicas`), yields the state to check if it wrote """
+    state = RoutingState(use_replicas)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def reads_from_replica() -> bool:
+    """ Whether the current request read something from a replica, which may lag behind the primary """
+    state = _routing.get()
+    return state is not None and state.replica not in (None, DEFAULT_DB_ALIAS)
+
+
+class ReplicaRouter:
+    """
+        Sends reads inside route_reads() blocks (see ReplicaRoutingMiddleware) to one of DATABASE_REPLICAS, and
+        everything else to the primary (`default` database). Once something is written in the block, the rest of
+        its reads go to the primary as well, so that they see the write.
+
+        Replicas are picked in turn. A replica which can't be connected to is skipped for
+        DATABASE_REPLICA_RETRY_AFTER seconds, if all replicas are down reads go to the primary.
+
+        Only connecting is checked, and only when the router is called from synchronous code: a replica failing in
+        the middle of a request (or picked in the event loop, where the check is skipped) raises OperationalError
+        from the query, and reads aren't retried on the primary. Django turns such errors into 500 responses before
+        they reach ReplicaRoutingMiddleware, so it can't retry the request either. Clients should retry safe
+        requests that fail.
+    """
+    def __init__(self):
+        self._counter = itertools.count()
+        self._down_until = {}  # Alias -> time.monotonic() when the replica may be tried again
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.use_replicas or state.written:
+            return None
+        if state.replica is None:
+            state.replica = self.pick_replica() or DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas have the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+    def pick_replica(self) -> str | None:
+        replicas = settings.DATABASE_REPLICAS
+        start = next(self._counter)
+        for index in range(len(replicas)):
+            alias = replicas[(start + index) % len(replicas)]
+            if self.is_available(alias):
+                return alias
+        return None
+
+    def is_available(self, alias: str) -> bool:
+        now = time.monotonic()
+        if self._down_until.get(alias, 0) > now:
+            return False
+
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+        except SynchronousOnlyOperation:  # Called in the event loop, the connection will be checked by the query
+            return True
+        except OperationalError:
+            logger.warning('Replica %s is unavailable, reading from the primary', alias, exc_info=True)
+            self._down_until[alias] = now + settings.DATABASE_REPLICA_RETRY_AFTER
+            return False
+        return True
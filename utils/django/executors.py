@@ -0,0 +1,141 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturated(Exception):
+    """ Raised when a bounded executor has no free workers and its queue is full """
+
+
+class BoundedExecutor:
+    """
+        A thread pool with a bounded queue, for running CPU-heavy functions (which release the GIL) out of the event
+        loop. Unlike `loop.run_in_executor(None, ...)` the number of waiting tasks is limited: when all workers are
+        busy and `max_queue_size` tasks are already waiting, .arun() raises ExecutorSaturated immediately instead of
+        letting latency of every request grow. It's up to the caller to turn it into a 503 response.
+    """
+    instances = weakref.WeakSet()  # For metrics
+
+    def __init__(self, name: str, max_workers: int, max_queue_size: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # Submitted, but not completed tasks (both running and waiting)
+        self._completed = 0
+        self._rejected = 0
+        self.instances.add(self)
+
+    async def arun(self, func, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue_size:
+                self._rejected += 1
+                logger.warning('Executor %s is saturated, %s tasks are pending', self.name, self._pending)
+                raise ExecutorSaturated(f'Executor {self.name} is saturated')
+            self._pending += 1
+
+        # The task may outlive the awaiting coroutine (e.g. if it's cancelled), so count it done in a callback
+        future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    @property
+    def queue_depth(self) -> int:
+        """ The number of tasks waiting for a free worker """
+        return max(self._pending - self.max_workers, 0)
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue_size': self.max_queue_size,
+                'running': min(self._pending, self.max_workers),
+                'queue_depth': self.queue_depth,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+        ThreadPoolExecutor which counts running and waiting tasks for metrics. instrument_default_executor() makes it
+        the default executor of the event loop, which runs `loop.run_in_executor(None, ...)` and
+        `sync_to_async(thread_sensitive=False)` calls.
+    """
+    instances = weakref.WeakSet()  # For metrics
+
+    def __init__(self, name: str, max_workers: int = None):
+        self.name = name
+        # The same default as of ThreadPoolExecutor
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        super().__init__(max_workers=self.max_workers, thread_name_prefix=name)
+
+        self._stats_lock = threading.Lock()
+        self._pending = 0  # Submitted, but not completed tasks (both running and waiting)
+        self._running = 0
+        self._completed = 0
+        self.instances.add(self)
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._stats_lock:
+            self._pending += 1
+        try:
+            future = super().submit(self._run, fn, *args, **kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _run(self, fn, *args, **kwargs):
+        with self._stats_lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._stats_lock:
+                self._running -= 1
+
+    def _on_done(self, future):
+        with self._stats_lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def get_stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            return {
+                'max_workers': self.max_workers,
+                'running': self._running,
+                'queue_depth': max(self._pending - self._running, 0),
+                'completed': self._completed,
+            }
+
+
+_instrumented_loops = weakref.WeakSet()
+
+
+def instrument_default_executor():
+    """ Replaces the default executor of the running event loop with InstrumentedThreadPoolExecutor, once per loop """
+    loop = asyncio.get_running_loop()
+    if loop in _instrumented_loops:
+        return
+    _instrumented_loops.add(loop)
+
+    previous = getattr(loop, '_default_executor', None)  # asyncio has no public getter
+    loop.set_default_executor(InstrumentedThreadPoolExecutor('default'))
+    if previous is not None:
+        previous.shutdown(wait=False)  # Tasks submitted to it still run
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+from utils.django.executors import BoundedExecutor
+
+_hashing_executor = None
+
+
+def get_hashing_executor() -> BoundedExecutor:
+    """
+        Returns a process-wide executor for password hashing. PBKDF2 (and other built-in hashers) release the GIL,
+        so threads hash passwords in parallel and don't block the event loop.
+        Configured with PASSWORD_HASHING_MAX_WORKERS and PASSWORD_HASHING_MAX_QUEUE_SIZE settings.
+    """
+    global _hashing_executor
+    if _hashing_executor is None:
+        _hashing_executor = BoundedExecutor('password-hashing', settings.PASSWORD_HASHING_MAX_WORKERS,
+                                            settings.PASSWORD_HASHING_MAX_QUEUE_SIZE)
+    return _hashing_executor
+
+
+async def amake_password(password, salt=None, hasher='default'):
+    """ Asynchronous version of make_password() which hashes the password in the hashing executor """
+    return await get_hashing_executor().arun(make_password, password, salt, hasher)
+
+
+async def acheck_password(password, encoded, asetter=None, preferred='default'):
+    """
+        Asynchronous version of check_password() which checks the password in the hashing executor.
+        Unlike check_password() it accepts an asynchronous setter, which is awaited in the event loop (so that it may
+        access DB) if the password is correct, but its hash must be updated.
+    """
+    is_correct = await get_hashing_executor().arun(check_password, password, encoded, None, preferred)
+
+    if is_correct and asetter is not None:
+        preferred_hasher = get_hasher(preferred)
+        if identify_hasher(encoded).algorithm != preferred_hasher.algorithm or preferred_hasher.must_update(encoded):
+            await asetter(password)
+
+    return is_correct
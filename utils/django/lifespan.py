@@ -0,0 +1,42 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LifespanMiddleware:
+    """
+        Handles ASGI lifespan protocol, which Django's ASGIHandler doesn't support, and passes other scopes to
+        the application. Servers (uvicorn, gunicorn's UvicornWorker) wait for the startup to complete before accepting
+        connections, so `on_startup` coroutine functions run before the worker serves any request. If one of them
+        fails, the server doesn't start.
+    """
+    def __init__(self, application, on_startup: list = (), on_shutdown: list = ()):
+        self.application = application
+        self.on_startup = list(on_startup)
+        self.on_shutdown = list(on_shutdown)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await self.application(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    for callback in self.on_startup:
+                        await callback()
+                except Exception as e:
+                    logger.exception('Startup failed')
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    for callback in self.on_shutdown:
+                        await callback()
+                except Exception as e:
+                    logger.exception('Shutdown failed')
+                    await send({'type': 'lifespan.shutdown.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
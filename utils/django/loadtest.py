@@ -0,0 +1,172 @@
+import asyncio
+import contextlib
+import json
+import statistics
+import threading
+import time
+
+import h11
+import uvicorn
+
+
+class ASGIClient:
+    """ Calls an ASGI application in the running event loop, without a server """
+    def __init__(self, application, host: str = 'localhost'):
+        self.application = application
+        self.host = host
+        self._lifespan = None
+
+    async def astartup(self):
+        """ Runs lifespan startup of the application, as servers do before accepting connections """
+        messages, events = asyncio.Queue(), asyncio.Queue()
+        await messages.put({'type': 'lifespan.startup'})
+        task = asyncio.create_task(self.application({'type': 'lifespan', 'asgi': {'version': '3.0'}},
+                                                    messages.get, events.put))
+        event = asyncio.create_task(events.get())
+        await asyncio.wait([task, event], return_when=asyncio.FIRST_COMPLETED)
+        if not event.done():  # The application doesn't support lifespan
+            event.cancel()
+            await task
+            raise RuntimeError('Lifespan protocol is not supported')
+        if event.result()['type'] != 'lifespan.startup.complete':
+            raise RuntimeError(f'Startup failed: {event.result().get("message")}')
+        self._lifespan = task, messages, events
+
+    async def request(self, method: str, path: str, query_string: str = '', data=None,
+                      headers: dict = None) -> tuple[int, bytes]:
+        """ Returns the status and the body of the response, `data` is sent as JSON """
+        body = json.dumps(data).encode() if data is not None else b''
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query_string.encode(), 'root_path': '',
+            'headers': [(name.lower().encode(), value.encode())
+                        for name, value in get_headers(self.host, body, headers).items()],
+            'client': ('127.0.0.1', 50000), 'server': (self.host, 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        disconnected = asyncio.Event()
+        status = None
+        chunks = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.application(scope, receive, send)
+        disconnected.set()
+        return status, b''.join(chunks)
+
+    async def aclose(self):
+        """ Runs lifespan shutdown, if the startup was run """
+        if self._lifespan is not None:
+            task, messages, events = self._lifespan
+            self._lifespan = None
+            await messages.put({'type': 'lifespan.shutdown'})
+            await events.get()
+            await task
+
+
+class HTTPClient:
+    """ HTTP/1.1 client with a single keep-alive connection, so use one client per concurrent worker """
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader = self._writer = self._connection = None
+
+    async def request(self, method: str, path: str, query_string: str = '', data=None,
+                      headers: dict = None) -> tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._connection = h11.Connection(h11.CLIENT)
+
+        body = json.dumps(data).encode() if data is not None else b''
+        target = f'{path}?{query_string}' if query_string else path
+        headers = get_headers(f'{self.host}:{self.port}', body, headers)
+        connection = self._connection
+        self._writer.write(b''.join([
+            connection.send(h11.Request(method=method, target=target, headers=list(headers.items()))),
+            connection.send(h11.Data(data=body)) if body else b'',
+            connection.send(h11.EndOfMessage()),
+        ]))
+        await self._writer.drain()
+
+        status = None
+        chunks = []
+        while True:
+            event = connection.next_event()
+            if event is h11.NEED_DATA:
+                connection.receive_data(await self._reader.read(65536))
+            elif isinstance(event, h11.Response):
+                status = event.status_code
+            elif isinstance(event, h11.Data):
+                chunks.append(bytes(event.data))
+            elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                break
+
+        if connection.our_state is h11.DONE and connection.their_state is h11.DONE:
+            connection.start_next_cycle()
+        else:  # The server closes the connection
+            await self.aclose()
+        return status, b''.join(chunks)
+
+    async def aclose(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = self._connection = None
+
+
+def get_headers(host: str, body: bytes, headers: dict = None) -> dict[str, str]:
+    return {
+        'Host': host,
+        'Accept': 'application/json',
+        **({'Content-Type': 'application/json', 'Content-Length': str(len(body))} if body else {}),
+        **(headers or {}),
+    }
+
+
+@contextlib.contextmanager
+def run_uvicorn(application, host: str = '127.0.0.1', timeout: float = 10):
+    """ Serves the application with uvicorn in a background thread, yields the (host, port) it listens on """
+    server = uvicorn.Server(uvicorn.Config(application, host=host, port=0, lifespan='off', log_level='warning'))
+    server.install_signal_handlers = lambda: None  # Only the main thread can handle signals
+    thread = threading.Thread(target=server.run, name='uvicorn', daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + timeout
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError('uvicorn failed to start')
+        time.sleep(0.01)
+    try:
+        yield host, server.servers[0].sockets[0].getsockname()[1]
+    finally:
+        server.should_exit = True
+        thread.join(timeout)
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """ Latency percentiles (in milliseconds) and throughput of requests which took `elapsed` seconds in total """
+    if not latencies:
+        return {'requests': 0, 'rps': 0.0}
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    else:
+        percentiles = latencies * 99
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1e3, 3),
+        'p50_ms': round(percentiles[49] * 1e3, 3),
+        'p95_ms': round(percentiles[94] * 1e3, 3),
+        'p99_ms': round(percentiles[98] * 1e3, 3),
+        'max_ms': round(max(latencies) * 1e3, 3),
+    }
@@ -0,0 +1,126 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import weakref
+
+# Attributes every LogRecord has, anything else was passed with `extra`
+RECORD_ATTRIBUTES = {*logging.makeLogRecord({}).__dict__, 'message', 'asctime', 'taskName'}
+
+
+class QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for a free slot, since the queue may be full, while the listener is still working on it
+        self.queue.put(self._sentinel)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+        Puts records into a bounded in-memory queue, a background thread (QueueListener) passes them to `handlers`
+        (names of configured handlers), so that formatting and disk writes never happen in the request path.
+        Use it as the only handler of loggers and make other handlers its targets:
+
+            'queue': {
+                'class': 'utils.django.log.QueueHandler',
+                'handlers': ['file_error', 'file_debug'],
+            }
+
+        Unlike the standard QueueHandler, records are not formatted before they are queued (only the message
+        is merged with its arguments), and if the queue is full, records are dropped instead of blocking the caller.
+        Dropped records are counted in `dropped` (see `log_records_dropped_total` metric). Records left in the
+        queue are written at exit.
+    """
+    instances = weakref.WeakSet()  # For metrics
+
+    def __init__(self, handlers: list, queue_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.handlers = handlers
+        self.dropped = 0  # Incremented under _dropped_lock, since records are logged from many threads
+        self.listener = None
+        self._listener_pid = None
+        self._lock = threading.Lock()
+        self._dropped_lock = threading.Lock()
+        self.instances.add(self)
+        atexit.register(self.stop)
+
+    def get_target_handlers(self) -> list[logging.Handler]:
+        # Targets are resolved lazily, since the dictConfig may configure them after this handler
+        get_handler = getattr(logging, 'getHandlerByName', logging._handlers.get)  # Python 3.12+ has the public one
+        return [get_handler(handler) if isinstance(handler, str) else handler for handler in self.handlers]
+
+    def start(self):
+        """ Starts the listener, or restarts it in a forked process, since threads don't survive fork() """
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                self.listener = QueueListener(self.queue, *self.get_target_handlers(), respect_handler_level=True)
+                self.listener.start()
+                self._listener_pid = os.getpid()
+
+    def stop(self):
+        """ Writes queued records and stops the listener """
+        with self._lock:
+            if self.listener is not None and self._listener_pid == os.getpid():
+                self.listener.stop()
+            self.listener = self._listener_pid = None
+
+    def prepare(self, record):
+        # Merge the message and its arguments now, since arguments may change after the call.
+        # Exceptions are formatted in the listener thread
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._listener_pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """
+        Lets through only `rate` (from 0 to 1) of records of `name` logger (and its children) with `level` or lower,
+        e.g. every SQL query logged by `django.db.backends` at DEBUG level. Other records always pass.
+    """
+    def __init__(self, name: str = '', level: int | str = logging.DEBUG, rate: float = 0.1):
+        super().__init__(name)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > self.level or not super().filter(record):
+            return True
+        return random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    """
+        Formats records as JSON objects, one per line: time, level, logger name, message, exception and
+        every `extra` attribute (e.g. `duration` and `sql` of `django.db.backends` records). Values which aren't
+        JSON serializable are converted with str().
+    """
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES and key not in data:
+                data[key] = value
+        return json.dumps(data, default=str, ensure_ascii=False)
@@ -0,0 +1,280 @@
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import logging
+import math
+import threading
+import time
+import weakref
+
+from asgiref.sync import SyncToAsync
+
+from utils.django.db.pool import ConnectionPool
+from utils.django.executors import BoundedExecutor, InstrumentedThreadPoolExecutor
+from utils.django.log import QueueHandler
+
+logger = logging.getLogger(__name__)
+
+# Default buckets (in seconds) of latency histograms, from 0.5 ms to 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    labels = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return f'{{{",".join(labels)}}}' if labels else ''
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """ A metric with a fixed set of label names. Values of every label combination are kept in memory """
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: 'Registry' = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def collect(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:  # Histograms' counts are mutated in place, so copy them
+            values = [(labelvalues, value.copy() if isinstance(value, list) else value)
+                      for labelvalues, value in self._values.items()]
+        for labelvalues, value in sorted(values):
+            lines.extend(self.format_samples(labelvalues, value))
+        return lines
+
+    def format_samples(self, labelvalues: tuple, value) -> list[str]:
+        return [f'{self.name}{format_labels(self.labelnames, labelvalues)} {format_value(value)}']
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def set(self, *labelvalues, value: float):
+        """ For collectors which mirror a counter maintained elsewhere """
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, *labelvalues, value: float):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(Metric):
+    """ Cumulative histogram. Observing a value costs a binary search and a lock """
+    type = 'histogram'
+
+    def __init__(self, *args, buckets: tuple = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labelvalues, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                # Counts of every bucket and +Inf, then the sum
+                counts = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def format_samples(self, labelvalues: tuple, counts: list) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            labels = format_labels(self.labelnames, labelvalues, f'le="{format_value(float(bound))}"')
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = format_labels(self.labelnames, labelvalues)
+        lines.append(f'{self.name}_sum{labels} {format_value(counts[-1])}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """
+        Metrics of the current process, rendered in Prometheus text exposition format. Collectors are functions
+        called on every render, which update metrics whose values are only known at that moment (e.g. gauges).
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: Metric):
+        self._metrics.append(metric)
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:  # A broken collector must not break the whole endpoint
+                logger.exception('Metrics collector %s failed', collector.__name__)
+        return '\n'.join(line for metric in self._metrics for line in metric.collect()) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent processing a request, until the response is returned',
+    ('view', 'action', 'method', 'status'),
+)
+REQUEST_PHASE_DURATION = Histogram(
+    'http_request_phase_duration_seconds', 'Time spent in a request phase. DB time overlaps other phases',
+    ('view', 'action', 'phase'),
+)
+REQUEST_QUERIES = Counter('http_request_db_queries_total', 'Number of SQL queries made by requests',
+                          ('view', 'action'))
+EVENT_LOOP_LAG = Histogram('event_loop_lag_seconds', 'Delay of event loop callbacks, measured periodically')
+EXECUTOR_WORKERS = Gauge('executor_workers', 'Number of workers of executors (for sync_to_async: request threads)',
+                         ('executor', 'state'))
+EXECUTOR_QUEUE = Gauge('executor_queue', 'Number of tasks waiting for a worker and max size of the queue',
+                       ('executor', 'state'))
+EXECUTOR_TASKS = Counter('executor_tasks_total', 'Completed and rejected (due to saturation) tasks',
+                         ('executor', 'result'))
+
+
+@REGISTRY.register_collector
+def collect_executor_stats():
+    for executor in list(BoundedExecutor.instances):
+        stats = executor.get_stats()
+        EXECUTOR_WORKERS.set(executor.name, 'running', value=stats['running'])
+        EXECUTOR_WORKERS.set(executor.name, 'max', value=stats['max_workers'])
+        EXECUTOR_QUEUE.set(executor.name, 'waiting', value=stats['queue_depth'])
+        EXECUTOR_QUEUE.set(executor.name, 'max', value=stats['max_queue_size'])
+        EXECUTOR_TASKS.set(executor.name, 'completed', value=stats['completed'])
+        EXECUTOR_TASKS.set(executor.name, 'rejected', value=stats['rejected'])
+
+    for executor in list(InstrumentedThreadPoolExecutor.instances):
+        stats = executor.get_stats()
+        EXECUTOR_WORKERS.set(executor.name, 'running', value=stats['running'])
+        EXECUTOR_WORKERS.set(executor.name, 'max', value=stats['max_workers'])
+        EXECUTOR_QUEUE.set(executor.name, 'waiting', value=stats['queue_depth'])
+        EXECUTOR_TASKS.set(executor.name, 'completed', value=stats['completed'])
+
+    # Under ASGI every request runs its synchronous code (sync_to_async calls) in a thread of its own, created
+    # for the request by asgiref. Calls of a request wait for its thread (in the queue of ThreadPoolExecutor, which
+    # isn't public), if it's busy with another one. Neither attribute is public, so they're skipped if missing
+    executors_by_context = getattr(SyncToAsync, 'context_to_thread_executor', None)
+    if executors_by_context is None:
+        return
+    request_executors = list(executors_by_context.values())
+    EXECUTOR_WORKERS.set('sync_to_async', 'active', value=len(request_executors))
+    queues = [getattr(executor, '_work_queue', None) for executor in request_executors]
+    if None not in queues:
+        EXECUTOR_QUEUE.set('sync_to_async', 'waiting', value=sum(queue.qsize() for queue in queues))
+
+
+LOG_RECORDS_DROPPED = Counter('log_records_dropped_total', 'Log records dropped since the logging queue was full',
+                              ('handler',))
+
+
+@REGISTRY.register_collector
+def collect_logging_stats():
+    for handler in list(QueueHandler.instances):
+        LOG_RECORDS_DROPPED.set(handler.name or 'queue', value=handler.dropped)
+
+
+DB_POOL_CONNECTIONS = Gauge('db_pool_connections', 'Number of connections of database pools',
+                            ('database', 'state'))
+DB_POOL_TIMEOUTS = Counter('db_pool_timeouts_total', 'Connection requests which timed out since the pool was full',
+                           ('database',))
+
+
+@REGISTRY.register_collector
+def collect_db_pool_stats():
+    for pool in list(ConnectionPool.instances):
+        stats = pool.get_stats()
+        DB_POOL_CONNECTIONS.set(pool.name, 'idle', value=stats['idle'])
+        DB_POOL_CONNECTIONS.set(pool.name, 'in_use', value=stats['in_use'])
+        DB_POOL_CONNECTIONS.set(pool.name, 'max', value=stats['max_size'])
+        DB_POOL_TIMEOUTS.set(pool.name, value=stats['timeouts'])
+
+
+WARM_UP_DURATION = Gauge('worker_warm_up_seconds', 'Duration of warm-up steps of the worker (see WARM_UP setting)',
+                         ('step',))
+
+
+# Durations of phases of the current request, set by MetricsMiddleware
+_request_phases = contextvars.ContextVar('request_phases', default=None)
+
+
+@contextlib.contextmanager
+def track_phases():
+    """ Accumulates durations of timed_phase() blocks inside the block into the yielded dict """
+    phases = {}
+    token = _request_phases.set(phases)
+    try:
+        yield phases
+    finally:
+        _request_phases.reset(token)
+
+
+class timed_phase:  # noqa: N801, used as a function
+    """
+        Adds the duration of the block to the phase of the current request (a no-op outside of requests).
+        A class rather than a generator based context manager, since it's used several times per request
+    """
+    __slots__ = ('name', 'phases', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.phases = _request_phases.get()
+        if self.phases is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.phases is not None:
+            self.phases[self.name] = self.phases.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class EventLoopLagMonitor:
+    """
+        Sleeps for `interval` seconds in a loop and records how late the event loop wakes it up. Lag grows when
+        the loop is blocked by synchronous code or overloaded with callbacks.
+    """
+    interval = 0.5
+
+    _loops = weakref.WeakKeyDictionary()  # Monitoring tasks of event loops
+
+    @classmethod
+    def ensure_started(cls):
+        """ Starts monitoring of the running event loop, if it's not monitored yet """
+        loop = asyncio.get_running_loop()
+        if loop not in cls._loops:
+            cls._loops[loop] = loop.create_task(cls().arun())
+
+    async def arun(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(value=max(loop.time() - start - self.interval, 0.0))
@@ -0,0 +1,226 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from utils.django import metrics
+from utils.django.db.routers import route_reads
+from utils.django.executors import instrument_default_executor
+from utils.django.metrics import EventLoopLagMonitor, track_phases
+from utils.django.queries import QueryStats, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCountMiddleware:
+    """
+        Records number of SQL queries, their total duration and duplicated queries (the same SQL executed more than
+        once, usually N+1 problem) of every request. Stats are logged (with WARNING level if there are duplicates)
+        and, if QUERY_COUNT_SERVER_TIMING setting is on, sent in `Server-Timing` header, which browsers' devtools
+        show along with the request timings.
+
+        Put it right after MetricsMiddleware (which makes no queries), so that queries of other middleware are
+        counted as well. Queries made while a streaming response is consumed are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+            response = self.get_response(request)
+        self.process_stats(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with track_queries() as stats:
+            response = await self.get_response(request)
+        self.process_stats(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def process_stats(self, request, response, stats: QueryStats, duration: float):
+        duplicates = stats.duplicates
+        if settings.QUERY_COUNT_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join(filter(None, [
+                response.get('Server-Timing'),
+                f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries, {len(duplicates)} duplicated"',
+                f'total;dur={duration * 1000:.2f}',
+            ]))
+
+        logger.log(
+            logging.WARNING if duplicates else logging.INFO,
+            '%s %s %s: %d queries, %d duplicated, DB time %.2f ms, total time %.2f ms',
+            request.method, request.path, response.status_code, stats.count, len(duplicates),
+            stats.duration * 1000, duration * 1000,
+            extra={'query_stats': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'query_count': stats.count,
+                'db_time_ms': round(stats.duration * 1000, 3),
+                'duration_ms': round(duration * 1000, 3),
+                'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates.items()],
+            }},
+        )
+
+
+class MetricsMiddleware:
+    """
+        Records latency of every request, durations of its phases (see timed_phase()) and DB time into histograms
+        of utils.django.metrics, labeled with the url name (e.g. `user-list`) and the action (or the method for views
+        other than viewsets). In asynchronous mode it also starts EventLoopLagMonitor for the running event loop
+        and replaces its default executor with an instrumented one (see instrument_default_executor()).
+        Put it first, so that other middleware is included into the latency.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        with track_phases() as phases, track_queries() as stats:
+            response = self.get_response(request)
+        self.record(request, response, phases, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        EventLoopLagMonitor.ensure_started()
+        instrument_default_executor()
+
+        start = time.perf_counter()
+        with track_phases() as phases, track_queries() as stats:
+            response = await self.get_response(request)
+        self.record(request, response, phases, stats, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def get_labels(request) -> tuple[str, str]:
+        method = request.method.lower()
+        resolver_match = request.resolver_match
+        if resolver_match is None:
+            return 'unmatched', method
+
+        # Viewsets' views know their actions, `head` is handled by `get` action unless mapped explicitly
+        actions = getattr(resolver_match.func, 'actions', None) or {}
+        action = actions.get(method) or (method == 'head' and actions.get('get')) or method
+        # Unlike routes, url names are readable for regex patterns too (routers use them)
+        return resolver_match.view_name or resolver_match.route, action
+
+    def record(self, request, response, phases: dict, stats: QueryStats, duration: float):
+        view, action = self.get_labels(request)
+        metrics.REQUEST_DURATION.observe(view, action, request.method, response.status_code, value=duration)
+        for phase, phase_duration in phases.items():
+            metrics.REQUEST_PHASE_DURATION.observe(view, action, phase, value=phase_duration)
+        if stats.count:
+            metrics.REQUEST_PHASE_DURATION.observe(view, action, 'db', value=stats.duration)
+            metrics.REQUEST_QUERIES.inc(view, action, amount=stats.count)
+
+
+class ReplicaRoutingMiddleware:
+    """
+        Sends reads of safe requests (GET, HEAD, OPTIONS) to database replicas and everything else to the primary
+        (see ReplicaRouter). Replicas may lag behind, so after a request which wrote something reads of the client
+        stay on the primary for DATABASE_REPLICA_PIN_SECONDS, and the client reads its own writes. Authenticated
+        users are pinned in the cache by their id (so all their clients are), others by a cookie.
+        Does nothing if DATABASE_REPLICAS is empty.
+    """
+    sync_capable = True
+    async_capable = True
+
+    cookie_name = 'db_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        use_replicas = self.use_replicas(request)
+        token_pin_key = self.get_token_pin_key(request) if use_replicas else None
+        if token_pin_key:
+            use_replicas = not cache.get(token_pin_key)
+        with route_reads(use_replicas) as state:
+            response = self.get_response(request)
+        if state.written:
+            self.pin_to_primary(response)
+            if user_pin_key := self.get_user_pin_key(request):
+                cache.set(user_pin_key, True, settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        use_replicas = self.use_replicas(request)
+        token_pin_key = self.get_token_pin_key(request) if use_replicas else None
+        if token_pin_key:
+            use_replicas = not await cache.aget(token_pin_key)
+        with route_reads(use_replicas) as state:
+            response = await self.get_response(request)
+        if state.written:
+            self.pin_to_primary(response)
+            if user_pin_key := self.get_user_pin_key(request):
+                await cache.aset(user_pin_key, True, settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
+
+    def use_replicas(self, request) -> bool:
+        return request.method in SAFE_METHODS and self.cookie_name not in request.COOKIES
+
+    def pin_to_primary(self, response):
+        """ Pins anonymous clients, the cookie is set for authenticated ones too, in case the cache is lost """
+        response.set_cookie(self.cookie_name, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                            httponly=True, samesite='Lax')
+
+    @staticmethod
+    def get_pin_key(user_id) -> str:
+        return f'db-primary:{user_id}'
+
+    def get_token_pin_key(self, request) -> str | None:
+        """
+            Pin key of the user of the request's JWT. The view authenticates the request later, so the token isn't
+            verified here: a forged one can only send reads of the request to the primary.
+        """
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        try:
+            raw_token = authentication.get_raw_token(header) if header else None
+            user_id = UntypedToken(raw_token, verify=False).get(jwt_settings.USER_ID_CLAIM) if raw_token else None
+        except (AuthenticationFailed, TokenError):
+            return None
+        return self.get_pin_key(user_id) if user_id is not None else None
+
+    def get_user_pin_key(self, request) -> str | None:
+        """ Pin key of the user authenticated by the view (DRF sets the user of the Django request as well) """
+        user = getattr(request, 'user', None)
+        return self.get_pin_key(user.pk) if user is not None and user.is_authenticated else None
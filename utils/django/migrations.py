@@ -0,0 +1,44 @@
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+class AddExtensionIndex(migrations.AddIndex):
+    """
+        AddIndex for indexes which need a PostgreSQL extension (e.g. `gin_trgm_ops` from pg_trgm).
+        The extension is created if it's available on the server, otherwise the index is skipped with a warning,
+        so that migrations still run on servers without contrib extensions. Queries keep working without the index,
+        they just get slower.
+    """
+    def __init__(self, model_name, index, extension: str):
+        super().__init__(model_name, index)
+        self.extension = extension
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        kwargs['extension'] = self.extension
+        return name, args, kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not self.create_extension(schema_editor):
+            logger.warning('Extension %s is not available, index %s is not created', self.extension, self.index.name)
+            return
+
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def create_extension(self, schema_editor) -> bool:
+        if schema_editor.connection.vendor != 'postgresql':
+            return False
+
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_available_extensions WHERE name = %s', [self.extension])
+            if cursor.fetchone() is None:
+                return False
+
+        schema_editor.execute(f'CREATE EXTENSION IF NOT EXISTS {schema_editor.quote_name(self.extension)}')
+        return True
+
+    def describe(self):
+        return f'{super().describe()} (requires {self.extension} extension)'
@@ -0,0 +1,74 @@
+import contextlib
+import contextvars
+import re
+import time
+from collections import Counter
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Stats of all tracking blocks the current code runs in. Context variables are copied into threads by
+# sync_to_async, so queries of the asynchronous ORM are recorded as well
+_active_stats = contextvars.ContextVar('query_stats', default=())
+
+# Lists of placeholders, e.g. in `IN (%s, %s, %s)` or in VALUES of a bulk insert
+PLACEHOLDERS_RE = re.compile(r'%s(?:, %s)+')
+
+
+class QueryStats:
+    """ Number of queries, their total duration (in seconds) and number of executions per fingerprint """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, fingerprint: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint] += 1
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        """ Queries executed more than once (with any parameters), which is usually a sign of N+1 problem """
+        return {fingerprint: count for fingerprint, count in self.fingerprints.most_common() if count > 1}
+
+
+def get_fingerprint(sql: str) -> str:
+    """ SQL without parameters, so that the same query with different parameters has the same fingerprint """
+    return PLACEHOLDERS_RE.sub('%s, ...', sql)
+
+
+@contextlib.contextmanager
+def track_queries():
+    """
+        Records every query made inside the block into yielded QueryStats, including queries made in threads
+        by sync_to_async. Blocks may be nested.
+    """
+    stats = QueryStats()
+    token = _active_stats.set((*_active_stats.get(), stats))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    active_stats = _active_stats.get()
+    if not active_stats:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        fingerprint = get_fingerprint(sql)
+        for stats in active_stats:
+            stats.record(fingerprint, duration)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Inserted first, since `connection.execute_wrapper()` removes the last wrapper when its block exits
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
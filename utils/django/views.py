@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from utils.django.metrics import REGISTRY
+
+
+async def metrics_view(request):
+    """
+        Metrics of the current process in Prometheus text exposition format. It exposes internals of the service,
+        so if METRICS_TOKEN is set, it's available only with `Authorization: Bearer <token>` header. Otherwise it's
+        available to clients from METRICS_ALLOWED_IPS, which works only when they connect to the app directly:
+        behind a reverse proxy REMOTE_ADDR is the proxy's address. With several worker processes every scrape hits
+        a single one, so run a worker per container or scrape workers separately.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected.encode()):
+            return HttpResponseForbidden()
+    elif request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
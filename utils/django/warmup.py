@@ -0,0 +1,61 @@
+import logging
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+from utils.django.metrics import WARM_UP_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> dict[str, float]:
+    """
+        Runs steps of WARM_UP setting (dotted paths to functions without arguments), so that the first requests
+        of a worker don't pay for work done once per process. A failed step is logged, and the rest still run,
+        since a cold worker is better than a worker which doesn't start. Returns durations of the steps in seconds.
+    """
+    durations = {}
+    start = time.perf_counter()
+    for path in settings.WARM_UP:
+        name = path.rpartition('.')[2].removeprefix('warm_up_')
+        step_start = time.perf_counter()
+        try:
+            import_string(path)()
+        except Exception:
+            logger.warning('Warm-up step %s failed', path, exc_info=True)
+        durations[name] = time.perf_counter() - step_start
+        WARM_UP_DURATION.set(name, value=durations[name])
+
+    total = time.perf_counter() - start
+    WARM_UP_DURATION.set('total', value=total)
+    logger.info('Worker %s warmed up in %.0f ms (%s)', os.getpid(), total * 1000,
+                ', '.join(f'{name}: {duration * 1000:.0f} ms' for name, duration in durations.items()))
+    return durations
+
+
+async def awarm_up():
+    await sync_to_async(warm_up)()
+
+
+def warm_up_urls():
+    """ Populates reverse lookups of the URL resolver, which also compiles patterns of all routes """
+    get_resolver()._populate()
+
+
+def warm_up_databases():
+    """
+        Opens (and closes) a connection to every database: loads the driver's types and checks that databases are
+        reachable. With the connection pool (DB_POOL) the connection is kept for requests.
+    """
+    for connection in connections.all(initialized_only=False):
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            logger.warning('Database %s is unavailable', connection.alias, exc_info=True)
+        else:
+            connection.close()
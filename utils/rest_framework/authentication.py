@@ -0,0 +1,238 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from utils.django.hashers import acheck_password, amake_password
+from utils.rest_framework.serializers.async_validation import AsyncValidationMixin
+
+# User attributes which are put into tokens, so that a user can be built from the token without DB lookup
+USER_CLAIMS = ('is_superuser', 'is_staff', 'is_active')
+
+
+def get_user_cache_key(user_id) -> str:
+    return f'jwt-user:{user_id}'
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+        Adds an asynchronous version for .authenticate() method, so that it can be awaited right in the event loop.
+        By default .aget_user() runs .get_user() in a thread, override it to look the user up asynchronously.
+    """
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        return await sync_to_async(self.get_user)(validated_token)
+
+    @staticmethod
+    def get_user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    @staticmethod
+    def validate_user(user, validated_token, password_hash: str | None = None):
+        """
+            The same checks JWTAuthentication.get_user() performs after fetching a user. `password_hash` is
+            get_md5_hash_password() of the user's password, if the user was fetched without it
+        """
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            password_hash = password_hash or get_md5_hash_password(user.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+        JWTAuthentication which caches users for JWT_USER_CACHE_TIMEOUT seconds, so that the user is not
+        fetched from DB on every request.
+
+        All concrete fields except the password are cached (with a hash of the password hash for CHECK_REVOKE_TOKEN
+        setting), so any attribute of the rebuilt user can be read without a query, also in async code. The password
+        is deferred and reading it raises AttributeError instead of loading it: fetch the user from DB to use it.
+
+        Cached users are invalidated on User post_save and post_delete signals. Note that these signals are not sent
+        by `QuerySet.update()` and bulk operations, invalidate users manually with `ainvalidate_cached_users()`
+        in that case. The cache must be shared by all processes (see CACHES setting).
+    """
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        cache_key = get_user_cache_key(user_id)
+
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.get_cached_data(self.get_user_queryset(user_id).first())
+            cache.set(cache_key, data, settings.JWT_USER_CACHE_TIMEOUT)
+
+        return self.build_user(data, validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        cache_key = get_user_cache_key(user_id)
+
+        data = await cache.aget(cache_key)
+        if data is None:
+            data = self.get_cached_data(await self.get_user_queryset(user_id).afirst())
+            await cache.aset(cache_key, data, settings.JWT_USER_CACHE_TIMEOUT)
+
+        return self.build_user(data, validated_token)
+
+    def get_user_queryset(self, user_id):
+        fields = [field.attname for field in self.user_model._meta.concrete_fields]
+        return self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(*fields)
+
+    @staticmethod
+    def get_cached_data(row: dict | None) -> dict:
+        if row is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        password = row.pop('password')
+        return {'fields': row, 'password_hash': get_md5_hash_password(password)}
+
+    def build_user(self, data: dict, validated_token):
+        fields = data['fields']
+        values = [fields[field.attname] for field in self.user_model._meta.concrete_fields if field.attname in fields]
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, list(fields), values)
+        user.refresh_from_db = partial(refresh_cached_user_from_db, user)
+        self.validate_user(user, validated_token, data['password_hash'])
+        return user
+
+
+def refresh_cached_user_from_db(user, using=None, fields=None):
+    """ .refresh_from_db() of users built by CachedJWTAuthentication, reading the deferred password calls it """
+    if fields is not None and 'password' in fields:
+        raise AttributeError('The password of a cached user is not loaded, fetch the user from DB to use it')
+    type(user).refresh_from_db(user, using, fields)
+
+
+class StatelessJWTAuthentication(AsyncJWTAuthentication):
+    """
+        JWTAuthentication which never touches DB: a user is built from the token claims (see TOKEN_USER_CLASS
+        setting), `is_superuser`, `is_staff` and `is_active` flags are taken from the token as well.
+        Tokens must be issued by ClaimsTokenObtainPairSerializer (or ClaimsRefreshToken.for_user()).
+
+        Changes of user flags take effect only when a new access token is issued, i.e. within ACCESS_TOKEN_LIFETIME
+        if tokens are refreshed with ClaimsTokenRefreshSerializer.
+    """
+    def get_user(self, validated_token):
+        self.get_user_id(validated_token)  # The TokenUser class assumes tokens will have a user id claim
+
+        if not validated_token.get('is_active', True):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    async def aget_user(self, validated_token):
+        return self.get_user(validated_token)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """ Refresh token carrying USER_CLAIMS. Access tokens issued from it copy these claims """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+        Reloads USER_CLAIMS of the refresh token from DB before an access token is issued, otherwise access tokens
+        would carry the flags the user had when the refresh token was obtained. Users who were deactivated, deleted
+        or changed their password (with CHECK_REVOKE_TOKEN setting) can't refresh tokens.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = AsyncJWTAuthentication.get_user_id(refresh)
+        user_model = get_user_model()
+        try:
+            user = user_model._default_manager.get(**{api_settings.USER_ID_FIELD: user_id})
+        except user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        AsyncJWTAuthentication.validate_user(user, refresh)
+
+        for claim in USER_CLAIMS:
+            refresh[claim] = getattr(user, claim)
+        return super().validate({**attrs, 'refresh': str(refresh)})
+
+
+class AsyncTokenObtainPairSerializer(AsyncValidationMixin, ClaimsTokenObtainPairSerializer):
+    """
+        ClaimsTokenObtainPairSerializer with asynchronous validation (use .ais_valid()), which checks the password in
+        the hashing executor instead of blocking the event loop.
+
+        Credentials are checked the same way ModelBackend does it, other authentication backends are not supported.
+        UPDATE_LAST_LOGIN setting is not supported, since User model has no last_login field.
+    """
+    async def avalidate(self, attrs):
+        self.user = await self.aauthenticate(attrs[self.username_field], attrs['password'])
+
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        refresh = self.get_token(self.user)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+    async def aauthenticate(self, username, password):
+        user_model = get_user_model()
+        try:
+            user = await user_model._default_manager.aget(**{user_model.USERNAME_FIELD: username})
+        except user_model.DoesNotExist:
+            # Run the default password hasher once to reduce the timing difference between an existing and
+            # a nonexistent user (the same thing ModelBackend does)
+            await amake_password(password)
+            return None
+
+        async def aset_password(raw_password):
+            user.password = await amake_password(raw_password)
+            await user.asave(update_fields=['password'])
+
+        if await acheck_password(password, user.password, aset_password):
+            return user
+        return None
+
+
+def invalidate_cached_users(user_ids):
+    cache.delete_many([get_user_cache_key(user_id) for user_id in user_ids])
+
+
+async def ainvalidate_cached_users(user_ids):
+    await cache.adelete_many([get_user_cache_key(user_id) for user_id in user_ids])
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_cached_users([getattr(instance, api_settings.USER_ID_FIELD)])
@@ -0,0 +1,30 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from utils.django.executors import ExecutorSaturated
+
+
+class ServiceUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Service temporarily unavailable, try again later.')
+    default_code = 'service_unavailable'
+
+    def __init__(self, detail=None, code=None, wait: int = 1):
+        super().__init__(detail, code)
+        self.wait = wait  # DRF's exception handler turns it into Retry-After header
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _('The resource has been modified since you fetched it.')
+    default_code = 'precondition_failed'
+
+
+def exception_handler(exc, context):
+    """ DRF's exception handler which also turns saturation of bounded executors into 503 responses """
+    if isinstance(exc, ExecutorSaturated):
+        exc = ServiceUnavailable()
+
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter
+
+
+class AsyncFilterBackendMixin:
+    """
+        Adds .afilter_queryset() hook, which views call with `await` (see AsyncFilterMixin). Backends which need
+        I/O (e.g. to validate a choice against DB) should override it with an asynchronous implementation.
+
+        Filtering a queryset is lazy and doesn't touch DB by itself, so the default implementation just runs
+        the synchronous .filter_queryset() right in the event loop: a thread hop would cost more than the work.
+    """
+    async def afilter_queryset(self, request, queryset, view):
+        return self.filter_queryset(request, queryset, view)
+
+
+class AsyncOrderingFilter(AsyncFilterBackendMixin, OrderingFilter):
+    pass
+
+
+class AsyncDjangoFilterBackend(AsyncFilterBackendMixin, DjangoFilterBackend):
+    """
+        DjangoFilterBackend which caches validated filterset forms per unique combination of filter query params,
+        so that identical query strings are parsed and validated only once per process (up to `form_cache_size`
+        least recently used forms are kept). Only valid forms are cached.
+
+        Cached forms are shared between requests, so filters must not modify the form or its `cleaned_data`
+        (built-in filters don't). Query params not related to filters (e.g. a cursor) don't fragment the cache.
+    """
+    form_cache_size = 1024
+
+    _form_cache = OrderedDict()
+    _form_cache_lock = threading.Lock()
+
+    def get_filterset(self, request, queryset, view):
+        filterset = super().get_filterset(request, queryset, view)
+        if filterset is None or not filterset.is_bound:
+            return filterset
+
+        cache_key = self.get_form_cache_key(filterset)
+        with self._form_cache_lock:
+            form = self._form_cache.get(cache_key)
+            if form is not None:
+                self._form_cache.move_to_end(cache_key)
+
+        if form is not None:
+            filterset._form = form  # Used by FilterSet.form property
+        elif filterset.is_valid():
+            with self._form_cache_lock:
+                self._form_cache[cache_key] = filterset.form
+                while len(self._form_cache) > self.form_cache_size:
+                    self._form_cache.popitem(last=False)
+
+        return filterset
+
+    @staticmethod
+    def get_form_cache_key(filterset) -> tuple:
+        # Filters may use several params, e.g. DateFromToRangeFilter uses `<name>_after` and `<name>_before`
+        filter_names = tuple(filterset.base_filters)
+        data = tuple(sorted(
+            (key, tuple(filterset.data.getlist(key))) for key in filterset.data if key.startswith(filter_names)
+        ))
+        return type(filterset), filterset.form_prefix, data
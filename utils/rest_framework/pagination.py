@@ -1,8 +1,26 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+import copy
+import datetime
+import functools
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 def pagination_class_factory(name: str, page_size: int = None, page_size_query_param: str = None,
-                             max_page_size: int = None):
+                             max_page_size: int = None, base_class: type[BasePagination] = PageNumberPagination):
     """
         A factory which dynamically creates pagination classes with specified parameters based on PageNumberPagination
     :param name: A name for a new class to be created
@@ -10,14 +28,314 @@ def pagination_class_factory(name: str, page_size: int = None, page_size_query_p
     :param page_size_query_param: page_size_query_param attribute to be set on a newly created
         PageNumberPagination's child class
     :param max_page_size: max_page_size attribute to be set on a newly created PageNumberPagination's child class
+    :param base_class: Pagination class to inherit from. Any class having page_size, page_size_query_param and
+        max_page_size attributes can be used (e.g. AsyncCursorPagination). PageNumberPagination by default
     :return:
     """
     PaginationClass = type(
         name,
-        (PageNumberPagination,),
+        (base_class,),
         {'page_size': page_size,
          'page_size_query_param': page_size_query_param,
          'max_page_size': max_page_size}
     )
 
     return PaginationClass
+
+
+class CountMixin:
+    """
+        Adds a count of all objects to paginated responses, computed with `count_strategy`:
+          - 'exact': `COUNT(*)`, which has to scan all matching rows.
+          - 'estimate': the planner's estimate - `pg_class.reltuples` for unfiltered querysets, `EXPLAIN` rows otherwise.
+          - 'auto': an estimate, but an exact count if the estimate is below `exact_count_threshold`.
+          - None: no count at all.
+        Counts are cached per query (i.e. per filter combination) for `count_cache_timeout` seconds.
+        Responses have `count` and `count_is_exact` keys. Estimates are used only with PostgreSQL.
+    """
+    count_strategy: str | None = 'auto'
+    exact_count_threshold = 10000
+    count_cache_timeout = 30
+
+    count: int | None = None
+    count_is_exact: bool | None = None
+
+    def get_count(self, queryset: QuerySet) -> tuple[int, bool] | None:
+        """ Returns (count, is_exact) pair, or None if the count is disabled """
+        if self.count_strategy is None:
+            return None
+        assert self.count_strategy in ('exact', 'estimate', 'auto'), f'Unknown count strategy {self.count_strategy!r}'
+
+        queryset = queryset.order_by()
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0, True
+
+        key = hashlib.md5(repr((queryset.db, self.count_strategy, self.exact_count_threshold, sql, params)).encode())
+        cache_key = f'pagination-count:{key.hexdigest()}'
+        result = cache.get(cache_key)
+        if result is None:
+            result = self._count(queryset, sql, params)
+            cache.set(cache_key, result, self.count_cache_timeout)
+
+        return result
+
+    async def aget_count(self, queryset: QuerySet) -> tuple[int, bool] | None:
+        return await sync_to_async(self.get_count)(queryset)
+
+    def _count(self, queryset: QuerySet, sql: str, params) -> tuple[int, bool]:
+        connection = connections[queryset.db]
+        if self.count_strategy == 'exact' or connection.vendor != 'postgresql':
+            return queryset.count(), True
+
+        estimate = self._estimate_count(queryset, sql, params)
+        if self.count_strategy == 'auto' and estimate < self.exact_count_threshold:
+            return queryset.count(), True
+
+        return estimate, False
+
+    @staticmethod
+    def _estimate_count(queryset: QuerySet, sql: str, params) -> int:
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            if not queryset.query.where and not queryset.query.distinct:
+                # Row count of the whole table, updated by VACUUM and ANALYZE (-1 if never analyzed)
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                               [connection.ops.quote_name(queryset.model._meta.db_table)])
+                row = cursor.fetchone()
+                if row is not None and row[0] >= 0:
+                    return row[0]
+
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+    def set_count(self, count: tuple[int, bool] | None):
+        self.count, self.count_is_exact = count if count is not None else (None, None)
+
+    def get_count_data(self) -> list[tuple]:
+        if self.count is None:
+            return []
+        return [('count', self.count), ('count_is_exact', self.count_is_exact)]
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        if self.count_strategy is not None:
+            schema['properties'] = {
+                'count': {'type': 'integer', 'example': 123},
+                'count_is_exact': {'type': 'boolean', 'description': 'False if the count is an estimate'},
+                **schema['properties'],
+            }
+        return schema
+
+
+class CountedDjangoPaginator(DjangoPaginator):
+    """ Django's Paginator which takes a precomputed count instead of counting objects itself """
+    def __init__(self, *args, count: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__dict__['count'] = count  # Set the cached property
+
+
+class CountPageNumberPagination(CountMixin, PageNumberPagination):
+    """
+        PageNumberPagination which counts objects with `count_strategy` (see CountMixin). Page numbers are computed
+        from the count, so with an estimate the last pages may be missing or empty. The count can't be disabled.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        assert self.count_strategy is not None, 'PageNumberPagination needs a count to compute pages'
+        self.set_count(self.get_count(queryset))
+        self.django_paginator_class = functools.partial(CountedDjangoPaginator, count=self.count)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            *self.get_count_data(),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class AsyncCursorPagination(CountMixin, CursorPagination):
+    """
+        Asynchronous keyset (seek) pagination. Use it with views that call `await paginator.apaginate_queryset()`
+        (see AsyncPaginationMixin), synchronous views get the same pages from `.paginate_queryset()`.
+
+        DRF's CursorPagination stores only the first ordering field and an offset in the cursor, so it relies on
+        a nearly-unique first field and still uses OFFSET for ties. This class stores values of *all* ordering fields
+        of the boundary row instead, and fetches the next page with a `WHERE (a, b, pk) > (x, y, z)` style condition.
+        No OFFSET is ever used, so deep pages cost the same as the first one (given an index on the ordering fields).
+
+        Ordering is taken from the queryset itself, so it works with OrderingFilter. The primary key is appended as a
+        tiebreaker unless one of the ordering fields is already unique. Only non-nullable concrete model fields and
+        annotations (e.g. a search rank) are supported as ordering fields. Querysets of `.values()` are supported,
+        ordering fields are added to them if missing.
+
+        Since there are no page numbers, the count is only informational: by default it's an estimate on large
+        tables (see CountMixin).
+    """
+    ordering = '-pk'  # Used only if neither the queryset nor the model defines any ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return async_to_sync(self.apaginate_queryset)(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset: QuerySet, request, view=None, with_count: bool = True) -> list | None:
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [self._get_ordering_field(queryset, field_name) for field_name, _ in self.ordering]
+
+        self.cursor = self.decode_cursor(request)
+        self.set_count(await self.aget_count(queryset) if with_count else None)
+        queryset = queryset.order_by(*(f'-{name}' if descending else name for name, descending in self.ordering))
+        if queryset._fields:  # Cursors are built from boundary rows, so `.values()` must include ordering fields
+            missing_fields = [field.attname for field in self.fields if field.attname not in queryset._fields]
+            if missing_fields:
+                queryset = queryset.values(*queryset._fields, *missing_fields)
+        if self.cursor is not None:
+            values, reverse = self.cursor
+            queryset = queryset.filter(self._get_seek_filter(values, reverse))
+            if reverse:
+                queryset = queryset.reverse()
+        else:
+            reverse = False
+
+        # Fetch one extra row to find out whether there is a following page
+        results = [obj async for obj in queryset[:self.page_size + 1]]
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next, self.has_previous = has_following, self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+            Returns ordering as a list of (field_name, descending) pairs, based on the queryset ordering.
+            The primary key is appended as a tiebreaker when none of the ordering fields is unique.
+        """
+        if queryset.query.order_by:
+            ordering = queryset.query.order_by
+        elif queryset.query.default_ordering and queryset.model._meta.ordering:
+            ordering = queryset.model._meta.ordering
+        else:
+            ordering = (self.ordering,) if isinstance(self.ordering, str) else self.ordering
+
+        pk_name = queryset.model._meta.pk.name
+        result = []
+        for term in ordering:
+            assert isinstance(term, str) and term != '?', (
+                f'{self.__class__.__name__} supports only field names as ordering, got {term!r}'
+            )
+            field_name = term.lstrip('-')
+            if field_name == 'pk':
+                field_name = pk_name
+            if field_name not in (name for name, _ in result):
+                result.append((field_name, term.startswith('-')))
+
+        if not any(self._get_ordering_field(queryset, name).unique for name, _ in result):
+            # Tiebreaker follows the direction of the last field, so that an index on (field, pk) can be used
+            result.append((pk_name, result[-1][1]))
+
+        return result
+
+    @staticmethod
+    def _get_ordering_field(queryset, field_name):
+        """ Returns a model field, or a copy of the output field named after the annotation for annotations """
+        annotation = queryset.query.annotations.get(field_name)
+        if annotation is not None:
+            field = copy.copy(annotation.output_field)
+            field.set_attributes_from_name(field_name)
+            return field
+
+        model = queryset.model
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            raise AssertionError(f'Cannot paginate by {field_name!r}: it is not a concrete field of {model.__name__}')
+
+        assert field.concrete and not field.null, f'Cannot paginate by nullable or non-concrete field {field_name!r}'
+        return field
+
+    def _get_seek_filter(self, values: list, reverse: bool) -> Q:
+        """
+            Builds a row-value comparison `(a, b, pk) > (x, y, z)` which also works with mixed ordering directions:
+            `a > x OR (a = x AND b > y) OR (a = x AND b = y AND pk > z)`.
+        """
+        seek_filter = Q()
+        equal_to = {}
+        for (field_name, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            seek_filter |= Q(**equal_to, **{f'{field_name}__{lookup}': value})
+            equal_to[field_name] = value
+
+        # Redundant condition on the first field only, so that the planner can use it as an index range bound
+        first_field_name, descending = self.ordering[0]
+        lookup = 'lte' if descending != reverse else 'gte'
+        return Q(**{f'{first_field_name}__{lookup}': values[0]}) & seek_filter
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            *self.get_count_data(),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((self._get_values_from_instance(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((self._get_values_from_instance(self.page[0]), True))
+
+    def _get_values_from_instance(self, instance: Model | dict) -> list:
+        """ Returns JSON-serializable values of ordering fields. Rows from `.values()` are supported as well """
+        if isinstance(instance, dict):
+            values = [instance[field.attname] for field in self.fields]
+        else:
+            values = [field.value_from_object(instance) for field in self.fields]
+
+        return [value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else
+                value if isinstance(value, (str, int, float, bool)) else str(value)
+                for value in values]
+
+    def _get_ordering_signature(self) -> list[str]:
+        return [f'-{name}' if descending else name for name, descending in self.ordering]
+
+    def decode_cursor(self, request) -> tuple[list, bool] | None:
+        """ Returns (values, reverse) pair taken from the cursor query parameter, or None if there is no cursor """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            values, reverse, ordering = payload['v'], bool(payload['r']), payload['o']
+            if ordering != self._get_ordering_signature() or len(values) != len(self.fields):
+                raise ValueError('Cursor does not match the current ordering')
+            values = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def encode_cursor(self, cursor: tuple[list, bool]) -> str:
+        values, reverse = cursor
+        payload = {'v': values, 'r': int(reverse), 'o': self._get_ordering_signature()}
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
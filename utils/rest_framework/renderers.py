@@ -0,0 +1,22 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class NDJSONRenderer(JSONRenderer):
+    """
+        Renders data as newline delimited JSON (http://ndjson.org): every item of a list is rendered as a separate
+        line. Any other data (e.g. an error response) is rendered as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        # Every item must be rendered on a single line
+        return None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        render_item = super().render
+        items = data if isinstance(data, list) else [data]
+        return b''.join(render_item(item, accepted_media_type, renderer_context) + b'\n' for item in items)
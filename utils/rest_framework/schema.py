@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework.renderers import JSONRenderer
+
+from utils.rest_framework.views import AsyncAPIView
+
+logger = logging.getLogger(__name__)
+
+# Renderers of schema files, by file extension
+SCHEMA_RENDERERS = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+
+
+class PrebuiltSchema:
+    """ Rendered schema, compressed once, and its ETag """
+    def __init__(self, content: bytes, compressed: bytes = None):
+        self.content = content
+        self.compressed = compressed if compressed is not None else gzip.compress(content, mtime=0)
+        # Weak, since compressed and uncompressed representations have the same ETag
+        self.etag = f'W/"{hashlib.md5(content).hexdigest()}"'
+
+
+def render_schemas() -> dict[str, bytes]:
+    """ Generates the schema (the same way `spectacular` command does) and renders it into every format """
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {extension: renderer().render(schema, renderer_context={})
+            for extension, renderer in SCHEMA_RENDERERS.items()}
+
+
+def write_schemas(directory: Path) -> list[Path]:
+    """ Writes schema.yaml and schema.json, along with their gzipped versions into `directory` """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for extension, content in render_schemas().items():
+        path = directory / f'schema.{extension}'
+        path.write_bytes(content)
+        path.with_suffix(f'.{extension}.gz').write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+        paths.append(path)
+    return paths
+
+
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def get_prebuilt_schema(extension: str) -> PrebuiltSchema:
+    """
+        Returns the schema file from SPECTACULAR_SCHEMA_DIR, loaded once per process. If it wasn't built,
+        the schema is generated once and kept in memory.
+    """
+    schema = _schemas.get(extension)
+    if schema is None:
+        with _schemas_lock:
+            schema = _schemas.get(extension)
+            if schema is None:
+                schema = _schemas[extension] = load_schema(extension)
+    return schema
+
+
+def load_schema(extension: str) -> PrebuiltSchema:
+    path = Path(settings.SPECTACULAR_SCHEMA_DIR) / f'schema.{extension}'
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        logger.warning('Schema file %s is not found, generating the schema. Run `build_schema` command '
+                       'when building the application', path)
+        return PrebuiltSchema(render_schemas()[extension])
+
+    compressed_path = path.with_suffix(f'.{extension}.gz')
+    return PrebuiltSchema(content, compressed_path.read_bytes() if compressed_path.exists() else None)
+
+
+def clear_prebuilt_schemas():
+    _schemas.clear()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """ Whether `Accept-Encoding` header allows gzip: listed (or `*`, if it isn't listed) with a non-zero q-value """
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, *params = (part.strip() for part in coding.split(';'))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
+
+
+class PrebuiltSpectacularAPIView(AsyncAPIView, SpectacularAPIView):
+    """
+        SpectacularAPIView which serves the schema rendered by `build_schema` command (see SPECTACULAR_SCHEMA_DIR
+        setting), instead of inspecting all views and serializers on every request. Responses have an ETag,
+        so Swagger UI and Redoc revalidate the schema with 304 responses, and are gzipped if the client accepts it.
+
+        `lang` and `version` parameters are not supported. With SPECTACULAR_LIVE_SCHEMA setting (on in DEBUG mode)
+        the schema is generated on every request as usual, so that changes are seen without a rebuild.
+    """
+    @extend_schema(**SCHEMA_KWARGS)
+    async def get(self, request, *args, **kwargs):
+        if settings.SPECTACULAR_LIVE_SCHEMA:
+            return await sync_to_async(super().get)(request, *args, **kwargs)
+
+        extension = 'json' if isinstance(request.accepted_renderer, JSONRenderer) else 'yaml'
+        schema = get_prebuilt_schema(extension)
+
+        etags = [etag.removeprefix('W/') for etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+        if '*' in etags or schema.etag.removeprefix('W/') in etags:
+            response = HttpResponseNotModified()
+        elif accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = HttpResponse(schema.compressed, content_type=request.accepted_media_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(schema.content, content_type=request.accepted_media_type)
+
+        response['ETag'] = schema.etag
+        response['Cache-Control'] = 'no-cache'  # Revalidate, since the schema changes with deployments
+        response['Content-Disposition'] = f'inline; filename="{spectacular_settings.TITLE or "schema"}.{extension}"'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
@@ -1,9 +1,21 @@
+from django.db.models import Q
+from django.utils.text import capfirst
+from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import empty
 from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.serializers import as_serializer_error
 
 
+def get_unique_error_message(model, field_name: str) -> str:
+    """ The same message Django's model validation uses for a unique field """
+    model_field = model._meta.get_field(field_name)
+    return model_field.error_messages['unique'] % {
+        'model_name': capfirst(model._meta.verbose_name),
+        'field_label': capfirst(model_field.verbose_name),
+    }
+
+
 class AsyncValidationMixin:
     """
         A small mixin that adds support for running asynchronous validation.
@@ -11,7 +23,11 @@ class AsyncValidationMixin:
 
         We need to run validation asynchronously for this project only for validating whether username exists or not.
         For making a mixin that handles whole validation asynchronously we'd need much more effort and time.
+
+        Model fields listed in `unique_fields` are checked for uniqueness (excluding the instance being updated) with
+        a single query before .avalidate() is called.
     """
+    unique_fields: tuple[str, ...] = ()
 
     async def arun_validation(self, data=empty):
         """
@@ -26,6 +42,7 @@ class AsyncValidationMixin:
         value = self.to_internal_value(data)
         try:
             self.run_validators(value)
+            await self.avalidate_unique(value)
             value = await self.avalidate(value)
             assert value is not None, '.validate() should return the validated data'
         except (ValidationError, DjangoValidationError) as exc:
@@ -36,6 +53,26 @@ class AsyncValidationMixin:
     async def avalidate(self, attrs):
         return attrs
 
+    async def avalidate_unique(self, attrs):
+        fields = [field for field in self.unique_fields if field in attrs]
+        if not fields:
+            return
+
+        model = self.Meta.model
+        query = Q(*((field, attrs[field]) for field in fields), _connector=Q.OR)
+        queryset = model._default_manager.filter(query)
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+
+        errors = {}
+        async for row in queryset.values_list(*fields):
+            for field, value in zip(fields, row):
+                if value == attrs[field]:
+                    errors[field] = [get_unique_error_message(model, field)]
+
+        if errors:
+            raise ValidationError(errors)
+
     async def ais_valid(self, *, raise_exception=False):
         assert hasattr(self, 'initial_data'), (
             'Cannot call `.is_valid()` as no `data=` keyword argument was '
@@ -55,3 +92,111 @@ class AsyncValidationMixin:
             raise ValidationError(self.errors)
 
         return not bool(self._errors)
+
+
+class AsyncListValidationMixin:
+    """
+        List serializer counterpart of AsyncValidationMixin (use it as `Meta.list_serializer_class` base).
+
+        Fields of every item are validated by the child serializer, then fields from child's `unique_fields` are
+        checked for all items at once with a single `IN` query, and values repeated inside the list itself are
+        reported too. Then child's .avalidate() is awaited for every item, and finally .avalidate() is called once
+        with the whole list. Errors are reported per item (a list of error dicts, an empty dict for a valid item),
+        like DRF's ListSerializer does.
+    """
+    default_error_messages = {
+        'not_unique_in_list': _('This value is present in the list more than once.'),
+    }
+
+    async def arun_validation(self, data=empty):
+        (is_empty_value, data) = self.validate_empty_values(data)
+        if is_empty_value:
+            return data
+
+        value = self.to_internal_value(data)
+        self.run_validators(value)
+        await self.avalidate_unique(value)
+        value = await self.avalidate_children(value)
+        return await self.avalidate(value)
+
+    async def avalidate(self, attrs: list[dict]) -> list[dict]:
+        return attrs
+
+    async def avalidate_unique(self, attrs: list[dict], instances: list | None = None):
+        """ `instances` are objects being updated, in the same order as `attrs` (they don't conflict with themselves) """
+        fields = getattr(self.child, 'unique_fields', ())
+        values = {field: {item[field] for item in attrs if field in item} for field in fields}
+        fields = [field for field in fields if values[field]]
+        if not fields:
+            return
+
+        # A single query for all fields and items, mapping every existing value to the pk of its owner
+        model = self.child.Meta.model
+        query = Q(*((f'{field}__in', values[field]) for field in fields), _connector=Q.OR)
+        existing = {field: {} for field in fields}
+        async for pk, *row in model._default_manager.filter(query).values_list('pk', *fields):
+            for field, value in zip(fields, row):
+                existing[field][value] = pk
+
+        errors, seen = [], {field: set() for field in fields}
+        for index, item in enumerate(attrs):
+            pk = instances[index].pk if instances is not None else None
+            item_errors = {}
+            for field in fields:
+                if field not in item:
+                    continue
+
+                value = item[field]
+                if existing[field].get(value, pk) != pk:
+                    item_errors[field] = [get_unique_error_message(model, field)]
+                elif value in seen[field]:
+                    item_errors[field] = [self.error_messages['not_unique_in_list']]
+                seen[field].add(value)
+            errors.append(item_errors)
+
+        if any(errors):
+            raise ValidationError(errors)
+
+    async def avalidate_children(self, attrs: list[dict], instances: list | None = None) -> list[dict]:
+        """ Runs child's .avalidate() for every item, `instances` are the same as in .avalidate_unique() """
+        if not hasattr(self.child, 'avalidate'):
+            return attrs
+
+        value, errors = [], []
+        try:
+            for index, item in enumerate(attrs):
+                self.child.instance = instances[index] if instances is not None else None
+                try:
+                    item = await self.child.avalidate(item)
+                    assert item is not None, '.validate() should return the validated data'
+                except (ValidationError, DjangoValidationError) as exc:
+                    errors.append(as_serializer_error(exc))
+                else:
+                    value.append(item)
+                    errors.append({})
+        finally:
+            self.child.instance = None
+
+        if any(errors):
+            raise ValidationError(errors)
+        return value
+
+    async def ais_valid(self, *, raise_exception=False):
+        assert hasattr(self, 'initial_data'), (
+            'Cannot call `.is_valid()` as no `data=` keyword argument was '
+            'passed when instantiating the serializer instance.'
+        )
+
+        if not hasattr(self, '_validated_data'):
+            try:
+                self._validated_data = await self.arun_validation(self.initial_data)
+            except ValidationError as exc:
+                self._validated_data = []
+                self._errors = exc.detail
+            else:
+                self._errors = []
+
+        if self._errors and raise_exception:
+            raise ValidationError(self.errors)
+
+        return not bool(self._errors)
@@ -0,0 +1,107 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+
+from utils.rest_framework.serializers.list_serializer import ListSerializer
+
+
+class BulkCreateListSerializer(ListSerializer):
+    """
+        Creates all objects with a single `abulk_create()` query.
+        Note that `Model.save()` is not called and post_save signals are not sent.
+    """
+    async def acreate(self, validated_data):
+        model = self.child.Meta.model
+        return await model._default_manager.abulk_create([model(**attrs) for attrs in validated_data])
+
+
+class BulkUpdateListSerializer(ListSerializer):
+    """
+        Updates many objects at once. Instantiate it with a queryset of objects available for update, and a list of
+        items, each having a primary key under `id_field` key:
+
+            serializer = MySerializer(queryset, data=[{'id': 1, 'name': 'John'}, ...], many=True, partial=True)
+
+        Objects are fetched with a single query and saved with a single `abulk_update()` query.
+        Note that `Model.save()` is not called and post_save signals are not sent.
+    """
+    id_field = 'id'
+
+    default_error_messages = {
+        'not_found': _('Object with this id does not exist.'),
+        'duplicate': _('Object with this id is present in the list more than once.'),
+    }
+
+    async def arun_validation(self, data=empty):
+        (is_empty_value, data) = self.validate_empty_values(data)
+        if is_empty_value:
+            return data
+
+        # Check that data is a list of proper length
+        if not isinstance(data, list) or len(data) > (self.max_length or len(data)) or \
+                len(data) < (self.min_length or 0) or (not self.allow_empty and not data):
+            return self.to_internal_value(data)  # Raises a proper validation error
+
+        ids = [self._get_id(item) for item in data]
+        instances = {obj.pk: obj async for obj in self.instance.filter(pk__in={pk for pk in ids if pk is not None})}
+
+        self._instances_to_update = []
+        value, errors, seen_ids = [], [], set()
+        for item, pk in zip(data, ids):
+            if isinstance(item, dict) and pk not in instances:
+                errors.append({self.id_field: [self.error_messages['not_found']]})
+                continue
+            if pk is not None and pk in seen_ids:
+                errors.append({self.id_field: [self.error_messages['duplicate']]})
+                continue
+            seen_ids.add(pk)
+
+            # Items which are not dicts are reported by the child serializer
+            self.child.instance = instances.get(pk)
+            try:
+                value.append(self.child.run_validation(item))
+            except ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                self._instances_to_update.append(instances[pk])
+                errors.append({})
+        self.child.instance = None
+
+        if any(errors):
+            raise ValidationError(errors)
+
+        self.run_validators(value)
+        await self.avalidate_unique(value, self._instances_to_update)
+        value = await self.avalidate_children(value, self._instances_to_update)
+        return await self.avalidate(value)
+
+    def _get_id(self, item):
+        if not isinstance(item, dict):
+            return None
+
+        try:
+            return self.child.Meta.model._meta.pk.to_python(item.get(self.id_field))
+        except DjangoValidationError:
+            return None
+
+    async def aupdate(self, instance, validated_data):
+        update_fields = set()
+        for obj, attrs in zip(self._instances_to_update, validated_data):
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+                update_fields.add(attr)
+
+        if update_fields:
+            # bulk_update() doesn't update `auto_now` fields by itself
+            auto_now_fields = [field for field in self.child.Meta.model._meta.concrete_fields
+                               if getattr(field, 'auto_now', False)]
+            for obj in self._instances_to_update:
+                for field in auto_now_fields:
+                    field.pre_save(obj, add=False)
+            update_fields.update(field.attname for field in auto_now_fields)
+
+            await self.child.Meta.model._default_manager.abulk_update(self._instances_to_update,
+                                                                     fields=sorted(update_fields))
+
+        return self._instances_to_update
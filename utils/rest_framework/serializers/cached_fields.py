@@ -0,0 +1,50 @@
+import copy
+
+from rest_framework.serializers import BaseSerializer
+
+
+class CachedFieldsMixin:
+    """
+        Builds fields of a serializer once per class instead of once per instance.
+
+        Serializer.get_fields() deep-copies all declared fields, and ModelSerializer maps every model field to a new
+        serializer field, for every serializer instance, i.e. several times per request. This mixin keeps the fields
+        returned by the first .get_fields() call and gives every instance shallow copies of them with their own lists of
+        validators and dicts of error messages (nested serializers and fields with child fields are deep-copied).
+        Copies are bound to the instance as usual, the kept fields are never bound.
+
+        Fields are cached per view action, since that's what fields usually depend on. They must not depend on the
+        instance: if they depend on something else from the context, return it from .get_fields_cache_key().
+        Set `cache_fields` to False to disable the cache.
+        Inherit from it before serializer classes, so that it overrides .get_fields().
+    """
+    cache_fields = True
+
+    _fields_cache = {}
+
+    def get_fields_cache_key(self):
+        """ Fields are built once per class and key """
+        return getattr(self.context.get('view'), 'action', None)
+
+    def get_fields(self):
+        if not self.cache_fields:
+            return super().get_fields()
+
+        key = (type(self), self.get_fields_cache_key())
+        fields = CachedFieldsMixin._fields_cache.get(key)
+        if fields is None:
+            fields = CachedFieldsMixin._fields_cache[key] = super().get_fields()
+        return {field_name: copy_field(field) for field_name, field in fields.items()}
+
+
+def copy_field(field):
+    """ Returns an unbound copy of a field, sharing its arguments and validator objects """
+    if isinstance(field, BaseSerializer) or hasattr(field, 'child') or hasattr(field, 'child_relation'):
+        return copy.deepcopy(field)
+    clone = object.__new__(type(field))
+    clone.__dict__.update(field.__dict__)
+    # Both are mutable and are sometimes changed in place, e.g. in serializer's __init__()
+    if '_validators' in clone.__dict__:
+        clone._validators = list(clone._validators)
+    clone.error_messages = dict(clone.error_messages)
+    return clone
@@ -0,0 +1,153 @@
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import QuerySet
+from rest_framework import fields as drf_fields
+from rest_framework.relations import HyperlinkedIdentityField
+
+# Serializer fields whose .to_representation() returns the value as is, if the model field already returns
+# a value of the proper type
+PASS_THROUGH_FIELDS = {
+    drf_fields.CharField: models.CharField,
+    drf_fields.EmailField: models.CharField,
+    drf_fields.SlugField: models.CharField,
+    drf_fields.BooleanField: models.BooleanField,
+    drf_fields.IntegerField: models.IntegerField,
+}
+
+# Lookup value substituted into a reversed url, so that the url can be used as a template. Must match lookup regex
+URL_PLACEHOLDER = '0urlplaceholder0'
+
+
+class FastRepresentationMixin:
+    """
+        Adds a fast path for serializing objects in read-only actions (list, retrieve, export).
+
+        The default .ato_representation() walks every field of a serializer for every object and calls
+        `field.get_attribute()` and `field.to_representation()`, and HyperlinkedIdentityField calls `reverse()` for
+        every object. This mixin compiles a representation plan once per serializer class: a list of model columns
+        to be fetched with `.values()` and a converter for every field. Converters that are no-ops are skipped and
+        the identity url is built from a template which is reversed only once per serializer instance.
+
+        The output is identical to the default one. The default path is used as a fallback when:
+            - the serializer was instantiated with `data=` (create / update);
+            - any of the fields can't be compiled (nested serializers, method fields, dotted sources, etc.);
+            - `fast_representation` attribute is set to False.
+
+        Inherit from it before adrf's Serializer, so that it overrides .ato_representation().
+    """
+    fast_representation = True
+
+    _representation_plans = {}
+
+    @classmethod
+    def get_representation_plan(cls) -> list[tuple[str, str]] | None:
+        """
+            Returns a list of (field_name, column) pairs for every readable field, or None if the fast path can't
+            be used for this serializer class. Built only once per class.
+        """
+        if cls not in FastRepresentationMixin._representation_plans:
+            FastRepresentationMixin._representation_plans[cls] = cls._build_representation_plan()
+        return FastRepresentationMixin._representation_plans[cls]
+
+    @classmethod
+    def _build_representation_plan(cls):
+        model = cls.Meta.model
+        plan = []
+        for field_name, field in cls().fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, HyperlinkedIdentityField):
+                model_field = model._meta.pk if field.lookup_field == 'pk' else model._meta.get_field(field.lookup_field)
+                # Quoting of other types of lookup values is not replicated, so they are not supported
+                if not isinstance(model_field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+                    return None
+            else:
+                model_field = cls._get_source_model_field(model, field)
+                if model_field is None:
+                    return None
+
+            plan.append((field_name, model_field.attname))
+
+        return plan
+
+    @staticmethod
+    def _get_source_model_field(model, field):
+        """ Returns a concrete non-relational model field which is the source of a serializer field, if any """
+        # Method fields, whole-object fields, dotted sources
+        if field.source == '*' or len(field.source_attrs) != 1:
+            return None
+
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            return None  # Model property or method
+
+        # Relational fields and nested serializers
+        if not model_field.concrete or model_field.is_relation:
+            return None
+
+        return model_field
+
+    @classmethod
+    def get_representation_queryset(cls, queryset: QuerySet) -> QuerySet:
+        """
+            Returns a queryset which yields rows ready to be represented by the fast path.
+            Annotations are kept, since they may be needed for ordering and pagination (e.g. a search rank)
+        """
+        plan = cls.get_representation_plan() if cls.fast_representation else None
+        if plan is None:
+            return queryset
+
+        return queryset.values(*dict.fromkeys(column for _, column in plan), *queryset.query.annotation_select)
+
+    def is_fast_representation_enabled(self) -> bool:
+        return self._get_representation_steps() is not None
+
+    def _get_representation_steps(self):
+        """ Binds the plan to fields of this serializer instance: a list of (field_name, column, converter) """
+        if not hasattr(self, '_representation_steps'):
+            plan = self.get_representation_plan()
+            if not self.fast_representation or plan is None or hasattr(self, 'initial_data'):
+                self._representation_steps = None
+            else:
+                self._representation_steps = [
+                    (field_name, column, self._get_converter(self.fields[field_name]))
+                    for field_name, column in plan
+                ]
+
+        return self._representation_steps
+
+    def _get_converter(self, field):
+        if isinstance(field, HyperlinkedIdentityField):
+            def to_representation(value):
+                # Rows from .values() don't have attributes, so wrap a lookup value into an object
+                return field.to_representation(SimpleNamespace(**{'pk': value, field.lookup_field: value}))
+
+            url = to_representation(URL_PLACEHOLDER)
+            if url is None or url.count(URL_PLACEHOLDER) != 1:
+                return to_representation
+            prefix, suffix = url.split(URL_PLACEHOLDER)
+            return lambda value: f'{prefix}{value}{suffix}'
+
+        model_field_class = PASS_THROUGH_FIELDS.get(type(field))
+        model_field = self.Meta.model._meta.get_field(field.source_attrs[0])
+        if model_field_class is not None and isinstance(model_field, model_field_class):
+            return None
+        return field.to_representation
+
+    def fast_to_representation(self, instance):
+        """ Represents a model instance or a row from .values() using compiled steps """
+        get = dict.__getitem__ if isinstance(instance, dict) else getattr
+        ret = {}
+        for field_name, column, convert in self._representation_steps:
+            value = get(instance, column)
+            ret[field_name] = value if value is None or convert is None else convert(value)
+        return ret
+
+    async def ato_representation(self, instance):
+        if not self.is_fast_representation_enabled():
+            return await super().ato_representation(instance)
+        return self.fast_to_representation(instance)
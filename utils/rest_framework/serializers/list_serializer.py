@@ -0,0 +1,31 @@
+from adrf.serializers import ListSerializer as AsyncListSerializer
+from django.db import models
+from django.db.models import QuerySet
+
+from utils.rest_framework.serializers.async_validation import AsyncListValidationMixin
+from utils.rest_framework.serializers.fast_representation import FastRepresentationMixin
+
+
+class ListSerializer(AsyncListValidationMixin, AsyncListSerializer):
+    """
+        adrf's ListSerializer iterates over data using `async for`, so it can serialize only querysets and managers.
+        This version also accepts ordinary iterables, e.g. a page of objects returned by a paginator.
+
+        If the child serializer supports fast representation (see FastRepresentationMixin), querysets are fetched
+        using `.values()`, so that model instances aren't constructed at all.
+
+        Validation is asynchronous and batched (see AsyncListValidationMixin), use .ais_valid().
+
+        Set it as `Meta.list_serializer_class` on your serializer to use it with `many=True`.
+    """
+    async def ato_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+
+        if isinstance(iterable, QuerySet) and isinstance(self.child, FastRepresentationMixin) \
+                and self.child.is_fast_representation_enabled():
+            iterable = self.child.get_representation_queryset(iterable)
+
+        if hasattr(iterable, '__aiter__'):
+            return [await self.child.ato_representation(item) async for item in iterable]
+
+        return [await self.child.ato_representation(item) for item in iterable]
@@ -0,0 +1,175 @@
+import asyncio
+import functools
+
+from adrf.views import APIView as AdrfAPIView
+from asgiref.sync import sync_to_async
+from django.utils.module_loading import import_string
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from utils.django.metrics import timed_phase
+
+
+class AsyncAPIView(AdrfAPIView):
+    """
+        adrf's APIView runs the whole .initial() (authentication, permissions and throttling) with sync_to_async,
+        so every request of an asynchronous view makes a thread hop before the handler even starts.
+        This view runs these steps in the event loop instead:
+            - authenticators' .aauthenticate() is awaited (see AsyncJWTAuthentication), authenticators without it
+              are run in a thread, since they usually query DB;
+            - permissions' .ahas_permission() / .ahas_object_permission() and throttles' .aallow_request() are
+              awaited if defined, otherwise the synchronous methods are called right in the event loop, so they must
+              not access DB (built-in permissions and throttles with a local memory cache don't).
+
+        Synchronous handlers (e.g. the default OPTIONS one) are still run in a thread.
+        Durations of these steps are recorded as request phases (see MetricsMiddleware).
+    """
+    async def async_dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers  # deprecate?
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            # Get the appropriate handler method
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """ Asynchronous version of .initial() """
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        # Perform content negotiation and store the accepted info on the request
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        # Determine the API version, if versioning is in use.
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        # Ensure that the incoming request is permitted
+        with timed_phase('authentication'):
+            await self.aperform_authentication(request)
+        with timed_phase('permissions'):
+            await self.acheck_permissions(request)
+        with timed_phase('throttling'):
+            await self.acheck_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """ The same as Request._authenticate(), so that `request.user` is set without a synchronous lookup """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            if hasattr(permission, 'ahas_permission'):
+                has_permission = await permission.ahas_permission(request, self)
+            else:
+                has_permission = permission.has_permission(request, self)
+
+            if not has_permission:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            with timed_phase('permissions'):
+                if hasattr(permission, 'ahas_object_permission'):
+                    has_permission = await permission.ahas_object_permission(request, self, obj)
+                else:
+                    has_permission = permission.has_object_permission(request, self, obj)
+
+            if not has_permission:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def acheck_throttles(self, request):
+        throttle_durations = []
+        for throttle in self.get_throttles():
+            if hasattr(throttle, 'aallow_request'):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                allowed = throttle.allow_request(request, self)
+
+            if not allowed:
+                throttle_durations.append(throttle.wait())
+
+        if throttle_durations:
+            # Filter out `None` values which may happen in case of config / rate changes
+            durations = [duration for duration in throttle_durations if duration is not None]
+            self.throttled(request, max(durations, default=None))
+
+
+class AsyncTokenObtainPairView(AsyncAPIView, TokenObtainPairView):
+    """
+        Asynchronous version of TokenObtainPairView. The serializer (TOKEN_OBTAIN_SERIALIZER setting) must support
+        asynchronous validation, see AsyncTokenObtainPairSerializer.
+    """
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+
+        try:
+            with timed_phase('validation'):
+                await serializer.ais_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+def lazy_api_view(view_path: str, **initkwargs):
+    """
+        View which imports the API view class `view_path` on the first request, so that modules needed only by
+        rarely requested views (e.g. drf_spectacular for the API documentation) aren't imported on every worker
+        start. Both synchronous and asynchronous views are supported. Like all DRF views, it's exempt from CSRF.
+    """
+    @functools.cache
+    def get_view():
+        return import_string(view_path).as_view(**initkwargs)
+
+    async def view(request, *args, **kwargs):
+        actual_view = get_view()
+        if asyncio.iscoroutinefunction(actual_view):
+            return await actual_view(request, *args, **kwargs)
+        return await sync_to_async(actual_view)(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
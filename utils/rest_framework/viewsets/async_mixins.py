@@ -1,15 +1,38 @@
-from django.http import Http404
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from utils.django.metrics import timed_phase
+from utils.rest_framework.renderers import NDJSONRenderer
+from utils.rest_framework.serializers.fast_representation import FastRepresentationMixin
 
-class AsyncGetObjectMixin:
+
+class AsyncFilterMixin:
     """
-        Adds an asynchronous version for .get_object() method.
+        Adds an asynchronous version for .filter_queryset() method, which awaits .afilter_queryset() of filter
+        backends having it (see AsyncFilterBackendMixin) and calls .filter_queryset() of others.
+    """
+    async def afilter_queryset(self, queryset):
+        with timed_phase('filtering'):
+            for backend in list(self.filter_backends):
+                backend = backend()
+                if hasattr(backend, 'afilter_queryset'):
+                    queryset = await backend.afilter_queryset(self.request, queryset, self)
+                else:
+                    queryset = backend.filter_queryset(self.request, queryset, self)
+        return queryset
 
-        This class does not provide an exhaustive support for asynchronously getting object, since some code it uses
-        may raise SynchronousOnlyOperation exception. Not ready for usage in other projects.
+
+class AsyncGetObjectMixin(AsyncFilterMixin):
+    """
+        Adds an asynchronous version for .get_object() method.
+        Object permissions are checked with .acheck_object_permissions() (see AsyncAPIView).
     """
     async def aget_object(self):
-        queryset = self.filter_queryset(self.get_queryset())
+        queryset = await self.afilter_queryset(self.get_queryset())
 
         # Perform the lookup filtering.
         lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
@@ -30,6 +53,149 @@ class AsyncGetObjectMixin:
             )
 
         # May raise a permission denied
-        self.check_object_permissions(self.request, obj)
+        await self.acheck_object_permissions(self.request, obj)
 
         return obj
+
+
+class AsyncPaginationMixin:
+    """
+        Adds an asynchronous version for .paginate_queryset() method.
+        Pagination classes implementing .apaginate_queryset() (see AsyncCursorPagination) are awaited right in
+        the event loop, synchronous ones are run in a thread, since they query DB.
+    """
+    async def apaginate_queryset(self, queryset):
+        """
+        Return a single page of results, or `None` if pagination is disabled.
+        """
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, 'apaginate_queryset'):
+            return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+
+
+class AsyncStreamingMixin:
+    """
+        Adds .get_streaming_response() method which serializes a queryset row by row straight into an asynchronous
+        StreamingHttpResponse. Rows are fetched from the DB in chunks (using a server-side cursor on PostgreSQL),
+        so memory usage stays flat and time to first byte does not depend on the size of the queryset.
+
+        The response is rendered as a JSON array, or as newline delimited JSON if NDJSONRenderer was accepted.
+    """
+    stream_chunk_size = 2000
+
+    def get_streaming_response(self, queryset: QuerySet) -> StreamingHttpResponse:
+        renderer = self.request.accepted_renderer
+        return StreamingHttpResponse(self._astream_rendered(queryset, renderer), content_type=renderer.media_type)
+
+    async def _astream_rendered(self, queryset, renderer):
+        if isinstance(renderer, NDJSONRenderer):
+            prefix, separator, suffix = b'', b'', b''  # NDJSONRenderer already ends every item with a new line
+        else:
+            prefix, separator, suffix = b'[', b',', b']'
+
+        # A single serializer instance is used for every row, so that fields are constructed only once
+        serializer = self.get_serializer()
+        if isinstance(serializer, FastRepresentationMixin) and serializer.is_fast_representation_enabled():
+            queryset = serializer.get_representation_queryset(queryset)
+
+        if prefix:
+            yield prefix
+        is_first = True
+        async for instance in queryset.aiterator(chunk_size=self.stream_chunk_size):
+            data = await serializer.ato_representation(instance)
+            yield renderer.render(data) if is_first else separator + renderer.render(data)
+            is_first = False
+        if suffix:
+            yield suffix
+
+
+class AsyncListModelMixin:
+    """
+        List a queryset. Asynchronous version of ListModelMixin.
+        Rows are fetched with .values() if the serializer supports it (see FastRepresentationMixin).
+    """
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, FastRepresentationMixin):
+            queryset = serializer_class.get_representation_queryset(queryset)
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            with timed_phase('serialization'):
+                data = await serializer.adata
+            return self.get_paginated_response(data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        with timed_phase('serialization'):
+            return Response(await serializer.adata)
+
+
+class AsyncCreateModelMixin:
+    """ Create a model instance. Asynchronous version of CreateModelMixin """
+    async def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        with timed_phase('validation'):
+            await serializer.ais_valid(raise_exception=True)
+        await self.aperform_create(serializer)
+        with timed_phase('serialization'):
+            data = await serializer.adata
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+
+    async def aperform_create(self, serializer):
+        await serializer.asave()
+
+    def get_success_headers(self, data):
+        try:
+            return {'Location': str(data[api_settings.URL_FIELD_NAME])}
+        except (TypeError, KeyError):
+            return {}
+
+
+class AsyncRetrieveModelMixin:
+    """ Retrieve a model instance. Asynchronous version of RetrieveModelMixin """
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        with timed_phase('serialization'):
+            return Response(await serializer.adata)
+
+
+class AsyncUpdateModelMixin:
+    """ Update a model instance. Asynchronous version of UpdateModelMixin """
+    async def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        with timed_phase('validation'):
+            await serializer.ais_valid(raise_exception=True)
+        await self.aperform_update(serializer)
+
+        if getattr(instance, '_prefetched_objects_cache', None):
+            # If 'prefetch_related' has been applied to a queryset, we need to
+            # forcibly invalidate the prefetch cache on the instance.
+            instance._prefetched_objects_cache = {}
+
+        with timed_phase('serialization'):
+            return Response(await serializer.adata)
+
+    async def aperform_update(self, serializer):
+        await serializer.asave()
+
+    async def partial_update(self, request, *args, **kwargs):
+        kwargs['partial'] = True
+        return await self.update(request, *args, **kwargs)
+
+
+class AsyncDestroyModelMixin:
+    """ Destroy a model instance. Asynchronous version of DestroyModelMixin """
+    async def destroy(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        await self.aperform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    async def aperform_destroy(self, instance):
+        await instance.adelete()
@@ -0,0 +1,156 @@
+import functools
+import hashlib
+import json
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from utils.django.db.routers import reads_from_replica
+from utils.rest_framework.viewsets.conditional import ConditionalRequestMixin
+
+LIST_VERSION = 'list'
+
+
+def get_response_version_key(model, version: str) -> str:
+    return f'response-version:{model._meta.label_lower}:{version}'
+
+
+def new_response_version() -> str:
+    """ Versions start with the time they were created at, see get_response_version_age() """
+    return f'{time.time():.3f}-{uuid.uuid4().hex}'
+
+
+def get_response_version_age(version: str) -> float:
+    """ Seconds since the version was created (infinity for versions without the time) """
+    created_at, separator, _ = version.partition('-')
+    return time.time() - float(created_at) if separator else math.inf
+
+
+def invalidate_cached_responses(model, pks=()):
+    """ Invalidates cached lists of `model` objects and cached details of objects with `pks` """
+    keys = [get_response_version_key(model, LIST_VERSION), *(get_response_version_key(model, pk) for pk in pks)]
+    cache.set_many(dict.fromkeys(keys, new_response_version()), timeout=None)
+
+
+async def ainvalidate_cached_responses(model, pks=()):
+    keys = [get_response_version_key(model, LIST_VERSION), *(get_response_version_key(model, pk) for pk in pks)]
+    await cache.aset_many(dict.fromkeys(keys, new_response_version()), timeout=None)
+
+
+def cache_response(method):
+    """
+        Decorator for asynchronous actions of a ResponseCacheMixin view (must be an action returning 200 with
+        `response.data`). Authentication and permission checks run as usual, then the response data is taken from
+        the cache. If it's there and the client has it already (`If-None-Match`, `If-Modified-Since`), 304 is
+        returned without running the action at all.
+
+        ETags are based on the resource version if the action is decorated with @conditional_response as well
+        (put it below this decorator), otherwise on a digest of the data.
+
+        Data read from a replica within DATABASE_REPLICA_PIN_SECONDS of the invalidation isn't cached: the replica
+        may not have the change yet, and the cached data would be served to the clients pinned to the primary too.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, request, *args, **kwargs):
+        cache_version = await self.aget_response_version()
+        cache_key = self.get_response_cache_key(request, cache_version)
+        entry = await cache.aget(cache_key)
+        if entry is None:
+            response = await method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            version, last_modified = getattr(response, 'resource_version', None) or \
+                (self.get_digest(response.data), None)
+            entry = {'data': response.data, 'version': version, 'last_modified': last_modified}
+            if not reads_from_replica() or \
+                    get_response_version_age(cache_version) > settings.DATABASE_REPLICA_PIN_SECONDS:
+                await cache.aset(cache_key, entry, self.response_cache_timeout)
+        elif self.needs_object_permissions():
+            await self.aget_object()  # Raises 404 or 403
+
+        headers = self.get_conditional_headers(request, entry['version'], entry['last_modified'])
+        if self.is_not_modified(request, entry['version'], entry['last_modified']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
+
+    return wrapper
+
+
+class ResponseCacheMixin(ConditionalRequestMixin):
+    """
+        Caches data of responses of actions decorated with @cache_response in Django's cache.
+
+        Cache keys include the action, the caller's permission scope (see .get_response_cache_scope()), the host,
+        the path and query params. Every key also includes a version: of the object for detail actions, or of all
+        lists for list actions. Call invalidate_cached_responses() (e.g. from post_save and post_delete receivers)
+        to change the versions, which makes all the related entries unreachable at once.
+
+        Only cache actions whose result depends on nothing but the above. Object permissions are checked for cached
+        responses of detail actions by fetching the object (a query), unless no permission overrides
+        .has_object_permission() or permissions declare `allows_safe_methods_on_objects` (they allow safe methods
+        on any object). Objects are looked up by pk. The cache must be shared by all processes (see CACHES setting).
+    """
+    response_cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_response_cache_scope(self, request) -> str:
+        """ Callers in the same scope get the same responses """
+        user = request.user
+        role = 'superuser' if user.is_superuser else 'staff' if user.is_staff else \
+            'user' if user.is_authenticated else 'anonymous'
+        return ','.join([role, *(permission.__class__.__name__ for permission in self.get_permissions())])
+
+    def get_response_version_name(self) -> str:
+        """ The primary key of the requested object for detail actions, in the form invalidation uses """
+        if not self.detail:
+            return LIST_VERSION
+
+        pk_field = self.get_queryset().model._meta.pk
+        assert self.lookup_field in ('pk', pk_field.name), 'Only detail actions looked up by pk can be cached'
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            # E.g. `013` and `13` are the same object
+            return str(pk_field.to_python(self.kwargs[lookup_url_kwarg]))
+        except DjangoValidationError:
+            raise Http404
+
+    def needs_object_permissions(self) -> bool:
+        """ Whether a cached response of the action still needs the object to check object permissions """
+        return self.detail and not all(
+            type(permission).has_object_permission is BasePermission.has_object_permission
+            or (self.request.method in SAFE_METHODS and getattr(permission, 'allows_safe_methods_on_objects', False))
+            for permission in self.get_permissions()
+        )
+
+    async def aget_response_version(self) -> str:
+        version_key = get_response_version_key(self.get_queryset().model, self.get_response_version_name())
+
+        value = await cache.aget(version_key)
+        if value is None:
+            # A new version, so that entries cached before the version was evicted are not reachable anymore
+            await cache.aadd(version_key, new_response_version(), timeout=None)
+            value = await cache.aget(version_key)
+        return value
+
+    def get_response_cache_key(self, request, version: str) -> str:
+        key = json.dumps([
+            self.get_response_cache_scope(request),
+            request.get_host(),
+            request.path,
+            sorted(request.query_params.lists()),
+        ])
+        key_hash = hashlib.md5(key.encode()).hexdigest()
+        return f'response:{self.basename}:{self.action}:{version}:{key_hash}'
+
+    @staticmethod
+    def get_digest(data) -> str:
+        return hashlib.md5(json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,141 @@
+import datetime
+import functools
+import hashlib
+
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from utils.rest_framework.exceptions import PreconditionFailed
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def conditional_response(method):
+    """
+        Decorator for asynchronous safe actions of a ConditionalRequestMixin view. The version of the requested
+        resource is fetched first, and if the client has it already (`If-None-Match` or `If-Modified-Since`),
+        304 is returned without running the action. Otherwise ETag (and Last-Modified for detail actions) headers
+        are added to the response, and the version is stored as `response.resource_version` (see @cache_response).
+    """
+    @functools.wraps(method)
+    async def wrapper(self, request, *args, **kwargs):
+        resource_version = await self.aget_resource_version()
+        if resource_version is None:
+            return await method(self, request, *args, **kwargs)
+
+        if self.is_not_modified(request, *resource_version):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=self.get_conditional_headers(request, *resource_version))
+
+        response = await method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in self.get_conditional_headers(request, *resource_version).items():
+                response[header] = value
+            response.resource_version = resource_version
+        return response
+
+    return wrapper
+
+
+class ConditionalRequestMixin:
+    """
+        Conditional requests based on `version_field`, a field updated on every save (e.g. `auto_now` DateTimeField).
+        Views must have .afilter_queryset() (see AsyncFilterMixin).
+
+        Safe actions decorated with @conditional_response answer `If-None-Match` and `If-Modified-Since` with 304.
+        The version costs a single indexed query: a lookup by pk for detail actions, and a query of the current
+        page's keys for list actions (which changes when any object on the page is changed, added or removed;
+        counts of other pages' objects are not covered). Lists have no Last-Modified: removal of an object doesn't
+        change modification times of the rest, so If-Modified-Since would get 304 for a changed list.
+
+        Note that a list request which isn't answered with 304 (or from the cache of @cache_response) thus runs
+        the page query twice: once for the version and once for the data. It's an index-only keyset page, while
+        `Max(version_field)` and a count over the filtered queryset would scan all matching rows.
+
+        Unsafe actions call .acheck_precondition() to support `If-Match`, which prevents lost updates:
+        the version is compared and changed atomically, so of concurrent requests with the same ETag only one wins,
+        others get 412. After saving they should add .get_instance_conditional_headers() to the response, so that
+        the client can send the new ETag with its next update.
+    """
+    version_field = 'modified_at'
+
+    async def aget_resource_version(self) -> tuple[str, datetime.datetime | None] | None:
+        """ Returns (version, last_modified) of the resource requested by the current action, if it's known """
+        if self.detail:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = await self.afilter_queryset(self.get_queryset())
+            filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            row = await queryset.filter(**filter_kwargs).values_list('pk', self.version_field).afirst()
+            if row is None:
+                return None  # The action will respond with 404
+            return self.get_version(*row), row[1]
+
+        if getattr(self, 'paginator', None) is None or not hasattr(self.paginator, 'apaginate_queryset'):
+            return None
+
+        pk_name = self.get_queryset().model._meta.pk.attname
+        queryset = await self.afilter_queryset(self.get_queryset())
+        # Annotations are kept, since they may be needed for ordering (e.g. a search rank)
+        queryset = queryset.values(pk_name, self.version_field, *queryset.query.annotation_select)
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self, with_count=False)
+        if page is None:
+            return None
+
+        keys = [self.get_version(row[pk_name], row[self.version_field]) for row in page]
+        keys += [str(self.paginator.has_next), str(self.paginator.has_previous)]
+        return hashlib.md5(','.join(keys).encode()).hexdigest(), None
+
+    @staticmethod
+    def get_version(pk, modified_at: datetime.datetime) -> str:
+        return f'{pk}.{(modified_at - EPOCH) // datetime.timedelta(microseconds=1)}'
+
+    def get_etag(self, request, version: str, renderer_format: str = None) -> str:
+        # Different renderers produce different representations of the same resource
+        return quote_etag(f'{version}-{renderer_format or request.accepted_renderer.format}')
+
+    def get_conditional_headers(self, request, version: str, last_modified: datetime.datetime | None) -> dict:
+        headers = {'ETag': self.get_etag(request, version)}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified.timestamp())
+        return headers
+
+    def get_instance_conditional_headers(self, request, instance) -> dict:
+        """ Headers of the current version of an instance, e.g. of one just saved by an unsafe action """
+        modified_at = getattr(instance, self.version_field)
+        return self.get_conditional_headers(request, self.get_version(instance.pk, modified_at), modified_at)
+
+    def is_not_modified(self, request, version: str, last_modified: datetime.datetime | None) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:  # Takes precedence over If-Modified-Since
+            etags = [etag.removeprefix('W/') for etag in parse_etags(if_none_match)]
+            return '*' in etags or self.get_etag(request, version) in etags
+
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and last_modified is not None \
+            and int(last_modified.timestamp()) <= if_modified_since
+
+    async def acheck_precondition(self, request, instance):
+        """ Raises PreconditionFailed if `If-Match` is given, but the instance has another version """
+        if_match = request.headers.get('If-Match')
+        if if_match is None:
+            return
+
+        etags = parse_etags(if_match)
+        if '*' in etags:
+            return
+
+        modified_at = getattr(instance, self.version_field)
+        version = self.get_version(instance.pk, modified_at)
+        # ETags of any representation are accepted, e.g. fetched as `api` and updated as `json`
+        if not any(self.get_etag(request, version, renderer.format) in etags for renderer in self.get_renderers()):
+            raise PreconditionFailed()
+
+        # Claim the version, so that concurrent requests with the same ETag fail. The action saves the instance
+        # afterwards, which changes the version once again
+        claimed = await type(instance)._default_manager.filter(
+            pk=instance.pk, **{self.version_field: modified_at}
+        ).aupdate(**{self.version_field: timezone.now()})
+        if not claimed:
+            raise PreconditionFailed()
@@ -0,0 +1,47 @@
+import inspect
+
+from adrf.viewsets import ViewSetMixin
+from rest_framework.generics import GenericAPIView
+from rest_framework.viewsets import _check_attr_name, _is_extra_action
+
+from utils.rest_framework.views import AsyncAPIView
+from utils.rest_framework.viewsets.async_mixins import (
+    AsyncCreateModelMixin, AsyncDestroyModelMixin, AsyncGetObjectMixin, AsyncListModelMixin, AsyncPaginationMixin,
+    AsyncRetrieveModelMixin, AsyncUpdateModelMixin,
+)
+
+
+class AsyncGenericViewSet(AsyncGetObjectMixin, AsyncPaginationMixin, ViewSetMixin, AsyncAPIView, GenericAPIView):
+    """
+        Asynchronous version of GenericViewSet. Requests are dispatched without leaving the event loop
+        (see AsyncAPIView), and the view provides awaitable versions of the generic hooks:
+        .afilter_queryset(), .aget_object() and .apaginate_queryset(). Filter backends and pagination classes are
+        pluggable the usual way, the asynchronous ones (AsyncFilterBackendMixin, AsyncCursorPagination) are awaited.
+
+        Serializers must be adrf ones (with .ais_valid(), .asave() and .adata). DB queries are made with Django's
+        asynchronous ORM.
+    """
+    # adrf detects asynchronous viewsets by coroutines defined in the class itself, so subclasses defining no
+    # actions would be dispatched synchronously
+    view_is_async = True
+
+    @classmethod
+    def get_extra_actions(cls):
+        """
+            The same as ViewSetMixin.get_extra_actions(), but members are looked up without calling descriptors:
+            `schema` descriptor imports DEFAULT_SCHEMA_CLASS (drf_spectacular) when a router builds URLs
+        """
+        return [_check_attr_name(method, name) for name, method in inspect.getmembers_static(cls, _is_extra_action)]
+
+
+class AsyncReadOnlyModelViewSet(AsyncRetrieveModelMixin, AsyncListModelMixin, AsyncGenericViewSet):
+    """ Asynchronous version of ReadOnlyModelViewSet: `list` and `retrieve` actions """
+
+
+class AsyncModelViewSet(AsyncCreateModelMixin, AsyncRetrieveModelMixin, AsyncUpdateModelMixin,
+                        AsyncDestroyModelMixin, AsyncListModelMixin, AsyncGenericViewSet):
+    """
+        Asynchronous version of ModelViewSet: `list`, `create`, `retrieve`, `update`, `partial_update` and `destroy`
+        actions. Customize them with asynchronous hooks .aperform_create(), .aperform_update() and
+        .aperform_destroy().
+    """
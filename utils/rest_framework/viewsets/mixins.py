@@ -23,8 +23,7 @@ class ActionBasedSerializerClassMixin(viewsets.GenericViewSet):
         super().__init__(*args, **kwargs)
 
     def get_serializer_class(self):
-        attr_name = f'{self.action}_serializer_class'
-        if hasattr(self, attr_name):
-            serializer_class = getattr(self, attr_name)
-            self.serializer_class = serializer_class
+        serializer_class = getattr(self, f'{self.action}_serializer_class', None)
+        if serializer_class is not None:
+            return serializer_class
         return super().get_serializer_class()
@@ -0,0 +1,52 @@
+from django.http import QueryDict
+from django.urls import URLResolver, get_resolver
+from rest_framework.generics import GenericAPIView
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+def warm_up_views():
+    """
+        Builds serializer fields and filterset forms of every generic API view in the URLconf (for every action
+        of viewsets), which are otherwise built on the first request of each action. Nothing is queried.
+    """
+    seen = set()
+    for callback in iter_callbacks(get_resolver().url_patterns):
+        view_class = getattr(callback, 'cls', None)
+        if view_class is None or not issubclass(view_class, GenericAPIView):
+            continue
+        for action in (getattr(callback, 'actions', None) or {None: None}).values():
+            if (view_class, action) in seen:
+                continue
+            seen.add((view_class, action))
+
+            view = view_class(**callback.initkwargs)
+            view.action = action
+            view.request = view.format_kwarg = None
+            view.args, view.kwargs = (), {}
+            view.get_serializer_class()().fields  # noqa: B018, fields are built on first access
+            warm_up_filtersets(view)
+
+
+def warm_up_filtersets(view):
+    queryset = view.get_queryset() if getattr(view, 'queryset', None) is not None else None
+    for backend_class in getattr(view, 'filter_backends', ()):
+        backend = backend_class()
+        if queryset is None or not hasattr(backend, 'get_filterset_class'):
+            continue
+        filterset_class = backend.get_filterset_class(view, queryset)
+        if filterset_class is not None:
+            filterset_class(data=QueryDict(), queryset=queryset).is_valid()
+
+
+def iter_callbacks(url_patterns):
+    for pattern in url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_callbacks(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+def warm_up_jwt():
+    """ Creates and verifies a token of every AUTH_TOKEN_CLASSES, which loads signing keys and PyJWT algorithms """
+    for token_class in jwt_settings.AUTH_TOKEN_CLASSES:
+        token_class(str(token_class()))